@@ -0,0 +1,93 @@
+"""
+Benchmark: ExecTool._guard_command on long generated shell scripts.
+
+Compares the precompiled guard (single alternation, compiled path
+extractors, each distinct path resolved once) with the previous implementation,
+which compiled every deny/allow pattern on each call (through re's cache)
+and resolved every candidate path against the filesystem.
+
+Usage:
+    python benchmarks/bench_exec_guard.py [--lines 500] [--runs 200]
+"""
+
+import argparse
+import re
+import tempfile
+import time
+from pathlib import Path
+
+from nanobot.agent.tools.shell import ExecTool
+
+
+def legacy_guard(tool: ExecTool, command: str, cwd: str) -> str | None:
+    """The guard as it was before precompilation."""
+    cmd = command.strip()
+    lower = cmd.lower()
+
+    for pattern in tool.deny_patterns:
+        if re.search(pattern, lower):
+            return "Error: Command blocked by safety guard (dangerous pattern detected)"
+
+    if tool.allow_patterns:
+        if not any(re.search(p, lower) for p in tool.allow_patterns):
+            return "Error: Command blocked by safety guard (not in allowlist)"
+
+    if tool.restrict_to_workspace:
+        if "..\\" in cmd or "../" in cmd:
+            return "Error: Command blocked by safety guard (path traversal detected)"
+
+        cwd_path = Path(cwd).resolve()
+        win_paths = re.findall(r"[A-Za-z]:\\[^\\\"']+", cmd)
+        posix_paths = re.findall(r"(?:^|[\s|>])(/[^\s\"'>]+)", cmd)
+
+        for raw in win_paths + posix_paths:
+            try:
+                p = Path(raw.strip()).resolve()
+            except Exception:
+                continue
+            if p.is_absolute() and cwd_path not in p.parents and p != cwd_path:
+                return "Error: Command blocked by safety guard (path outside working dir)"
+
+    return None
+
+
+def make_script(workspace: str, lines: int) -> str:
+    out = []
+    for i in range(lines):
+        out.append(
+            f"cp {workspace}/src/module_{i % 50}.py {workspace}/build/module_{i}.py && "
+            f"grep -n 'def ' {workspace}/build/module_{i}.py | sort > {workspace}/logs/defs_{i}.txt"
+        )
+    return "\n".join(out)
+
+
+def bench(fn, tool: ExecTool, script: str, cwd: str, runs: int) -> float:
+    fn(tool, script, cwd)  # Warm up
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = fn(tool, script, cwd)
+    elapsed = (time.perf_counter() - start) / runs
+    assert result is None, result
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workspace:
+        tool = ExecTool(working_dir=workspace, restrict_to_workspace=True)
+        script = make_script(workspace, args.lines)
+        print(f"script: {args.lines} lines, {len(script)} chars, {args.runs} runs")
+        for label, fn in (
+            ("legacy", legacy_guard),
+            ("precompiled", lambda t, c, d: t._guard_command(c, d)),
+        ):
+            per_call = bench(fn, tool, script, workspace, args.runs)
+            print(f"{label:>12}: {per_call * 1000:8.3f} ms/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: event loop responsiveness while a filesystem tool reads a large file.
+
+Simulates several concurrent chats (coroutines that tick every 5 ms) while
+read_file loads a large file, once with the old inline blocking read and once
+with the thread-pool backed ReadFileTool. Reports the worst and p99 tick lag
+seen by the chats.
+
+Usage:
+    python benchmarks/bench_fs_tools.py [--size-mb 200] [--chats 20]
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from loguru import logger
+
+from nanobot.agent.tools.filesystem import ReadFileTool, fs_metrics
+
+TICK = 0.005
+
+
+async def _chat(stop: asyncio.Event, lags: list[float]) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def _run(read, chats: int) -> tuple[float, list[float]]:
+    stop = asyncio.Event()
+    lags: list[float] = []
+    tasks = [asyncio.create_task(_chat(stop, lags)) for _ in range(chats)]
+    await asyncio.sleep(0.05)
+    start = time.perf_counter()
+    await read()
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(0.05)
+    stop.set()
+    await asyncio.gather(*tasks)
+    return elapsed, lags
+
+
+def _report(label: str, elapsed: float, lags: list[float]) -> None:
+    lags = sorted(lags)
+    p99 = lags[int(len(lags) * 0.99) - 1] if lags else 0.0
+    print(
+        f"{label:<22} read {elapsed * 1000:8.1f} ms | chat ticks {len(lags):6d} | "
+        f"lag max {max(lags) * 1000:8.1f} ms  p99 {p99 * 1000:7.1f} ms  "
+        f"median {statistics.median(lags) * 1000:5.2f} ms"
+    )
+
+
+async def main(size_mb: int, chats: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "big.log"
+        line = "2026-01-01 12:00:00 INFO some fairly typical log line payload\n"
+        with open(path, "w", encoding="utf-8") as f:
+            for _ in range(size_mb * 1024 * 1024 // len(line)):
+                f.write(line)
+
+        async def inline_read() -> None:
+            path.read_text(encoding="utf-8")  # old behaviour: blocks the loop
+
+        tool = ReadFileTool()
+
+        async def pooled_read() -> None:
+            await tool.execute(path=str(path))
+
+        print(f"file {size_mb} MB, {chats} concurrent chats")
+        _report("inline (blocking)", *await _run(inline_read, chats))
+        _report("fs thread pool", *await _run(pooled_read, chats))
+        print(f"metrics: {fs_metrics.snapshot()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size-mb", type=int, default=200)
+    parser.add_argument("--chats", type=int, default=20)
+    args = parser.parse_args()
+    logger.disable("nanobot")
+    asyncio.run(main(args.size_mb, args.chats))
@@ -0,0 +1,134 @@
+"""
+Benchmark: web_fetch content extraction on real-world-sized HTML pages.
+
+Generates documentation-style pages (nav, sidebar, headings, code blocks,
+tables, links, inline scripts) of typical sizes and reports, per size:
+
+- readability: the readability + markdown regex path, inline
+- stream: the single-pass lxml extractor used for very large pages
+- loop lag: the longest event-loop stall while extract_async() runs, vs
+  the stall when extracting inline on the loop (previous behaviour)
+
+Usage:
+    python benchmarks/bench_html_extract.py [--sizes 50,300,1000,4000] [--runs 5]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from readability import Document
+
+from nanobot.utils.html_extract import (
+    extract,
+    extract_async,
+    html_to_markdown,
+    shutdown_extract_pool,
+    stream_extract,
+)
+
+WORDS = (
+    "request response client server config cache token stream parser event loop "
+    "process worker thread handler module function return value error timeout "
+    "retry session context message channel provider model tool result"
+).split()
+
+
+def make_page(target_kb: int, seed: int = 0) -> str:
+    rnd = random.Random(seed)
+
+    def sentence(n: int) -> str:
+        return " ".join(rnd.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+    head = (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>API Reference</title>"
+        "<style>body{font-family:sans-serif}.sidebar{width:240px}</style>"
+        "<script>window.dataLayer=[];function gtag(){dataLayer.push(arguments)}</script></head><body>"
+        "<header><nav>" + "".join(f"<a href='/docs/{w}'>{w}</a>" for w in WORDS) + "</nav></header>"
+        "<aside class='sidebar'><ul>" + "".join(f"<li><a href='#s{i}'>Section {i}</a></li>" for i in range(40))
+        + "</ul></aside><main><article>"
+    )
+    parts = [head]
+    size = len(head)
+    i = 0
+    while size < target_kb * 1024:
+        block = (
+            f"<h2 id='s{i}'>Section {i}</h2>"
+            f"<p>{sentence(40)} See <a href='/docs/ref/{i}'>the reference</a> for {sentence(8)}</p>"
+            f"<pre><code>def handler_{i}(request):\n    return respond(request, status=200)\n</code></pre>"
+            "<table><tr><th>Name</th><th>Type</th><th>Description</th></tr>"
+            + "".join(f"<tr><td>param_{j}</td><td>str</td><td>{sentence(10)}</td></tr>" for j in range(5))
+            + f"</table><ul>{''.join(f'<li>{sentence(12)}</li>' for _ in range(4))}</ul>"
+            f"<div class='note'><p>{sentence(25)}</p></div>"
+        )
+        parts.append(block)
+        size += len(block)
+        i += 1
+    parts.append("</article></main><footer><p>Copyright</p></footer></body></html>")
+    return "".join(parts)
+
+
+def timed(fn, runs: int) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start) / runs
+
+
+async def max_loop_lag(coro_factory) -> tuple[float, float]:
+    """Run the coroutine while a ticker measures the longest gap between ticks."""
+    lag = 0.0
+    done = False
+
+    async def ticker() -> None:
+        nonlocal lag
+        last = time.perf_counter()
+        while not done:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            lag = max(lag, now - last)
+            last = now
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    await coro_factory()
+    elapsed = time.perf_counter() - start
+    done = True
+    await task
+    return elapsed, lag
+
+
+async def measure_lag(page: str) -> None:
+    async def inline() -> None:
+        extract(page, "text/html", "markdown")
+
+    async def offloaded() -> None:
+        await extract_async(page, "text/html", "markdown")
+
+    await offloaded()  # Start the worker process outside the measurement
+    for label, factory in (("inline", inline), ("offloaded", offloaded)):
+        elapsed, lag = await max_loop_lag(factory)
+        print(f"    {label:>9}: {elapsed * 1000:8.1f} ms total, max loop stall {lag * 1000:8.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="50,300,1000,4000", help="Page sizes in KB")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    for kb in (int(s) for s in args.sizes.split(",")):
+        page = make_page(kb)
+        print(f"page: {len(page) / 1024:.0f} KB")
+        per_call = timed(lambda: html_to_markdown(Document(page).summary()), args.runs)
+        print(f"  readability: {per_call * 1000:8.1f} ms/page")
+        per_call = timed(lambda: stream_extract(page), args.runs)
+        print(f"       stream: {per_call * 1000:8.1f} ms/page")
+        asyncio.run(measure_lag(page))
+    shutdown_extract_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,150 @@
 """Context builder for assembling agent prompts."""
 
-import base64
-import mimetypes
+import asyncio
 import platform
+import re
+import string
+import threading
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, Callable
 
+from loguru import logger
+
+from nanobot.agent.media import ImageEncoder
 from nanobot.agent.memory import MemoryStore
 from nanobot.agent.skills import SkillsLoader
 
+if TYPE_CHECKING:
+    from nanobot.config.schema import ImageConfig, SkillsConfig
+
+
+# Placeholders each built-in prompt is formatted with. CONTEXT.md templates are
+# checked against these when loaded, so a typo fails at startup, not mid-request.
+PROMPT_FIELDS: dict[str, frozenset[str]] = {
+    "Identity": frozenset({"now", "tz", "runtime", "workspace_path"}),
+    "Skills Summary": frozenset({"skills_summary"}),
+    "Other Tools": frozenset({"omitted_tools"}),
+    "Memory Consolidation": frozenset({"current_memory", "conversation"}),
+    "Subagent System": frozenset({"now", "tz", "workspace"}),
+    "Subagent Announcement": frozenset({"label", "status_text", "task", "result"}),
+}
+
+# Match lines strictly like # ===[Title START]=== / # ===[Title END]===
+_START_PATTERN = re.compile(r"^# ===\[(.+?) START\]===$")
+_END_PATTERN = re.compile(r"^# ===\[(.+?) END\]===$")
+
+
+def _compile_template(template: str) -> tuple[Callable[[dict[str, Any]], str], frozenset[str]]:
+    """
+    Pre-parse a str.format template into a formatter function.
+
+    Returns:
+        Tuple of (formatter taking a kwargs dict, placeholder names used).
+    """
+    parts: list[tuple[str, str | None]] = []
+    fields: set[str] = set()
+    simple = True
+    for literal, field, spec, conversion in string.Formatter().parse(template):
+        if field is not None:
+            if not field.isidentifier() or spec or conversion:
+                simple = False
+            fields.add(field.split(".", 1)[0].split("[", 1)[0])
+        parts.append((literal, field))
+
+    if not fields:
+        constant = "".join(literal for literal, _ in parts)
+        return (lambda kwargs: constant), frozenset()
+    if not simple:
+        # Attribute access, format specs etc. - let str.format handle them
+        return (lambda kwargs: template.format_map(kwargs)), frozenset(fields)
+
+    def render(kwargs: dict[str, Any]) -> str:
+        return "".join(
+            literal if field is None else f"{literal}{kwargs[field]}"
+            for literal, field in parts
+        )
+
+    return render, frozenset(fields)
+
 
 class PromptLoader:
-    """Loads and formats prompts from CONTEXT.md."""
+    """
+    Loads and formats prompts from CONTEXT.md.
+
+    Built-in prompts (PROMPT_FIELDS) are parsed into formatter functions and
+    checked when the file is loaded; other blocks, such as the workspace file
+    templates, stay raw text and are only parsed on their first ``get()``.
+    Everything is reloaded when the file's mtime changes. Use ``prompt_registry.get(path)`` to share one
+    loader per file across the process.
+    """
 
     def __init__(self, context_path: Path):
-        self.prompts = self._load_prompts(context_path)
+        self.path = context_path
+        self.prompts: dict[str, str] = {}
+        self._compiled: dict[str, Callable[[dict[str, Any]], str]] = {}
+        self._mtime_ns: int | None = None
+        self._lock = threading.Lock()
+        self._load(strict=True)
+
+    def _stat_mtime(self) -> int | None:
+        try:
+            return self.path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def _load(self, strict: bool) -> None:
+        """(Re)load and compile the file; invalid templates raise (strict) or keep the old set."""
+        mtime = self._stat_mtime()
+        prompts = self._load_prompts(self.path) if mtime is not None else {}
+        try:
+            compiled = self._compile_prompts(prompts)
+        except ValueError as e:
+            if strict:
+                raise
+            logger.error(f"Keeping previous prompts, reload of {self.path} failed: {e}")
+            self._mtime_ns = mtime
+            return
+        self.prompts, self._compiled, self._mtime_ns = prompts, compiled, mtime
+
+    def _compile_prompts(self, prompts: dict[str, str]) -> dict[str, Callable[[dict[str, Any]], str]]:
+        compiled = {}
+        for key, template in prompts.items():
+            if key not in PROMPT_FIELDS:
+                continue
+            try:
+                render, fields = _compile_template(template)
+            except ValueError as e:
+                raise ValueError(f"Prompt '{key}' in {self.path} is not a valid template: {e}") from e
+            expected = PROMPT_FIELDS[key]
+            if not fields <= expected:
+                unknown = ", ".join(sorted(fields - expected))
+                raise ValueError(
+                    f"Prompt '{key}' in {self.path} uses unknown placeholders: {unknown} "
+                    f"(available: {', '.join(sorted(expected))}; escape literal braces as {{{{ }}}})"
+                )
+            compiled[key] = render
+        return compiled
+
+    def refresh(self) -> None:
+        """Reload the prompts if the file changed on disk."""
+        if self._stat_mtime() == self._mtime_ns:
+            return
+        with self._lock:
+            if self._stat_mtime() != self._mtime_ns:
+                logger.info(f"Reloading prompts from {self.path}")
+                self._load(strict=False)
 
     def _load_prompts(self, path: Path) -> dict[str, str]:
-        if not path.exists():
-            return {}
-        
         content = path.read_text(encoding="utf-8")
         prompts = {}
         current_title = None
         current_lines = []
 
-        import re
-        # Match lines strictly like # ===[Title START]===
-        start_pattern = re.compile(r"^# ===\[(.+?) START\]===$")
-        # Match lines strictly like # ===[Title END]===
-        end_pattern = re.compile(r"^# ===\[(.+?) END\]===$")
-
         for line in content.splitlines():
             stripped = line.strip()
             
             # Check for start block
-            start_match = start_pattern.match(stripped)
+            start_match = _START_PATTERN.match(stripped)
             if start_match:
                 # If we were already in a block, save it (implicit closing) or warn
                 # But strict logic says we should close previous block first.
@@ -48,7 +157,7 @@ class PromptLoader:
                 continue
             
             # Check for end block
-            end_match = end_pattern.match(stripped)
+            end_match = _END_PATTERN.match(stripped)
             if end_match:
                 title = end_match.group(1).strip()
                 if current_title == title:
@@ -69,10 +178,41 @@ class PromptLoader:
 
     def get(self, key: str, **kwargs: Any) -> str:
         """Get a prompt template and format it with kwargs."""
-        template = self.prompts.get(key, "")
-        if not template:
-            return ""
-        return template.format(**kwargs)
+        self.refresh()
+        render = self._compiled.get(key)
+        if render is None:
+            template = self.prompts.get(key, "")
+            if not template:
+                return ""
+            render = self._compiled[key] = _compile_template(template)[0]
+        return render(kwargs)
+
+
+class PromptRegistry:
+    """Process-wide cache of PromptLoaders, one per CONTEXT.md file."""
+
+    def __init__(self):
+        self._loaders: dict[Path, PromptLoader] = {}
+        self._lock = threading.Lock()
+
+    def get(self, context_path: Path) -> PromptLoader:
+        """Get the shared loader for a file, parsing it on first use."""
+        key = context_path.expanduser().resolve()
+        loader = self._loaders.get(key)
+        if loader is None:
+            with self._lock:
+                loader = self._loaders.get(key)
+                if loader is None:
+                    loader = self._loaders[key] = PromptLoader(key)
+        return loader
+
+    def clear(self) -> None:
+        """Drop all cached loaders."""
+        with self._lock:
+            self._loaders.clear()
+
+
+prompt_registry = PromptRegistry()
 
 
 class ContextBuilder:
@@ -85,24 +225,47 @@ class ContextBuilder:
     
     BOOTSTRAP_FILES = ["AGENTS.md", "SOUL.md", "USER.md", "TOOLS.md", "IDENTITY.md"]
     
-    def __init__(self, workspace: Path):
+    def __init__(
+        self,
+        workspace: Path,
+        skills_config: "SkillsConfig | None" = None,
+        image_config: "ImageConfig | None" = None,
+    ):
+        from nanobot.config.schema import ImageConfig, SkillsConfig
+        skills_config = skills_config or SkillsConfig()
+        image_config = image_config or ImageConfig()
         self.workspace = workspace
         self.memory = MemoryStore(workspace)
-        self.skills = SkillsLoader(workspace)
+        self.skills = SkillsLoader(
+            workspace,
+            top_k=skills_config.top_k,
+            max_tokens=skills_config.max_tokens,
+            min_score=skills_config.min_score,
+            pinned=skills_config.pinned,
+        )
+        self.images = ImageEncoder(
+            max_dimension=image_config.max_dimension,
+            quality=image_config.quality,
+        )
         
         # Load centralized prompts
         # Load centralized prompts from CONTEXT.md in workspace
         context_md_path = self.workspace / "CONTEXT.md"
         if not context_md_path.exists():
             raise FileNotFoundError(f"Critical context file missing: {context_md_path}")
-        self.prompts = PromptLoader(context_md_path)
+        self.prompts = prompt_registry.get(context_md_path)
     
-    def build_system_prompt(self, skill_names: list[str] | None = None) -> str:
+    def build_system_prompt(
+        self,
+        skill_names: list[str] | None = None,
+        current_message: str | None = None,
+    ) -> str:
         """
         Build the system prompt from bootstrap files, memory, and skills.
         
         Args:
             skill_names: Optional list of skills to include.
+            current_message: The user message, used to pick relevant skills.
         
         Returns:
             Complete system prompt.
@@ -130,8 +293,8 @@ class ContextBuilder:
             if always_content:
                 parts.append(f"# Active Skills\n\n{always_content}")
         
-        # 2. Available skills: only show summary (agent uses read_file to load)
-        skills_summary = self.skills.build_skills_summary()
+        # 2. Available skills: only show summary of the relevant ones (agent uses read_file to load)
+        skills_summary = self.skills.build_skills_summary(current_message)
         if skills_summary:
             prompt = self.prompts.get("Skills Summary", skills_summary=skills_summary)
             if prompt:
@@ -169,7 +332,7 @@ class ContextBuilder:
         
         return "\n\n".join(parts) if parts else ""
     
-    def build_messages(
+    async def build_messages(
         self,
         history: list[dict[str, Any]],
         current_message: str,
@@ -195,7 +358,7 @@ class ContextBuilder:
         messages = []
 
         # System prompt
-        system_prompt = self.build_system_prompt(skill_names)
+        system_prompt = self.build_system_prompt(skill_names, current_message)
         if channel and chat_id:
             system_prompt += f"\n\n## Current Session\nChannel: {channel}\nChat ID: {chat_id}"
         messages.append({"role": "system", "content": system_prompt})
@@ -204,24 +367,18 @@ class ContextBuilder:
         messages.extend(history)
 
         # Current message (with optional image attachments)
-        user_content = self._build_user_content(current_message, media)
+        user_content = await self._build_user_content(current_message, media)
         messages.append({"role": "user", "content": user_content})
 
         return messages
 
-    def _build_user_content(self, text: str, media: list[str] | None) -> str | list[dict[str, Any]]:
-        """Build user message content with optional base64-encoded images."""
+    async def _build_user_content(self, text: str, media: list[str] | None) -> str | list[dict[str, Any]]:
+        """Build user message content with optional base64-encoded (downscaled) images."""
         if not media:
             return text
         
-        images = []
-        for path in media:
-            p = Path(path)
-            mime, _ = mimetypes.guess_type(path)
-            if not p.is_file() or not mime or not mime.startswith("image/"):
-                continue
-            b64 = base64.b64encode(p.read_bytes()).decode()
-            images.append({"type": "image_url", "image_url": {"url": f"data:{mime};base64,{b64}"}})
+        urls = await asyncio.gather(*(self.images.encode(path) for path in media))
+        images = [{"type": "image_url", "image_url": {"url": url}} for url in urls if url]
         
         if not images:
             return text
@@ -1,11 +1,10 @@
 """Agent loop: the core processing engine."""
 
 import asyncio
-from contextlib import AsyncExitStack
 import json
 import json_repair
 from pathlib import Path
-from typing import Any
+from typing import Any, TYPE_CHECKING
 
 from loguru import logger
 
@@ -13,10 +12,15 @@ from nanobot.bus.events import InboundMessage, OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.providers.base import LLMProvider
 from nanobot.agent.context import ContextBuilder
+from nanobot.agent.tool_selection import ToolSelector
 from nanobot.agent.tools.registry import ToolRegistry
-from nanobot.agent.tools.filesystem import ReadFileTool, WriteFileTool, EditFileTool, ListDirTool
-from nanobot.agent.tools.shell import ExecTool
-from nanobot.agent.tools.web import WebSearchTool, WebFetchTool
+from nanobot.agent.tools.filesystem import ReadFileTool, ReadFilesTool, WriteFileTool, EditFileTool, ListDirTool
+from nanobot.agent.tools.search import SearchTool
+from nanobot.agent.tools.shell import ExecScheduler, ExecTool, format_progress
+from nanobot.utils.html_extract import shutdown_extract_pool
+from nanobot.utils.http import close_http_clients
+from nanobot.agent.tools.web import WebSearchTool, WebFetchTool, WebFetchManyTool
+from nanobot.agent.tools.web_cache import SearchCache, WebCache
 from nanobot.agent.tools.message import MessageTool
 from nanobot.agent.tools.spawn import SpawnTool
 from nanobot.agent.tools.cron import CronTool
@@ -26,6 +30,16 @@ from nanobot.session.manager import Session, SessionManager
 from nanobot.lsp.manager import LSPManager
 from nanobot.agent.tools.lsp import LSPDefinitionTool, LSPReferencesTool, LSPHoverTool
 
+if TYPE_CHECKING:
+    from nanobot.agent.tools.mcp import MCPManager
+    from nanobot.config.schema import (
+        ImageConfig,
+        SkillsConfig,
+        ToolSelectionConfig,
+        WebFetchConfig,
+        WebSearchConfig,
+    )
+
 
 class AgentLoop:
     """
@@ -50,6 +64,8 @@ class AgentLoop:
         max_tokens: int = 4096,
         memory_window: int = 50,
         brave_api_key: str | None = None,
+        web_search_config: "WebSearchConfig | None" = None,
+        web_fetch_config: "WebFetchConfig | None" = None,
         exec_config: "ExecToolConfig | None" = None,
         cron_service: "CronService | None" = None,
         restrict_to_workspace: bool = False,
@@ -57,8 +73,16 @@ class AgentLoop:
         mcp_servers: dict | None = None,
         lsp_config: dict | None = None,
         custom_tools: list[str] | None = None,
+        skills_config: "SkillsConfig | None" = None,
+        image_config: "ImageConfig | None" = None,
+        tool_selection_config: "ToolSelectionConfig | None" = None,
     ):
-        from nanobot.config.schema import ExecToolConfig
+        from nanobot.config.schema import (
+            ExecToolConfig,
+            ToolSelectionConfig,
+            WebFetchConfig,
+            WebSearchConfig,
+        )
         from nanobot.cron.service import CronService
         self.bus = bus
         self.provider = provider
@@ -69,14 +93,45 @@ class AgentLoop:
         self.max_tokens = max_tokens
         self.memory_window = memory_window
         self.brave_api_key = brave_api_key
+        self.web_search_config = web_search_config or WebSearchConfig()
+        self.search_cache = SearchCache(
+            ttl=self.web_search_config.cache_ttl,
+            max_entries=self.web_search_config.cache_max_entries,
+            path=Path(self.web_search_config.cache_file) if self.web_search_config.cache_file else None,
+        ) if self.web_search_config.cache_ttl > 0 else None
+        self.web_fetch_config = web_fetch_config or WebFetchConfig()
+        # One cache shared with subagents (entries are also shared across processes on disk)
+        self.web_cache = WebCache(
+            Path(self.web_fetch_config.cache_dir),
+            max_bytes=self.web_fetch_config.cache_max_mb * 1024 * 1024,
+        ) if self.web_fetch_config.cache else None
         self.exec_config = exec_config or ExecToolConfig()
+        self.exec_scheduler = ExecScheduler(
+            max_concurrent=self.exec_config.max_concurrent,
+            max_per_session=self.exec_config.max_per_session,
+            cpu_seconds=self.exec_config.cpu_seconds,
+            memory_mb=self.exec_config.memory_mb,
+            max_open_files=self.exec_config.max_open_files,
+            max_file_size_mb=self.exec_config.max_file_size_mb,
+            max_output_bytes=self.exec_config.max_output_bytes,
+        )
         self.cron_service = cron_service
         self.restrict_to_workspace = restrict_to_workspace
         self.custom_tools_config = custom_tools or []
 
-        self.context = ContextBuilder(workspace)
+        self.context = ContextBuilder(
+            workspace, skills_config=skills_config, image_config=image_config
+        )
         self.sessions = session_manager or SessionManager(workspace)
         self.tools = ToolRegistry()
+        tool_selection_config = tool_selection_config or ToolSelectionConfig()
+        self.tool_selector = ToolSelector(
+            self.tools,
+            top_k=tool_selection_config.top_k,
+            min_score=tool_selection_config.min_score,
+            pinned=tool_selection_config.pinned,
+            recent_turns=tool_selection_config.recent_turns,
+        )
         self.subagents = SubagentManager(
             provider=provider,
             workspace=workspace,
@@ -85,37 +140,56 @@ class AgentLoop:
             temperature=self.temperature,
             max_tokens=self.max_tokens,
             brave_api_key=brave_api_key,
+            web_search_config=self.web_search_config,
+            search_cache=self.search_cache,
+            web_fetch_config=self.web_fetch_config,
+            web_cache=self.web_cache,
             exec_config=self.exec_config,
+            exec_scheduler=self.exec_scheduler,
             restrict_to_workspace=restrict_to_workspace,
         )
         
         self.lsp = LSPManager(lsp_config or {}, workspace)
 
         self._running = False
+        self._exec_route = ("cli", "direct")  # Chat that exec progress notes go to
         self._mcp_servers = mcp_servers or {}
-        self._mcp_stack: AsyncExitStack | None = None
-        self._mcp_connected = False
+        self._mcp: "MCPManager | None" = None
         self._register_default_tools()
     
     def _register_default_tools(self) -> None:
         """Register the default set of tools."""
         # File tools (restrict to workspace if configured)
         allowed_dir = self.workspace if self.restrict_to_workspace else None
-        self.tools.register(ReadFileTool(allowed_dir=allowed_dir))
+        read_tool = ReadFileTool(allowed_dir=allowed_dir)
+        self.tools.register(read_tool)
+        self.tools.register(ReadFilesTool(allowed_dir=allowed_dir, reader=read_tool))
         self.tools.register(WriteFileTool(allowed_dir=allowed_dir))
         self.tools.register(EditFileTool(allowed_dir=allowed_dir))
         self.tools.register(ListDirTool(allowed_dir=allowed_dir))
+        self.tools.register(SearchTool(root=self.workspace, allowed_dir=allowed_dir))
         
         # Shell tool
         self.tools.register(ExecTool(
             working_dir=str(self.workspace),
             timeout=self.exec_config.timeout,
             restrict_to_workspace=self.restrict_to_workspace,
+            persistent=self.exec_config.persistent,
+            idle_timeout=self.exec_config.idle_timeout,
+            scheduler=self.exec_scheduler,
+            progress_callback=self._report_exec_progress,
+            progress_interval=self.exec_config.progress_interval,
         ))
         
         # Web tools
-        self.tools.register(WebSearchTool(api_key=self.brave_api_key))
-        self.tools.register(WebFetchTool())
+        self.tools.register(WebSearchTool(
+            api_key=self.brave_api_key,
+            max_results=self.web_search_config.max_results,
+            cache=self.search_cache,
+        ))
+        fetch_tool = WebFetchTool(max_chars=self.web_fetch_config.max_chars, cache=self.web_cache)
+        self.tools.register(fetch_tool)
+        self.tools.register(WebFetchManyTool(fetcher=fetch_tool))
         
         # Message tool
         message_tool = MessageTool(send_callback=self.bus.publish_outbound)
@@ -141,18 +215,28 @@ class AgentLoop:
             for tool in custom_tools:
                 self.tools.register(tool)
     
-    async def _connect_mcp(self) -> None:
-        """Connect to configured MCP servers (one-time, lazy)."""
-        if self._mcp_connected or not self._mcp_servers:
+    async def _connect_mcp(self, wait: bool = False) -> None:
+        """
+        Start MCP server connections (one-time, lazy). Servers connect in the
+        background and register their tools as they come online; wait=True
+        blocks until each has connected or failed once (for one-shot CLI use).
+        """
+        if not self._mcp_servers:
             return
-        self._mcp_connected = True
-        from nanobot.agent.tools.mcp import connect_mcp_servers
-        self._mcp_stack = AsyncExitStack()
-        await self._mcp_stack.__aenter__()
-        await connect_mcp_servers(self._mcp_servers, self.tools, self._mcp_stack)
+        if self._mcp is None:
+            from nanobot.agent.tools.mcp import MCPManager
+            self._mcp = MCPManager(self._mcp_servers, self.tools)
+            self._mcp.start()
+        if wait:
+            await self._mcp.wait_ready()
 
     def _set_tool_context(self, channel: str, chat_id: str) -> None:
         """Update context for all tools that need routing info."""
+        # Tool results are not kept in session history, so a new turn starts unseen
+        if read_tool := self.tools.get("read_file"):
+            if isinstance(read_tool, ReadFileTool):
+                read_tool.reset_seen()
+
         if message_tool := self.tools.get("message"):
             if isinstance(message_tool, MessageTool):
                 message_tool.set_context(channel, chat_id)
@@ -165,6 +249,26 @@ class AgentLoop:
             if isinstance(cron_tool, CronTool):
                 cron_tool.set_context(channel, chat_id)
 
+        if exec_tool := self.tools.get("exec"):
+            if isinstance(exec_tool, ExecTool):
+                exec_tool.set_context(f"{channel}:{chat_id}")
+        self._exec_route = (channel, chat_id)
+
+    async def _report_exec_progress(
+        self, command: str, elapsed: float, output_bytes: int, last_line: str
+    ) -> None:
+        """Tell the current chat that a long exec command is still running."""
+        channel, chat_id = self._exec_route
+        logger.info(f"exec still running after {elapsed:.0f}s ({output_bytes} bytes): {command[:80]}")
+        if channel == "cli":
+            return  # Nothing consumes outbound messages in CLI mode
+        await self.bus.publish_outbound(OutboundMessage(
+            channel=channel,
+            chat_id=chat_id,
+            content=format_progress(command, elapsed, output_bytes, last_line),
+            metadata={"progress": True},
+        ))
+
     def _try_parse_tool_calls(self, content: str) -> list[dict[str, Any]]:
         """
         Attempt to parse tool calls from text content (e.g., exec(...)).
@@ -244,12 +348,21 @@ class AgentLoop:
         
         return tool_calls
 
-    async def _run_agent_loop(self, initial_messages: list[dict]) -> tuple[str | None, list[str]]:
+    async def _run_agent_loop(
+        self,
+        initial_messages: list[dict],
+        query: str | None = None,
+        recent_tools: list[str] | None = None,
+    ) -> tuple[str | None, list[str]]:
         """
         Run the agent iteration loop.
 
         Args:
             initial_messages: Starting messages for the LLM conversation.
+            query: The message being answered. When given, only the tools
+                relevant to it (plus pinned and recent ones) are attached
+                until the model calls a tool outside that subset.
+            recent_tools: Tools used recently in the session.
 
         Returns:
             Tuple of (final_content, list_of_tools_used).
@@ -258,13 +371,22 @@ class AgentLoop:
         iteration = 0
         final_content = None
         tools_used: list[str] = []
+        tool_defs = self.tools.get_definitions() if query is None else self.tool_selector.select(query, recent_tools)
+        subset = len(tool_defs) < len(self.tools)
+        if subset and (note := self.context.prompts.get(
+            "Other Tools", omitted_tools=", ".join(self.tool_selector.omitted(tool_defs))
+        )):
+            messages[0] = {**messages[0], "content": f"{messages[0]['content']}\n\n---\n\n{note}"}
+        saved = 0
 
         while iteration < self.max_iterations:
             iteration += 1
 
+            if subset:
+                saved += self.tool_selector.record(tool_defs)
             response = await self.provider.chat(
                 messages=messages,
-                tools=self.tools.get_definitions(),
+                tools=tool_defs,
                 model=self.model,
                 temperature=self.temperature,
                 max_tokens=self.max_tokens,
@@ -320,6 +442,8 @@ class AgentLoop:
                 # We need to reconstruct "response.tool_calls" structure for the loop
                 # transforming our dicts back to objects or just iterating our list
                 
+                offered = {d["function"]["name"] for d in tool_defs}
+                unlisted = None
                 for tc_dict in tool_call_dicts:
                     func = tc_dict["function"]
                     name = func["name"]
@@ -327,6 +451,8 @@ class AgentLoop:
                     tool_id = tc_dict["id"]
                     
                     tools_used.append(name)
+                    if subset and name not in offered:
+                        unlisted = name
                     args_str = json.dumps(args, ensure_ascii=False)
                     logger.info(f"Tool call: {name}({args_str[:200]})")
                     
@@ -335,11 +461,19 @@ class AgentLoop:
                         messages, tool_id, name, result
                     )
                 
+                if unlisted:
+                    # The model wants a tool it was not given: attach every tool from now on
+                    logger.info(f"Tool '{unlisted}' was not attached; attaching all tools for this turn")
+                    tool_defs = self.tools.get_definitions()
+                    subset = False
+
                 messages.append({"role": "user", "content": "Reflect on the results and decide next steps."})
             else:
                 final_content = response.content
                 break
 
+        if saved:
+            logger.info(f"Tool selection saved ~{saved} prompt tokens this turn")
         return final_content, tools_used
 
     async def run(self) -> None:
@@ -369,15 +503,16 @@ class AgentLoop:
                 continue
     
     async def close_mcp(self) -> None:
-        """Close MCP connections."""
-        if self._mcp_stack:
-            try:
-                await self._mcp_stack.aclose()
-            except (RuntimeError, BaseExceptionGroup):
-                pass  # MCP SDK cancel scope cleanup is noisy but harmless
-            self._mcp_stack = None
+        """Close MCP connections and other long-lived resources (LSP, shells, HTTP and extraction pools)."""
+        if self._mcp:
+            await self._mcp.close()
+            self._mcp = None
         
+        if isinstance(exec_tool := self.tools.get("exec"), ExecTool):
+            await exec_tool.close()
         await self.lsp.shutdown()
+        await close_http_clients()
+        shutdown_extract_pool()
 
     def stop(self) -> None:
         """Stop the agent loop."""
@@ -430,14 +565,18 @@ class AgentLoop:
             asyncio.create_task(self._consolidate_memory(session))
 
         self._set_tool_context(msg.channel, msg.chat_id)
-        initial_messages = self.context.build_messages(
+        initial_messages = await self.context.build_messages(
             history=session.get_history(max_messages=self.memory_window),
             current_message=msg.content,
             media=msg.media if msg.media else None,
             channel=msg.channel,
             chat_id=msg.chat_id,
         )
-        final_content, tools_used = await self._run_agent_loop(initial_messages)
+        final_content, tools_used = await self._run_agent_loop(
+            initial_messages,
+            query=msg.content,
+            recent_tools=self.tool_selector.recent_tools(session.messages),
+        )
 
         if final_content is None:
             final_content = "I've completed processing but have no response to give."
@@ -479,13 +618,17 @@ class AgentLoop:
         session_key = f"{origin_channel}:{origin_chat_id}"
         session = self.sessions.get_or_create(session_key)
         self._set_tool_context(origin_channel, origin_chat_id)
-        initial_messages = self.context.build_messages(
+        initial_messages = await self.context.build_messages(
             history=session.get_history(max_messages=self.memory_window),
             current_message=msg.content,
             channel=origin_channel,
             chat_id=origin_chat_id,
         )
-        final_content, _ = await self._run_agent_loop(initial_messages)
+        final_content, _ = await self._run_agent_loop(
+            initial_messages,
+            query=msg.content,
+            recent_tools=self.tool_selector.recent_tools(session.messages),
+        )
 
         if final_content is None:
             final_content = "Background task completed."
@@ -538,14 +681,7 @@ class AgentLoop:
         conversation = "\n".join(lines)
         current_memory = memory.read_long_term()
 
-        # Load centralized prompts from CONTEXT.md
-        if not hasattr(self, "_prompts"):
-            from nanobot.agent.context import PromptLoader
-            # loop.py is in nanobot/agent/, so we go up to nanobot/CONTEXT.md
-            context_md_path = Path(__file__).parent.parent / "CONTEXT.md"
-            self._prompts = PromptLoader(context_md_path)
-
-        prompt = self._prompts.get(
+        prompt = self.context.prompts.get(
             "Memory Consolidation",
             current_memory=current_memory or "(empty)",
             conversation=conversation
@@ -603,7 +739,7 @@ class AgentLoop:
         Returns:
             The agent's response.
         """
-        await self._connect_mcp()
+        await self._connect_mcp(wait=True)
         msg = InboundMessage(
             channel=channel,
             sender_id="user",
@@ -0,0 +1,114 @@
+"""Image attachment pipeline: off-loop decoding, downscaling and caching."""
+
+import asyncio
+import base64
+import hashlib
+import io
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+
+from loguru import logger
+
+# Formats every vision-capable provider accepts as-is
+_PASSTHROUGH_MIMES = {"image/jpeg", "image/png", "image/gif", "image/webp"}
+
+
+class ImageEncoder:
+    """
+    Turns local image files into data URLs for multimodal messages.
+
+    Decoding, resizing and base64 encoding run in a worker thread. Results are
+    cached by content hash (and by path/mtime/size to skip re-hashing), so the
+    same image is only processed once per process. Downscaling requires
+    Pillow (``pip install nanobot-ai[images]``); without it images are sent as-is.
+    """
+
+    def __init__(self, max_dimension: int = 1568, quality: int = 85, cache_size: int = 64):
+        self.max_dimension = max_dimension
+        self.quality = quality
+        self.cache_size = cache_size
+        self._by_file: OrderedDict[tuple[str, int, int], str] = OrderedDict()
+        self._by_digest: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def encode(self, path: str) -> str | None:
+        """Return a data URL for an image file, or None if it is not a readable image."""
+        return await asyncio.to_thread(self._encode_sync, path)
+
+    def _encode_sync(self, path: str) -> str | None:
+        mime, _ = mimetypes.guess_type(path)
+        if not mime or not mime.startswith("image/"):
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        file_key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            digest = self._by_file.get(file_key)
+            if digest and (url := self._cache_get(self._by_digest, digest)):
+                return url
+
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        digest = hashlib.sha256(data).hexdigest()
+
+        with self._lock:
+            url = self._cache_get(self._by_digest, digest)
+        if url is None:
+            out, out_mime = self._downscale(data, mime)
+            url = f"data:{out_mime};base64,{base64.b64encode(out).decode()}"
+            if len(out) < len(data):
+                logger.debug(f"Image {path}: {len(data)} -> {len(out)} bytes")
+
+        with self._lock:
+            self._cache_put(self._by_digest, digest, url)
+            self._cache_put(self._by_file, file_key, digest)
+        return url
+
+    def _downscale(self, data: bytes, mime: str) -> tuple[bytes, str]:
+        """Resize to max_dimension and re-encode; falls back to the original bytes."""
+        try:
+            from PIL import Image, ImageOps
+        except ImportError:
+            return data, mime
+
+        try:
+            with Image.open(io.BytesIO(data)) as img:
+                if max(img.size) <= self.max_dimension and mime in _PASSTHROUGH_MIMES:
+                    return data, mime
+                img = ImageOps.exif_transpose(img)
+                img.thumbnail((self.max_dimension, self.max_dimension))
+                buf = io.BytesIO()
+                if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+                    img.save(buf, format="PNG", optimize=True)
+                    out_mime = "image/png"
+                else:
+                    img.convert("RGB").save(buf, format="JPEG", quality=self.quality, optimize=True)
+                    out_mime = "image/jpeg"
+        except Exception as e:
+            logger.warning(f"Image downscale failed, sending original: {e}")
+            return data, mime
+
+        out = buf.getvalue()
+        if len(out) >= len(data) and mime in _PASSTHROUGH_MIMES:
+            return data, mime
+        return out, out_mime
+
+    def _cache_get(self, cache: OrderedDict, key):
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+    def _cache_put(self, cache: OrderedDict, key, value) -> None:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
@@ -0,0 +1,83 @@
+"""Local keyword relevance index (TF-IDF) for prompt-side selection."""
+
+import math
+import re
+from collections import Counter
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+|[\u3400-\u9fff]")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from get has have how i if in into is it its "
+    "me my no not of on or our please so that the their them then there these this to use "
+    "using was we what when where which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercase keyword tokens (ASCII words + CJK characters)."""
+    tokens = []
+    for tok in _TOKEN_RE.findall(text.lower()):
+        if tok in _STOPWORDS or (len(tok) < 2 and tok.isascii()):
+            continue
+        # Very light stemming so "skills"/"skill" and "files"/"file" match
+        if len(tok) > 3 and tok.endswith("s") and not tok.endswith("ss"):
+            tok = tok[:-1]
+        tokens.append(tok)
+    return tokens
+
+
+class RelevanceIndex:
+    """
+    TF-IDF index over named documents made of weighted text fields.
+
+    Documents are scored against a query with cosine similarity, so scores
+    fall in [0, 1] and are comparable across queries.
+    """
+
+    def __init__(self, field_weights: dict[str, float] | None = None):
+        self.field_weights = field_weights or {}
+        self._vectors: dict[str, dict[str, float]] = {}
+        self._idf: dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def build(self, docs: dict[str, dict[str, str]]) -> None:
+        """
+        (Re)build the index.
+
+        Args:
+            docs: Mapping of document id to {field name: text}.
+        """
+        term_freqs: dict[str, Counter] = {}
+        df: Counter = Counter()
+        for doc_id, fields in docs.items():
+            tf: Counter = Counter()
+            for field, text in fields.items():
+                weight = self.field_weights.get(field, 1.0)
+                for tok in tokenize(text or ""):
+                    tf[tok] += weight
+            term_freqs[doc_id] = tf
+            df.update(tf.keys())
+
+        n = len(docs)
+        self._idf = {t: math.log(1 + n / c) for t, c in df.items()}
+        self._vectors = {}
+        for doc_id, tf in term_freqs.items():
+            vec = {t: (1 + math.log(f)) * self._idf[t] for t, f in tf.items() if f >= 1}
+            norm = math.sqrt(sum(w * w for w in vec.values())) or 1.0
+            self._vectors[doc_id] = {t: w / norm for t, w in vec.items()}
+
+    def rank(self, query: str, min_score: float = 0.0) -> list[tuple[str, float]]:
+        """Return (doc id, score) pairs for documents matching the query, best first."""
+        q = {t: self._idf[t] for t in set(tokenize(query)) if t in self._idf}
+        if not q:
+            return []
+        q_norm = math.sqrt(sum(w * w for w in q.values()))
+        scored = []
+        for doc_id, vec in self._vectors.items():
+            score = sum(w * vec.get(t, 0.0) for t, w in q.items()) / q_norm
+            if score > min_score:
+                scored.append((doc_id, score))
+        scored.sort(key=lambda x: (-x[1], x[0]))
+        return scored
@@ -6,6 +6,11 @@ import re
 import shutil
 from pathlib import Path
 
+from loguru import logger
+
+from nanobot.agent.relevance import RelevanceIndex
+from nanobot.utils.helpers import estimate_tokens
+
 # Default builtin skills directory (relative to this file)
 BUILTIN_SKILLS_DIR = Path(__file__).parent.parent / "skills"
 
@@ -16,12 +21,29 @@ class SkillsLoader:
     
     Skills are markdown files (SKILL.md) that teach the agent how to use
     specific tools or perform certain tasks.
+
+    The skills summary can be narrowed to the skills relevant to the current
+    message using a local TF-IDF index over skill names, descriptions and bodies.
     """
     
-    def __init__(self, workspace: Path, builtin_skills_dir: Path | None = None):
+    def __init__(
+        self,
+        workspace: Path,
+        builtin_skills_dir: Path | None = None,
+        top_k: int = 8,
+        max_tokens: int = 1500,
+        min_score: float = 0.05,
+        pinned: list[str] | None = None,
+    ):
         self.workspace = workspace
         self.workspace_skills = workspace / "skills"
         self.builtin_skills = builtin_skills_dir or BUILTIN_SKILLS_DIR
+        self.top_k = top_k
+        self.max_tokens = max_tokens
+        self.min_score = min_score
+        self.pinned = pinned or []
+        self._index = RelevanceIndex({"name": 3.0, "description": 2.0, "body": 1.0})
+        self._index_key: tuple | None = None
     
     def list_skills(self, filter_unavailable: bool = True) -> list[dict[str, str]]:
         """
@@ -98,13 +120,17 @@ class SkillsLoader:
         
         return "\n\n---\n\n".join(parts) if parts else ""
     
-    def build_skills_summary(self) -> str:
+    def build_skills_summary(self, query: str | None = None) -> str:
         """
-        Build a summary of all skills (name, description, path, availability).
+        Build a summary of skills (name, description, path, availability).
         
         This is used for progressive loading - the agent can read the full
         skill content using read_file when needed.
         
+        Args:
+            query: Current user message. When given, only pinned skills and
+                skills relevant to it are listed, within the token budget.
+        
         Returns:
             XML-formatted skills summary.
         """
@@ -112,31 +138,93 @@ class SkillsLoader:
         if not all_skills:
             return ""
         
+        if query is None or self.top_k <= 0:
+            entries = [self._format_skill(s) for s in all_skills]
+            omitted = 0
+        else:
+            entries = self._select_entries(all_skills, query)
+            omitted = len(all_skills) - len(entries)
+        
+        lines = ["<skills>", *entries]
+        if omitted:
+            lines.append(
+                f"  <omitted count=\"{omitted}\">Not relevant to this message. "
+                f"Other skills live in {self.workspace_skills} and {self.builtin_skills}</omitted>"
+            )
+        lines.append("</skills>")
+        
+        return "\n".join(lines)
+    
+    def _select_entries(self, all_skills: list[dict[str, str]], query: str) -> list[str]:
+        """Pick pinned + relevant skills for a message and format them under the token budget."""
+        self._refresh_index(all_skills)
+        by_name = {s["name"]: s for s in all_skills}
+        pinned = set(self.pinned) | set(self.get_always_skills())
+        
+        ranked = self._index.rank(query, min_score=self.min_score)[: self.top_k]
+        scores = dict(ranked)
+        order = [n for n in by_name if n in pinned] + [n for n, _ in ranked if n not in pinned]
+        
+        entries: list[str] = []
+        used = 0
+        for name in order:
+            entry = self._format_skill(by_name[name])
+            cost = estimate_tokens(entry)
+            # Pinned skills are always listed; relevant ones only while within budget
+            if name not in pinned and used + cost > self.max_tokens:
+                break
+            entries.append(entry)
+            used += cost
+        
+        chosen = order[: len(entries)]
+        logger.debug(
+            f"Skills selection: {len(chosen)}/{len(all_skills)} listed (~{used} tokens), "
+            f"pinned={sorted(pinned & set(chosen))}, "
+            f"relevant={[f'{n}:{scores[n]:.2f}' for n in chosen if n in scores]}"
+        )
+        return entries
+    
+    def _refresh_index(self, all_skills: list[dict[str, str]]) -> None:
+        """Rebuild the relevance index when skills are added, removed or edited."""
+        stats = [os.stat(s["path"]) for s in all_skills]
+        # Size too: an edit within the filesystem's timestamp granularity keeps the mtime
+        key = tuple((s["name"], s["path"], st.st_mtime_ns, st.st_size) for s, st in zip(all_skills, stats))
+        if key == self._index_key:
+            return
+        docs = {}
+        for s in all_skills:
+            content = Path(s["path"]).read_text(encoding="utf-8")
+            docs[s["name"]] = {
+                "name": s["name"].replace("-", " ").replace("_", " "),
+                "description": self._get_skill_description(s["name"]),
+                "body": self._strip_frontmatter(content),
+            }
+        self._index.build(docs)
+        self._index_key = key
+    
+    def _format_skill(self, s: dict[str, str]) -> str:
+        """Format one skill as an XML entry."""
         def escape_xml(s: str) -> str:
             return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
         
-        lines = ["<skills>"]
-        for s in all_skills:
-            name = escape_xml(s["name"])
-            path = s["path"]
-            desc = escape_xml(self._get_skill_description(s["name"]))
-            skill_meta = self._get_skill_meta(s["name"])
-            available = self._check_requirements(skill_meta)
-            
-            lines.append(f"  <skill available=\"{str(available).lower()}\">")
-            lines.append(f"    <name>{name}</name>")
-            lines.append(f"    <description>{desc}</description>")
-            lines.append(f"    <location>{path}</location>")
-            
-            # Show missing requirements for unavailable skills
-            if not available:
-                missing = self._get_missing_requirements(skill_meta)
-                if missing:
-                    lines.append(f"    <requires>{escape_xml(missing)}</requires>")
-            
-            lines.append(f"  </skill>")
-        lines.append("</skills>")
+        name = escape_xml(s["name"])
+        path = s["path"]
+        desc = escape_xml(self._get_skill_description(s["name"]))
+        skill_meta = self._get_skill_meta(s["name"])
+        available = self._check_requirements(skill_meta)
+        
+        lines = [f"  <skill available=\"{str(available).lower()}\">"]
+        lines.append(f"    <name>{name}</name>")
+        lines.append(f"    <description>{desc}</description>")
+        lines.append(f"    <location>{path}</location>")
+        
+        # Show missing requirements for unavailable skills
+        if not available:
+            missing = self._get_missing_requirements(skill_meta)
+            if missing:
+                lines.append(f"    <requires>{escape_xml(missing)}</requires>")
         
+        lines.append(f"  </skill>")
         return "\n".join(lines)
     
     def _get_missing_requirements(self, skill_meta: dict) -> str:
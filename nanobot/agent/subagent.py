@@ -4,17 +4,22 @@ import asyncio
 import json
 import uuid
 from pathlib import Path
-from typing import Any
+from typing import Any, TYPE_CHECKING
 
 from loguru import logger
 
-from nanobot.bus.events import InboundMessage
+from nanobot.bus.events import InboundMessage, OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.providers.base import LLMProvider
 from nanobot.agent.tools.registry import ToolRegistry
-from nanobot.agent.tools.filesystem import ReadFileTool, WriteFileTool, EditFileTool, ListDirTool
-from nanobot.agent.tools.shell import ExecTool
-from nanobot.agent.tools.web import WebSearchTool, WebFetchTool
+from nanobot.agent.tools.filesystem import ReadFileTool, ReadFilesTool, WriteFileTool, EditFileTool, ListDirTool
+from nanobot.agent.tools.search import SearchTool
+from nanobot.agent.tools.shell import ExecScheduler, ExecTool, format_progress
+from nanobot.agent.tools.web import WebSearchTool, WebFetchTool, WebFetchManyTool
+from nanobot.agent.tools.web_cache import SearchCache, WebCache
+
+if TYPE_CHECKING:
+    from nanobot.config.schema import WebFetchConfig, WebSearchConfig
 
 
 class SubagentManager:
@@ -35,10 +40,15 @@ class SubagentManager:
         temperature: float = 0.7,
         max_tokens: int = 4096,
         brave_api_key: str | None = None,
+        web_search_config: "WebSearchConfig | None" = None,
+        search_cache: SearchCache | None = None,
+        web_fetch_config: "WebFetchConfig | None" = None,
+        web_cache: WebCache | None = None,
         exec_config: "ExecToolConfig | None" = None,
+        exec_scheduler: ExecScheduler | None = None,
         restrict_to_workspace: bool = False,
     ):
-        from nanobot.config.schema import ExecToolConfig
+        from nanobot.config.schema import ExecToolConfig, WebFetchConfig, WebSearchConfig
         self.provider = provider
         self.workspace = workspace
         self.bus = bus
@@ -46,15 +56,18 @@ class SubagentManager:
         self.temperature = temperature
         self.max_tokens = max_tokens
         self.brave_api_key = brave_api_key
+        self.web_search_config = web_search_config or WebSearchConfig()
+        self.search_cache = search_cache
+        self.web_fetch_config = web_fetch_config or WebFetchConfig()
+        self.web_cache = web_cache
         self.exec_config = exec_config or ExecToolConfig()
+        self.exec_scheduler = exec_scheduler or ExecScheduler()
         self.restrict_to_workspace = restrict_to_workspace
         self._running_tasks: dict[str, asyncio.Task[None]] = {}
         
-        # Load centralized prompts from CONTEXT.md
-        from nanobot.agent.context import PromptLoader
-        # subagent.py is in nanobot/agent/, so we go up to nanobot/CONTEXT.md
-        context_md_path = Path(__file__).parent.parent / "CONTEXT.md"
-        self.prompts = PromptLoader(context_md_path)
+        # Centralized prompts from the workspace CONTEXT.md (shared, parsed once)
+        from nanobot.agent.context import prompt_registry
+        self.prompts = prompt_registry.get(workspace / "CONTEXT.md")
     
     async def spawn(
         self,
@@ -95,6 +108,21 @@ class SubagentManager:
         logger.info(f"Spawned subagent [{task_id}]: {display_label}")
         return f"Subagent [{display_label}] started (id: {task_id}). I'll notify you when it completes."
     
+    def _progress_reporter(self, label: str, origin: dict[str, str]):
+        """Exec progress callback that posts "still running" notes to the origin chat."""
+
+        async def report(command: str, elapsed: float, output_bytes: int, last_line: str) -> None:
+            if origin["channel"] == "cli":
+                return  # Nothing consumes outbound messages in CLI mode
+            await self.bus.publish_outbound(OutboundMessage(
+                channel=origin["channel"],
+                chat_id=origin["chat_id"],
+                content=f"[{label}] {format_progress(command, elapsed, output_bytes, last_line)}",
+                metadata={"progress": True},
+            ))
+
+        return report
+
     async def _run_subagent(
         self,
         task_id: str,
@@ -104,22 +132,39 @@ class SubagentManager:
     ) -> None:
         """Execute the subagent task and announce the result."""
         logger.info(f"Subagent [{task_id}] starting task: {label}")
+        exec_tool: ExecTool | None = None
         
         try:
             # Build subagent tools (no message tool, no spawn tool)
             tools = ToolRegistry()
             allowed_dir = self.workspace if self.restrict_to_workspace else None
-            tools.register(ReadFileTool(allowed_dir=allowed_dir))
+            read_tool = ReadFileTool(allowed_dir=allowed_dir)
+            tools.register(read_tool)
+            tools.register(ReadFilesTool(allowed_dir=allowed_dir, reader=read_tool))
             tools.register(WriteFileTool(allowed_dir=allowed_dir))
             tools.register(EditFileTool(allowed_dir=allowed_dir))
             tools.register(ListDirTool(allowed_dir=allowed_dir))
-            tools.register(ExecTool(
+            tools.register(SearchTool(root=self.workspace, allowed_dir=allowed_dir))
+            exec_tool = ExecTool(
                 working_dir=str(self.workspace),
                 timeout=self.exec_config.timeout,
                 restrict_to_workspace=self.restrict_to_workspace,
+                persistent=self.exec_config.persistent,
+                idle_timeout=self.exec_config.idle_timeout,
+                scheduler=self.exec_scheduler,
+                progress_callback=self._progress_reporter(label, origin),
+                progress_interval=self.exec_config.progress_interval,
+            )
+            exec_tool.set_context(f"subagent:{task_id}")
+            tools.register(exec_tool)
+            tools.register(WebSearchTool(
+                api_key=self.brave_api_key,
+                max_results=self.web_search_config.max_results,
+                cache=self.search_cache,
             ))
-            tools.register(WebSearchTool(api_key=self.brave_api_key))
-            tools.register(WebFetchTool())
+            fetch_tool = WebFetchTool(max_chars=self.web_fetch_config.max_chars, cache=self.web_cache)
+            tools.register(fetch_tool)
+            tools.register(WebFetchManyTool(fetcher=fetch_tool))
             
             # Build messages with subagent-specific prompt
             system_prompt = self._build_subagent_prompt(task)
@@ -188,6 +233,9 @@ class SubagentManager:
             error_msg = f"Error: {str(e)}"
             logger.error(f"Subagent [{task_id}] failed: {e}")
             await self._announce_result(task_id, label, task, error_msg, origin, "error")
+        finally:
+            if exec_tool:
+                await exec_tool.close()
     
     async def _announce_result(
         self,
@@ -0,0 +1,126 @@
+"""Per-turn tool selection: attach only the tool definitions relevant to a message."""
+
+import json
+from typing import Any
+
+from loguru import logger
+
+from nanobot.agent.relevance import RelevanceIndex
+from nanobot.agent.tools.registry import ToolRegistry
+from nanobot.utils.helpers import estimate_tokens
+
+
+def _words(name: str) -> str:
+    return name.replace("_", " ").replace("-", " ")
+
+
+class ToolSelector:
+    """
+    Picks pinned, recently used and relevant tools for a message.
+
+    Tools are ranked with a TF-IDF index over their names, descriptions and
+    parameter names/descriptions, rebuilt whenever the registry changes
+    (MCP servers add and remove tools at runtime). Savings are estimated
+    from the JSON size of the definitions and accumulated in ``stats`` by
+    ``record()``, once per LLM request.
+    """
+
+    def __init__(
+        self,
+        registry: ToolRegistry,
+        top_k: int = 8,
+        min_score: float = 0.05,
+        pinned: list[str] | None = None,
+        recent_turns: int = 3,
+    ):
+        self.registry = registry
+        self.top_k = top_k
+        self.min_score = min_score
+        self.pinned = pinned or []
+        self.recent_turns = recent_turns
+        self._index = RelevanceIndex({"name": 3.0, "description": 2.0, "params": 1.0})
+        self._index_key: tuple | None = None
+        self.stats = {"requests": 0, "full_tokens": 0, "sent_tokens": 0}
+
+    def recent_tools(self, messages: list[dict[str, Any]]) -> list[str]:
+        """Tools used in the last recent_turns assistant turns of a session."""
+        used: list[str] = []
+        turns = 0
+        for m in reversed(messages):
+            if m.get("role") != "assistant":
+                continue
+            used.extend(t for t in m.get("tools_used") or () if t not in used)
+            turns += 1
+            if turns >= self.recent_turns:
+                break
+        return used
+
+    def select(self, query: str, recent: list[str] | None = None) -> list[dict[str, Any]]:
+        """
+        Tool definitions to attach for a message.
+
+        Args:
+            query: The user message.
+            recent: Tools used recently in the session (always kept).
+
+        Returns:
+            Definitions of pinned, recent and up to top_k relevant tools, or
+            every definition when selection would not drop anything.
+        """
+        definitions = self.registry.get_definitions()
+        if self.top_k <= 0 or not query:
+            return definitions
+        by_name = {d["function"]["name"]: d for d in definitions}
+        self._refresh_index(definitions)
+
+        keep = [n for n in (*self.pinned, *(recent or ())) if n in by_name]
+        ranked = self._index.rank(query, min_score=self.min_score)[: self.top_k]
+        chosen = set(keep) | {n for n, _ in ranked}
+        if len(chosen) >= len(by_name):
+            return definitions
+
+        selected = [d for name, d in by_name.items() if name in chosen]
+        logger.debug(
+            f"Tool selection: {len(selected)}/{len(definitions)} tools attached, "
+            f"recent={[n for n in keep if n not in self.pinned]}, "
+            f"relevant={[f'{n}:{s:.2f}' for n, s in ranked]}"
+        )
+        return selected
+
+    def record(self, sent: list[dict[str, Any]]) -> int:
+        """Account one LLM request that attached sent; returns the prompt tokens saved."""
+        full = self.token_cost(self.registry.get_definitions())
+        cost = self.token_cost(sent)
+        self.stats["requests"] += 1
+        self.stats["full_tokens"] += full
+        self.stats["sent_tokens"] += cost
+        return full - cost
+
+    def omitted(self, selected: list[dict[str, Any]]) -> list[str]:
+        """Names of registered tools left out of selected."""
+        attached = {d["function"]["name"] for d in selected}
+        return [n for n in self.registry.tool_names if n not in attached]
+
+    @staticmethod
+    def token_cost(definitions: list[dict[str, Any]]) -> int:
+        return estimate_tokens(json.dumps(definitions, ensure_ascii=False))
+
+    def _refresh_index(self, definitions: list[dict[str, Any]]) -> None:
+        """Rebuild the index when tools are registered, removed or changed."""
+        key = tuple((d["function"]["name"], d["function"].get("description", "")) for d in definitions)
+        if key == self._index_key:
+            return
+        docs = {}
+        for d in definitions:
+            fn = d["function"]
+            props = (fn.get("parameters") or {}).get("properties") or {}
+            docs[fn["name"]] = {
+                "name": _words(fn["name"]),
+                "description": fn.get("description", ""),
+                "params": " ".join(
+                    f"{_words(p)} {s.get('description', '')}" if isinstance(s, dict) else _words(p)
+                    for p, s in props.items()
+                ),
+            }
+        self._index.build(docs)
+        self._index_key = key
@@ -3,6 +3,8 @@
 from abc import ABC, abstractmethod
 from typing import Any
 
+from nanobot.agent.tools.validation import Validator, compile_defaults, compile_schema
+
 
 class Tool(ABC):
     """
@@ -12,15 +14,6 @@ class Tool(ABC):
     the environment, such as reading files, executing commands, etc.
     """
     
-    _TYPE_MAP = {
-        "string": str,
-        "integer": int,
-        "number": (int, float),
-        "boolean": bool,
-        "array": list,
-        "object": dict,
-    }
-    
     @property
     @abstractmethod
     def name(self) -> str:
@@ -52,43 +45,32 @@ class Tool(ABC):
         """
         pass
 
+    # Fill schema defaults into valid params before execute(); tools that forward
+    # params elsewhere (MCP) turn this off and let the other side apply them
+    fill_defaults = True
+
     def validate_params(self, params: dict[str, Any]) -> list[str]:
-        """Validate tool parameters against JSON schema. Returns error list (empty if valid)."""
+        """
+        Validate tool parameters against JSON schema. Returns error list (empty if valid).
+
+        When valid and fill_defaults is set, declared defaults are added to
+        params for omitted optional properties.
+        """
+        validator = self.__dict__.get("_params_validator") or self.compile_params()
+        errors = validator(params)
+        if not errors and self._params_defaults is not None:
+            self._params_defaults(params)
+        return list(errors)
+
+    def compile_params(self) -> Validator:
+        """Compile the parameters schema into a validator (and defaults filler), cached on the tool."""
         schema = self.parameters or {}
         if schema.get("type", "object") != "object":
             raise ValueError(f"Schema must be object type, got {schema.get('type')!r}")
-        return self._validate(params, {**schema, "type": "object"}, "")
-
-    def _validate(self, val: Any, schema: dict[str, Any], path: str) -> list[str]:
-        t, label = schema.get("type"), path or "parameter"
-        if t in self._TYPE_MAP and not isinstance(val, self._TYPE_MAP[t]):
-            return [f"{label} should be {t}"]
-        
-        errors = []
-        if "enum" in schema and val not in schema["enum"]:
-            errors.append(f"{label} must be one of {schema['enum']}")
-        if t in ("integer", "number"):
-            if "minimum" in schema and val < schema["minimum"]:
-                errors.append(f"{label} must be >= {schema['minimum']}")
-            if "maximum" in schema and val > schema["maximum"]:
-                errors.append(f"{label} must be <= {schema['maximum']}")
-        if t == "string":
-            if "minLength" in schema and len(val) < schema["minLength"]:
-                errors.append(f"{label} must be at least {schema['minLength']} chars")
-            if "maxLength" in schema and len(val) > schema["maxLength"]:
-                errors.append(f"{label} must be at most {schema['maxLength']} chars")
-        if t == "object":
-            props = schema.get("properties", {})
-            for k in schema.get("required", []):
-                if k not in val:
-                    errors.append(f"missing required {path + '.' + k if path else k}")
-            for k, v in val.items():
-                if k in props:
-                    errors.extend(self._validate(v, props[k], path + '.' + k if path else k))
-        if t == "array" and "items" in schema:
-            for i, item in enumerate(val):
-                errors.extend(self._validate(item, schema["items"], f"{path}[{i}]" if path else f"[{i}]"))
-        return errors
+        schema = {**schema, "type": "object"}
+        self._params_defaults = compile_defaults(schema) if self.fill_defaults else None
+        self._params_validator = compile_schema(schema)
+        return self._params_validator
     
     def to_schema(self) -> dict[str, Any]:
         """Convert tool to OpenAI function schema format."""
@@ -1,9 +1,88 @@
 """File system tools: read, write, edit."""
 
+import asyncio
+import functools
+import mmap
+import os
+import re
+import tempfile
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
+from itertools import islice
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterator, TypeVar
+
+from loguru import logger
 
 from nanobot.agent.tools.base import Tool
+from nanobot.agent.tools.patch import PatchError, apply_hunks, parse_unified_diff
+from nanobot.utils.gitignore import GitIgnore, is_ignored
+from nanobot.utils.helpers import estimate_tokens
+
+T = TypeVar("T")
+
+# All filesystem I/O runs on this dedicated, size-limited pool so a large file
+# or a slow network mount never stalls the event loop (and every channel on it).
+FS_MAX_WORKERS = 4
+_fs_executor: ThreadPoolExecutor | None = None
+_fs_executor_lock = threading.Lock()
+
+
+def _get_fs_executor() -> ThreadPoolExecutor:
+    global _fs_executor
+    if _fs_executor is None:
+        with _fs_executor_lock:
+            if _fs_executor is None:
+                _fs_executor = ThreadPoolExecutor(
+                    max_workers=FS_MAX_WORKERS, thread_name_prefix="nanobot-fs"
+                )
+    return _fs_executor
+
+
+class FsMetrics:
+    """Per-tool call counts and latency for filesystem tool I/O."""
+
+    def __init__(self):
+        self._stats: dict[str, dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, tool: str, seconds: float) -> None:
+        with self._lock:
+            s = self._stats.setdefault(tool, {"calls": 0, "total_s": 0.0, "max_s": 0.0})
+            s["calls"] += 1
+            s["total_s"] += seconds
+            s["max_s"] = max(s["max_s"], seconds)
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        """Return {tool: {calls, total_s, max_s, avg_s}}."""
+        with self._lock:
+            return {
+                tool: {**s, "avg_s": s["total_s"] / s["calls"] if s["calls"] else 0.0}
+                for tool, s in self._stats.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+fs_metrics = FsMetrics()
+
+
+async def run_fs_io(tool: str, func: Callable[..., T], *args: Any) -> T:
+    """Run blocking filesystem work on the fs pool and record its latency."""
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    try:
+        return await loop.run_in_executor(_get_fs_executor(), functools.partial(func, *args))
+    finally:
+        elapsed = time.perf_counter() - start
+        fs_metrics.record(tool, elapsed)
+        logger.debug(f"{tool}: I/O took {elapsed * 1000:.1f} ms")
 
 
 def _resolve_path(path: str, allowed_dir: Path | None = None) -> Path:
@@ -14,11 +93,167 @@ def _resolve_path(path: str, allowed_dir: Path | None = None) -> Path:
     return resolved
 
 
+# Files at least this large are served through mmap + a cached line index
+MMAP_THRESHOLD = 1024 * 1024
+# Line index keeps the offset of every LINE_INDEX_STEP-th line
+LINE_INDEX_STEP = 64
+_LINE_INDEX_CACHE_SIZE = 16
+
+
+class _LineIndex:
+    """Sparse newline-offset index of a file, valid for one (mtime, size)."""
+
+    def __init__(self, mm: mmap.mmap, mtime_ns: int, size: int):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        # checkpoints[i] = offset just past the ((i + 1) * STEP)-th newline
+        matches = re.finditer(b"\n", mm)
+        self.checkpoints = array(
+            "q", (m.end() for m in islice(matches, LINE_INDEX_STEP - 1, None, LINE_INDEX_STEP))
+        )
+        tail = self.checkpoints[-1] if self.checkpoints else 0
+        newlines = len(self.checkpoints) * LINE_INDEX_STEP + mm[tail:].count(b"\n")
+        ends_with_newline = size > 0 and mm[size - 1:size] == b"\n"
+        self.total_lines = newlines + (0 if ends_with_newline or size == 0 else 1)
+
+    def line_start(self, mm: mmap.mmap, line: int) -> int:
+        """Byte offset where 0-based line number `line` starts (size if past the end)."""
+        cp = min(line // LINE_INDEX_STEP, len(self.checkpoints))
+        pos = self.checkpoints[cp - 1] if cp else 0
+        for _ in range(line - cp * LINE_INDEX_STEP):
+            nl = mm.find(b"\n", pos)
+            if nl < 0:
+                return self.size
+            pos = nl + 1
+        return pos
+
+
+_line_indexes: OrderedDict[str, _LineIndex] = OrderedDict()
+_line_indexes_lock = threading.Lock()
+
+
+def _get_line_index(file_path: Path, mm: mmap.mmap, st: os.stat_result) -> _LineIndex:
+    """Get the cached line index for a file, rebuilding it if the file changed."""
+    key = str(file_path)
+    with _line_indexes_lock:
+        index = _line_indexes.get(key)
+        if index and index.mtime_ns == st.st_mtime_ns and index.size == st.st_size:
+            _line_indexes.move_to_end(key)
+            return index
+    index = _LineIndex(mm, st.st_mtime_ns, st.st_size)
+    with _line_indexes_lock:
+        _line_indexes[key] = index
+        _line_indexes.move_to_end(key)
+        while len(_line_indexes) > _LINE_INDEX_CACHE_SIZE:
+            _line_indexes.popitem(last=False)
+    return index
+
+
+# Decoded file contents kept in memory for repeat reads
+READ_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+
+class ReadCache:
+    """
+    Decoded text of recently read files, keyed by (path, mtime_ns, size).
+
+    A changed file gets a new key, so stale entries are never served; they
+    simply age out of the LRU. Also counts the tokens saved by the read
+    tool's "unchanged since earlier read" markers.
+    """
+
+    def __init__(self, max_bytes: int = READ_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple[str, int, int], str] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.unchanged = 0
+        self.tokens_saved = 0
+
+    def read_text(self, file_path: Path, st: os.stat_result) -> str:
+        """Return the file's text, from memory when (path, mtime, size) is unchanged."""
+        key = (str(file_path), st.st_mtime_ns, st.st_size)
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return text
+            self.misses += 1
+        # No newline translation, so line numbers match the mmap path's line index
+        text = file_path.read_bytes().decode("utf-8")
+        if st.st_size <= self.max_bytes // 4:
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = text
+                    self._bytes += st.st_size
+                while self._bytes > self.max_bytes:
+                    (_, _, size), _ = self._entries.popitem(last=False)
+                    self._bytes -= size
+        return text
+
+    def record_unchanged(self, tokens_saved: int) -> None:
+        with self._lock:
+            self.unchanged += 1
+            self.tokens_saved += tokens_saved
+
+    def stats(self) -> dict[str, float]:
+        """Return hit/miss counts, hit rate, unchanged markers served and tokens saved."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "unchanged": self.unchanged,
+                "tokens_saved": self.tokens_saved,
+                "cached_bytes": self._bytes,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.unchanged = self.tokens_saved = 0
+
+
+read_cache = ReadCache()
+
+
+def _split_lines(text: str) -> list[str]:
+    """Split after each "\n" only, keeping it, like the line index (splitlines also breaks on \r, \f, ...)."""
+    lines = text.split("\n")
+    ends = [line + "\n" for line in lines[:-1]]
+    return ends + [lines[-1]] if lines[-1] else ends
+
+
+def _number_lines(text: str, first_line: int) -> str:
+    """Prefix lines with right-aligned line numbers (cat -n style)."""
+    return "".join(f"{n:>6}\t{line}" for n, line in enumerate(_split_lines(text), first_line))
+
+
 class ReadFileTool(Tool):
-    """Tool to read file contents."""
+    """Tool to read file contents, whole or by line/byte range."""
     
-    def __init__(self, allowed_dir: Path | None = None):
+    def __init__(self, allowed_dir: Path | None = None, cache: ReadCache | None = None):
         self._allowed_dir = allowed_dir
+        self._cache = cache or read_cache
+        # (path, range args) -> (mtime_ns, size, lines, tokens) of reads the model has already seen
+        self._seen: dict[tuple, tuple[int, int, int, int]] = {}
+
+    def reset_seen(self) -> None:
+        """Forget what was read; call when earlier tool results leave the model's context."""
+        self._seen.clear()
+
+    def forget(self, path: str, offset: int | None = None, limit: int | None = None) -> None:
+        """Forget one read whose content did not reach the model in full (e.g. cut by read_files)."""
+        try:
+            file_path = _resolve_path(path, self._allowed_dir)
+        except Exception:
+            return
+        self._seen.pop((str(file_path), offset, limit, None, None, False), None)
 
     @property
     def name(self) -> str:
@@ -26,7 +261,12 @@ class ReadFileTool(Tool):
     
     @property
     def description(self) -> str:
-        return "Read the contents of a file at the given path."
+        return (
+            "Read the contents of a file at the given path. "
+            "Use offset/limit to read a range of lines (recommended for large files), "
+            "or byte_offset/byte_length for a byte range. "
+            "Re-reading an unchanged file returns a short marker; set force=true to get the content again."
+        )
     
     @property
     def parameters(self) -> dict[str, Any]:
@@ -36,26 +276,267 @@ class ReadFileTool(Tool):
                 "path": {
                     "type": "string",
                     "description": "The file path to read"
+                },
+                "offset": {
+                    "type": "integer",
+                    "description": "Line number to start reading from (1-based)",
+                    "minimum": 1
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "Maximum number of lines to read",
+                    "minimum": 1
+                },
+                "byte_offset": {
+                    "type": "integer",
+                    "description": "Byte position to start reading from (0-based)",
+                    "minimum": 0
+                },
+                "byte_length": {
+                    "type": "integer",
+                    "description": "Number of bytes to read",
+                    "minimum": 1
+                },
+                "line_numbers": {
+                    "type": "boolean",
+                    "description": "Prefix each line with its line number"
+                },
+                "force": {
+                    "type": "boolean",
+                    "description": "Return the content even if it was already read and is unchanged"
                 }
             },
             "required": ["path"]
         }
     
-    async def execute(self, path: str, **kwargs: Any) -> str:
+    async def execute(
+        self,
+        path: str,
+        offset: int | None = None,
+        limit: int | None = None,
+        byte_offset: int | None = None,
+        byte_length: int | None = None,
+        line_numbers: bool = False,
+        force: bool = False,
+        **kwargs: Any,
+    ) -> str:
+        return await run_fs_io(
+            self.name, self._read, path, offset, limit, byte_offset, byte_length, line_numbers, force
+        )
+
+    def _read(
+        self,
+        path: str,
+        offset: int | None = None,
+        limit: int | None = None,
+        byte_offset: int | None = None,
+        byte_length: int | None = None,
+        line_numbers: bool = False,
+        force: bool = False,
+    ) -> str:
         try:
             file_path = _resolve_path(path, self._allowed_dir)
             if not file_path.exists():
                 return f"Error: File not found: {path}"
             if not file_path.is_file():
                 return f"Error: Not a file: {path}"
-            
-            content = file_path.read_text(encoding="utf-8")
-            return content
+
+            st = file_path.stat()
+            seen_key = (str(file_path), offset, limit, byte_offset, byte_length, line_numbers)
+            seen = self._seen.get(seen_key)
+            if not force and seen and seen[:2] == (st.st_mtime_ns, st.st_size):
+                marker = (
+                    f"[{path} unchanged since earlier read ({seen[2]} lines); "
+                    "its content is above. Use force=true to read it again.]"
+                )
+                self._cache.record_unchanged(max(seen[3] - estimate_tokens(marker), 0))
+                return marker
+
+            result = self._read_content(file_path, st, offset, limit, byte_offset, byte_length, line_numbers)
+            if not result.startswith(("Error", "(no ")):
+                ranged = any(arg is not None for arg in (offset, limit, byte_offset, byte_length))
+                body = result.rsplit("\n\n[", 1)[0] if ranged else result  # Drop the range footer
+                lines = body.count("\n") + (0 if body.endswith("\n") else 1)
+                self._seen[seen_key] = (st.st_mtime_ns, st.st_size, lines, estimate_tokens(result))
+            return result
         except PermissionError as e:
             return f"Error: {e}"
         except Exception as e:
             return f"Error reading file: {str(e)}"
 
+    def _read_content(
+        self,
+        file_path: Path,
+        st: os.stat_result,
+        offset: int | None,
+        limit: int | None,
+        byte_offset: int | None,
+        byte_length: int | None,
+        line_numbers: bool,
+    ) -> str:
+        by_lines = offset is not None or limit is not None
+        by_bytes = byte_offset is not None or byte_length is not None
+        if by_lines and by_bytes:
+            return "Error: Use either offset/limit (lines) or byte_offset/byte_length, not both"
+        if by_bytes:
+            return self._read_bytes(file_path, byte_offset or 0, byte_length)
+        if by_lines:
+            return self._read_lines(file_path, st, offset or 1, limit, line_numbers)
+
+        content = self._cache.read_text(file_path, st)
+        return _number_lines(content, 1) if line_numbers else content
+
+    def _read_lines(
+        self, file_path: Path, st: os.stat_result, offset: int, limit: int | None, line_numbers: bool
+    ) -> str:
+        """Read lines [offset, offset + limit) using mmap and the line index for large files."""
+        start = offset - 1
+        if st.st_size < MMAP_THRESHOLD:
+            lines = _split_lines(self._cache.read_text(file_path, st))
+            total = len(lines)
+            selected = lines[start:start + limit if limit else None]
+            text = "".join(selected)
+        else:
+            with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                index = _get_line_index(file_path, mm, st)
+                total = index.total_lines
+                begin = index.line_start(mm, start)
+                end = st.st_size
+                if limit:
+                    end = begin
+                    for _ in range(limit):
+                        nl = mm.find(b"\n", end)
+                        if nl < 0:
+                            end = st.st_size
+                            break
+                        end = nl + 1
+                text = mm[begin:end].decode("utf-8", errors="replace")
+            selected = _split_lines(text)
+
+        if start >= total:
+            return f"(no lines: offset {offset} is past the end of the file, which has {total} lines)"
+        last = offset + len(selected) - 1
+        if line_numbers:
+            text = _number_lines(text, offset)
+        text = text.rstrip("\n")
+        return f"{text}\n\n[lines {offset}-{last} of {total}]"
+
+    def _read_bytes(self, file_path: Path, byte_offset: int, byte_length: int | None) -> str:
+        """Read a byte range, decoding as UTF-8 (partial characters at the edges are replaced)."""
+        size = file_path.stat().st_size
+        if byte_offset >= size and size:
+            return f"(no data: byte_offset {byte_offset} is past the end of the file, which has {size} bytes)"
+        with open(file_path, "rb") as f:
+            f.seek(byte_offset)
+            data = f.read(byte_length) if byte_length else f.read()
+        end = byte_offset + len(data)
+        return f"{data.decode('utf-8', errors='replace')}\n\n[bytes {byte_offset}-{end} of {size}]"
+
+
+# Limits for read_files
+MAX_BATCH_FILES = 20
+DEFAULT_BATCH_CHARS = 100_000
+
+
+class ReadFilesTool(Tool):
+    """Tool to read several files (or line ranges) in one call."""
+
+    def __init__(self, allowed_dir: Path | None = None, reader: ReadFileTool | None = None):
+        self._reader = reader or ReadFileTool(allowed_dir=allowed_dir)
+
+    @property
+    def name(self) -> str:
+        return "read_files"
+
+    @property
+    def description(self) -> str:
+        return (
+            f"Read up to {MAX_BATCH_FILES} files in one call, each optionally limited to a line range. "
+            "Prefer this over several read_file calls when you need multiple files. "
+            "Errors are reported per file; output stops at max_chars in total."
+        )
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "files": {
+                    "type": "array",
+                    "description": "Files to read, in the order they should appear",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "path": {"type": "string", "description": "The file path to read"},
+                            "offset": {
+                                "type": "integer",
+                                "description": "Line number to start reading from (1-based)",
+                                "minimum": 1
+                            },
+                            "limit": {
+                                "type": "integer",
+                                "description": "Maximum number of lines to read",
+                                "minimum": 1
+                            }
+                        },
+                        "required": ["path"]
+                    }
+                },
+                "max_chars": {
+                    "type": "integer",
+                    "description": f"Total size cap for all file contents (default {DEFAULT_BATCH_CHARS})",
+                    "minimum": 1000
+                },
+                "force": {
+                    "type": "boolean",
+                    "description": "Return contents even for files already read and unchanged"
+                }
+            },
+            "required": ["files"]
+        }
+
+    async def execute(
+        self,
+        files: list[dict[str, Any]],
+        max_chars: int = DEFAULT_BATCH_CHARS,
+        force: bool = False,
+        **kwargs: Any,
+    ) -> str:
+        if not files:
+            return "Error: files is empty"
+        if len(files) > MAX_BATCH_FILES:
+            return f"Error: at most {MAX_BATCH_FILES} files per call, got {len(files)}"
+
+        results = await asyncio.gather(*(
+            run_fs_io(
+                self.name, self._reader._read, f["path"], f.get("offset"), f.get("limit"),
+                None, None, False, force,
+            )
+            for f in files
+        ))
+
+        sections = []
+        remaining = max_chars
+        errors = 0
+        for spec, content in zip(files, results):
+            header = f"==> {spec['path']} <=="
+            content = content.rstrip("\n")
+            if content.startswith("Error"):
+                errors += 1
+            if remaining <= 0:
+                self._reader.forget(spec["path"], spec.get("offset"), spec.get("limit"))
+                sections.append(f"{header}\n[skipped: max_chars reached]")
+                continue
+            if len(content) > remaining:
+                self._reader.forget(spec["path"], spec.get("offset"), spec.get("limit"))
+                content = content[:remaining] + "\n... [truncated: max_chars reached, use read_file with offset/limit]"
+            remaining -= len(content)
+            sections.append(f"{header}\n{content}")
+
+        summary = f"[{len(files)} files read"
+        summary += f", {errors} with errors]" if errors else "]"
+        return "\n\n".join(sections) + f"\n\n{summary}"
+
 
 class WriteFileTool(Tool):
     """Tool to write content to a file."""
@@ -89,6 +570,9 @@ class WriteFileTool(Tool):
         }
     
     async def execute(self, path: str, content: str, **kwargs: Any) -> str:
+        return await run_fs_io(self.name, self._write, path, content)
+
+    def _write(self, path: str, content: str) -> str:
         try:
             file_path = _resolve_path(path, self._allowed_dir)
             file_path.parent.mkdir(parents=True, exist_ok=True)
@@ -100,8 +584,39 @@ class WriteFileTool(Tool):
             return f"Error writing file: {str(e)}"
 
 
+def _atomic_write(file_path: Path, content: str) -> None:
+    """Write via a temp file in the same directory and rename it over the target."""
+    tmp = _stage_write(file_path, content)
+    os.replace(tmp, file_path)
+
+
+def _stage_write(file_path: Path, content: str) -> Path:
+    """Write content to a temp file next to file_path (keeping its mode) and return the temp path."""
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=file_path.parent, prefix=f".{file_path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+        if file_path.exists():
+            os.chmod(tmp, file_path.stat().st_mode & 0o7777)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return Path(tmp)
+
+
+def _apply_replacement(content: str, old_text: str, new_text: str, replace_all: bool = False) -> tuple[str, str | None]:
+    """Replace old_text in content; returns (new content, error message or None)."""
+    count = content.count(old_text) if old_text else 0
+    if count == 0:
+        return content, "old_text not found in file. Make sure it matches exactly."
+    if count > 1 and not replace_all:
+        return content, f"old_text appears {count} times. Please provide more context to make it unique."
+    return content.replace(old_text, new_text, -1 if replace_all else 1), None
+
+
 class EditFileTool(Tool):
-    """Tool to edit a file by replacing text."""
+    """Tool to edit files by replacing text, in batches or from a unified diff."""
     
     def __init__(self, allowed_dir: Path | None = None):
         self._allowed_dir = allowed_dir
@@ -112,7 +627,13 @@ class EditFileTool(Tool):
     
     @property
     def description(self) -> str:
-        return "Edit a file by replacing old_text with new_text. The old_text must exist exactly in the file."
+        return (
+            "Edit a file by replacing old_text with new_text. The old_text must exist exactly in the file. "
+            "To make several changes in one call, pass `edits` (a list of replacements applied in order "
+            "to `path`) or `patch` (a unified diff that may touch several files; relative paths are "
+            "resolved against `path` when it is a directory). All changes are checked before anything "
+            "is written, so either every edit is applied or none is."
+        )
     
     @property
     def parameters(self) -> dict[str, Any]:
@@ -121,7 +642,7 @@ class EditFileTool(Tool):
             "properties": {
                 "path": {
                     "type": "string",
-                    "description": "The file path to edit"
+                    "description": "The file path to edit (for `patch`: optional base directory)"
                 },
                 "old_text": {
                     "type": "string",
@@ -130,39 +651,187 @@ class EditFileTool(Tool):
                 "new_text": {
                     "type": "string",
                     "description": "The text to replace with"
+                },
+                "edits": {
+                    "type": "array",
+                    "description": "Several replacements for the same file, applied in order",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "old_text": {"type": "string"},
+                            "new_text": {"type": "string"},
+                            "replace_all": {
+                                "type": "boolean",
+                                "description": "Replace every occurrence instead of requiring a unique match"
+                            }
+                        },
+                        "required": ["old_text", "new_text"]
+                    }
+                },
+                "patch": {
+                    "type": "string",
+                    "description": "A unified diff (--- a/file, +++ b/file, @@ hunks) to apply; one section per file, no renames"
                 }
             },
-            "required": ["path", "old_text", "new_text"]
+            "required": []
         }
     
-    async def execute(self, path: str, old_text: str, new_text: str, **kwargs: Any) -> str:
+    async def execute(
+        self,
+        path: str | None = None,
+        old_text: str | None = None,
+        new_text: str | None = None,
+        edits: list[dict[str, Any]] | None = None,
+        patch: str | None = None,
+        **kwargs: Any,
+    ) -> str:
+        if patch is not None:
+            return await run_fs_io(self.name, self._patch, patch, path)
+        if not path:
+            return "Error: path is required"
+        if edits is not None:
+            return await run_fs_io(self.name, self._edit_many, path, edits)
+        if old_text is None or new_text is None:
+            return "Error: provide old_text and new_text, edits, or patch"
+        return await run_fs_io(self.name, self._edit, path, old_text, new_text)
+
+    def _edit(self, path: str, old_text: str, new_text: str) -> str:
         try:
             file_path = _resolve_path(path, self._allowed_dir)
             if not file_path.exists():
                 return f"Error: File not found: {path}"
             
             content = file_path.read_text(encoding="utf-8")
+            new_content, error = _apply_replacement(content, old_text, new_text)
+            if error:
+                return f"Warning: {error}" if error.startswith("old_text appears") else f"Error: {error}"
             
-            if old_text not in content:
-                return f"Error: old_text not found in file. Make sure it matches exactly."
-            
-            # Count occurrences
-            count = content.count(old_text)
-            if count > 1:
-                return f"Warning: old_text appears {count} times. Please provide more context to make it unique."
-            
-            new_content = content.replace(old_text, new_text, 1)
-            file_path.write_text(new_content, encoding="utf-8")
-            
+            _atomic_write(file_path, new_content)
             return f"Successfully edited {path}"
         except PermissionError as e:
             return f"Error: {e}"
         except Exception as e:
             return f"Error editing file: {str(e)}"
 
+    def _edit_many(self, path: str, edits: list[dict[str, Any]]) -> str:
+        try:
+            file_path = _resolve_path(path, self._allowed_dir)
+            if not file_path.exists():
+                return f"Error: File not found: {path}"
+            if not edits:
+                return "Error: edits is empty"
+
+            content = file_path.read_text(encoding="utf-8")
+            for n, edit in enumerate(edits, 1):
+                content, error = _apply_replacement(
+                    content, edit["old_text"], edit["new_text"], bool(edit.get("replace_all"))
+                )
+                if error:
+                    return f"Error: edit {n} of {len(edits)}: {error} No changes were written."
+
+            _atomic_write(file_path, content)
+            return f"Successfully applied {len(edits)} edit(s) to {path}"
+        except PermissionError as e:
+            return f"Error: {e}"
+        except Exception as e:
+            return f"Error editing file: {str(e)}"
+
+    def _patch(self, patch: str, base: str | None) -> str:
+        try:
+            base_dir = _resolve_path(base, self._allowed_dir) if base else None
+            if base_dir and not base_dir.is_dir():
+                base_dir = base_dir.parent
+
+            # Resolve and apply every file in memory first; nothing touches disk on failure
+            planned: list[tuple[Path, str | None, str]] = []
+            for fp in parse_unified_diff(patch):
+                rel = fp.path
+                if not rel:
+                    return "Error: patch has a file with no path"
+                target = _resolve_path(str(base_dir / rel) if base_dir else rel, self._allowed_dir)
+                added = sum(1 for h in fp.hunks for line in h.lines if line[0] == "+")
+                removed = sum(1 for h in fp.hunks for line in h.lines if line[0] == "-")
+                summary = f"{rel} (+{added} -{removed})"
+                if fp.old_path is None:
+                    if target.exists():
+                        return f"Error: {rel} already exists but the patch creates it. No changes were written."
+                    planned.append((target, apply_hunks("", fp.hunks, rel), summary))
+                    continue
+                if not target.exists():
+                    return f"Error: File not found: {rel}. No changes were written."
+                content = target.read_text(encoding="utf-8")
+                new_content = apply_hunks(content, fp.hunks, rel)
+                planned.append((target, None if fp.new_path is None else new_content, summary))
+
+            staged: list[tuple[Path, Path]] = []
+            try:
+                for target, content, _ in planned:
+                    if content is not None:
+                        staged.append((_stage_write(target, content), target))
+            except BaseException:
+                for tmp, _ in staged:
+                    tmp.unlink(missing_ok=True)
+                raise
+            for tmp, target in staged:
+                os.replace(tmp, target)
+            for target, content, _ in planned:
+                if content is None:
+                    target.unlink()
+
+            files = ", ".join(summary for _, _, summary in planned)
+            return f"Successfully patched {len(planned)} file(s): {files}"
+        except PatchError as e:
+            return f"Error: {e}. No changes were written."
+        except PermissionError as e:
+            return f"Error: {e}"
+        except Exception as e:
+            return f"Error applying patch: {str(e)}"
+
+
+# Directory walks stop collecting after this many entries
+MAX_LIST_ENTRIES = 10000
+
+
+def _format_size(size: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size} B"
+
+
+def _find_vcs_root(path: Path) -> Path | None:
+    """Closest ancestor (or path itself) that contains a .git directory."""
+    for candidate in (path, *path.parents):
+        if (candidate / ".git").exists():
+            return candidate
+    return None
+
+
+def _initial_gitignore_specs(dir_path: Path) -> tuple[list[GitIgnore], str]:
+    """
+    Load .gitignore files from the repository root down to (excluding) dir_path.
+
+    Returns the specs and dir_path relative to the repository root, which is
+    the prefix for paths matched against them.
+    """
+    root = _find_vcs_root(dir_path)
+    if root is None or root == dir_path:
+        return [], ""
+    prefix = dir_path.relative_to(root).as_posix()
+    specs = []
+    current, rel = root, ""
+    for part in prefix.split("/"):
+        spec = GitIgnore.load(current, rel)
+        if spec:
+            specs.append(spec)
+        current = current / part
+        rel = f"{rel}/{part}" if rel else part
+    return specs, prefix
+
 
 class ListDirTool(Tool):
-    """Tool to list directory contents."""
+    """Tool to list directory contents, optionally recursively."""
     
     def __init__(self, allowed_dir: Path | None = None):
         self._allowed_dir = allowed_dir
@@ -173,7 +842,11 @@ class ListDirTool(Tool):
     
     @property
     def description(self) -> str:
-        return "List the contents of a directory."
+        return (
+            "List the contents of a directory. Set depth > 1 to list subdirectories recursively "
+            "(paths are shown relative to the listed directory). Supports a glob filter, "
+            "size/modification-time details and pagination. Entries matched by .gitignore are hidden."
+        )
     
     @property
     def parameters(self) -> dict[str, Any]:
@@ -183,29 +856,147 @@ class ListDirTool(Tool):
                 "path": {
                     "type": "string",
                     "description": "The directory path to list"
+                },
+                "depth": {
+                    "type": "integer",
+                    "description": "How many directory levels to descend (1 = only this directory)",
+                    "minimum": 1,
+                    "maximum": 20
+                },
+                "pattern": {
+                    "type": "string",
+                    "description": "Only list files whose name matches this glob, e.g. '*.py'"
+                },
+                "details": {
+                    "type": "boolean",
+                    "description": "Include file size and modification time"
+                },
+                "gitignore": {
+                    "type": "boolean",
+                    "description": "Hide entries matched by .gitignore (default true)"
+                },
+                "offset": {
+                    "type": "integer",
+                    "description": "Number of entries to skip (for pagination)",
+                    "minimum": 0
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "Maximum number of entries to return (default 200)",
+                    "minimum": 1
                 }
             },
             "required": ["path"]
         }
     
-    async def execute(self, path: str, **kwargs: Any) -> str:
+    async def execute(
+        self,
+        path: str,
+        depth: int = 1,
+        pattern: str | None = None,
+        details: bool = False,
+        gitignore: bool = True,
+        offset: int = 0,
+        limit: int = 200,
+        **kwargs: Any,
+    ) -> str:
+        return await run_fs_io(
+            self.name, self._list, path, depth, pattern, details, gitignore, offset, limit
+        )
+
+    def _list(
+        self,
+        path: str,
+        depth: int = 1,
+        pattern: str | None = None,
+        details: bool = False,
+        gitignore: bool = True,
+        offset: int = 0,
+        limit: int = 200,
+    ) -> str:
         try:
             dir_path = _resolve_path(path, self._allowed_dir)
             if not dir_path.exists():
                 return f"Error: Directory not found: {path}"
             if not dir_path.is_dir():
                 return f"Error: Not a directory: {path}"
-            
-            items = []
-            for item in sorted(dir_path.iterdir()):
-                prefix = "📁 " if item.is_dir() else "📄 "
-                items.append(f"{prefix}{item.name}")
-            
-            if not items:
-                return f"Directory {path} is empty"
-            
-            return "\n".join(items)
+
+            specs, prefix = _initial_gitignore_specs(dir_path) if gitignore else ([], "")
+            entries = []
+            truncated = False
+            for line in self._walk(str(dir_path), "", prefix, specs, depth, pattern, details, gitignore):
+                if len(entries) >= MAX_LIST_ENTRIES:
+                    truncated = True
+                    break
+                entries.append(line)
+
+            if not entries:
+                return f"Directory {path} is empty" if not pattern else f"No entries matching {pattern} in {path}"
+
+            total = len(entries)
+            page = entries[offset:offset + limit]
+            if not page:
+                return f"Error: offset {offset} is beyond the end of the listing ({total} entries)"
+            result = "\n".join(page)
+            end = offset + len(page)
+            total_str = f"{total}+" if truncated else str(total)
+            if offset or end < total or truncated:
+                result += f"\n\n[entries {offset + 1}-{end} of {total_str}"
+                result += f"; use offset={end} to continue]" if end < total else "]"
+            return result
         except PermissionError as e:
             return f"Error: {e}"
         except Exception as e:
             return f"Error listing directory: {str(e)}"
+
+    def _walk(
+        self,
+        dir_path: str,
+        rel_dir: str,
+        prefix: str,
+        specs: list[GitIgnore],
+        depth: int,
+        pattern: str | None,
+        details: bool,
+        gitignore: bool,
+    ) -> Iterator[str]:
+        """Yield formatted entries depth-first in name order, from a single scandir per directory."""
+        vcs_rel = f"{prefix}/{rel_dir}" if prefix and rel_dir else (prefix or rel_dir)
+        if gitignore:
+            spec = GitIgnore.load(Path(dir_path), vcs_rel)
+            if spec:
+                specs = specs + [spec]
+        try:
+            with os.scandir(dir_path) as it:
+                children = sorted(it, key=lambda e: e.name)
+        except OSError:
+            return
+
+        for entry in children:
+            rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if gitignore:
+                match_rel = f"{prefix}/{rel}" if prefix else rel
+                if is_ignored(specs, match_rel, is_dir):
+                    continue
+            if not pattern or (not is_dir and fnmatch(entry.name, pattern)):
+                yield self._format_entry(entry, rel, is_dir, details)
+            if is_dir and depth > 1 and not entry.is_symlink():
+                yield from self._walk(
+                    entry.path, rel, prefix, specs, depth - 1, pattern, details, gitignore
+                )
+
+    @staticmethod
+    def _format_entry(entry: os.DirEntry, rel: str, is_dir: bool, details: bool) -> str:
+        line = f"📁 {rel}" if is_dir else f"📄 {rel}"
+        if details:
+            try:
+                st = entry.stat()  # Cached on the DirEntry on most platforms
+                mtime = time.strftime("%Y-%m-%d %H:%M", time.localtime(st.st_mtime))
+                line += f"  {mtime}" if is_dir else f"  {_format_size(st.st_size)}  {mtime}"
+            except OSError:
+                pass
+        return line
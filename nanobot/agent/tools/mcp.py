@@ -1,5 +1,10 @@
 """MCP client: connects to MCP servers and wraps their tools as native nanobot tools."""
 
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
 from contextlib import AsyncExitStack
 from typing import Any
 
@@ -7,17 +12,138 @@ from loguru import logger
 
 from nanobot.agent.tools.base import Tool
 from nanobot.agent.tools.registry import ToolRegistry
+from nanobot.utils.helpers import estimate_tokens
+
+DEFAULT_CONNECT_TIMEOUT = 30.0
+DEFAULT_CALL_TIMEOUT = 60.0
+DEFAULT_MAX_CONCURRENT = 4
+RESULT_CACHE_MAX_ENTRIES = 256
+# Schema minification: description budgets (chars) and keywords never sent to the model
+TOOL_DESCRIPTION_BUDGET = 1024
+PARAM_DESCRIPTION_BUDGET = 256
+_DROPPED_KEYWORDS = frozenset({"title", "examples", "example", "$schema", "$comment"})
+PING_INTERVAL = 30.0
+INITIAL_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+
+
+class MCPMetrics:
+    """Per-tool call counts, errors, timeouts, cache hits and latency for MCP tools."""
+
+    def __init__(self):
+        self._stats: dict[str, dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, tool: str, seconds: float, outcome: str = "ok") -> None:
+        """outcome is one of ok, error, timeout or cache_hit."""
+        with self._lock:
+            s = self._stats.setdefault(tool, {
+                "calls": 0, "errors": 0, "timeouts": 0, "cache_hits": 0, "total_s": 0.0, "max_s": 0.0,
+            })
+            s["calls"] += 1
+            if outcome == "error":
+                s["errors"] += 1
+            elif outcome == "timeout":
+                s["timeouts"] += 1
+            elif outcome == "cache_hit":
+                s["cache_hits"] += 1
+                return
+            s["total_s"] += seconds
+            s["max_s"] = max(s["max_s"], seconds)
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        """Return {tool: {calls, errors, timeouts, cache_hits, total_s, max_s, avg_s}}."""
+        with self._lock:
+            out = {}
+            for tool, s in self._stats.items():
+                called = s["calls"] - s["cache_hits"]
+                out[tool] = {**s, "avg_s": s["total_s"] / called if called else 0.0}
+            return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+mcp_metrics = MCPMetrics()
+
+
+def _shorten(text: str, budget: int) -> str:
+    """Cut text to about budget chars, at a sentence end or word boundary."""
+    text = " ".join(text.split())
+    if len(text) <= budget:
+        return text
+    cut = text[:budget]
+    end = cut.rfind(". ")
+    if end >= budget // 2:
+        return cut[:end + 1] + " …"
+    end = cut.rfind(" ")
+    return (cut[:end] if end > 0 else cut).rstrip() + "…"
+
+
+def minify_schema(schema: Any, description_budget: int = PARAM_DESCRIPTION_BUDGET) -> Any:
+    """
+    Copy of a JSON schema without keywords that cost prompt tokens but do
+    not guide the model: titles, examples, $schema/$comment, null defaults
+    and defaults on required properties. Descriptions are cut to budget.
+    """
+    if not isinstance(schema, dict):
+        return schema
+    required = set(schema.get("required") or ())
+    out: dict[str, Any] = {}
+    for key, value in schema.items():
+        if key in _DROPPED_KEYWORDS:
+            continue
+        if key == "default" and value is None:
+            continue
+        if key == "description" and isinstance(value, str):
+            out[key] = _shorten(value, description_budget)
+        elif key in ("properties", "patternProperties", "$defs", "definitions") and isinstance(value, dict):
+            out[key] = {}
+            for name, sub in value.items():
+                sub = minify_schema(sub, description_budget)
+                if key == "properties" and name in required and isinstance(sub, dict):
+                    sub.pop("default", None)
+                out[key][name] = sub
+        elif key in ("items", "additionalProperties", "not", "contains") and isinstance(value, dict):
+            out[key] = minify_schema(value, description_budget)
+        elif key in ("anyOf", "oneOf", "allOf", "prefixItems", "items") and isinstance(value, list):
+            out[key] = [minify_schema(v, description_budget) for v in value]
+        else:
+            out[key] = value
+    return out
 
 
 class MCPToolWrapper(Tool):
     """Wraps a single MCP server tool as a nanobot Tool."""
 
-    def __init__(self, session, server_name: str, tool_def):
+    fill_defaults = False  # Forward only what the model sent; the server applies its own defaults
+
+    def __init__(
+        self,
+        session,
+        server_name: str,
+        tool_def,
+        connection: "MCPServerConnection | None" = None,
+        minify: bool = False,
+    ):
         self._session = session
+        self._connection = connection
+        self._server_name = server_name
         self._original_name = tool_def.name
         self._name = f"mcp_{server_name}_{tool_def.name}"
         self._description = tool_def.description or tool_def.name
-        self._parameters = tool_def.inputSchema or {"type": "object", "properties": {}}
+        # mcp 1.x uses camelCase model attributes, 2.x snake_case
+        schema = getattr(tool_def, "inputSchema", None) or getattr(tool_def, "input_schema", None)
+        self._parameters = schema or {"type": "object", "properties": {}}
+        self.full_tokens = self.prompt_tokens()
+        if minify:
+            self._description = _shorten(self._description, TOOL_DESCRIPTION_BUDGET)
+            self._parameters = minify_schema(self._parameters)
+        annotations = getattr(tool_def, "annotations", None)
+        self.read_only = bool(
+            getattr(annotations, "readOnlyHint", None) or getattr(annotations, "read_only_hint", None)
+        )
 
     @property
     def name(self) -> str:
@@ -31,7 +157,48 @@ class MCPToolWrapper(Tool):
     def parameters(self) -> dict[str, Any]:
         return self._parameters
 
+    def prompt_tokens(self) -> int:
+        """Estimated prompt tokens of this tool's definition."""
+        return estimate_tokens(json.dumps(self.to_schema(), ensure_ascii=False))
+
     async def execute(self, **kwargs: Any) -> str:
+        conn = self._connection
+        if conn is None:
+            return await self._call(kwargs)
+
+        cache_key = None
+        if self.read_only and conn.cache_ttl > 0:
+            cache_key = (self._original_name, json.dumps(kwargs, sort_keys=True, default=str))
+            if (cached := conn.cached_result(cache_key)) is not None:
+                mcp_metrics.record(self._name, 0.0, "cache_hit")
+                return cached
+
+        async with conn.semaphore:
+            start = time.perf_counter()
+            try:
+                # Cancels the pending request; the session stays usable
+                async with asyncio.timeout(conn.call_timeout):
+                    result, is_error = await self._call_raw(kwargs)
+            except TimeoutError:
+                mcp_metrics.record(self._name, time.perf_counter() - start, "timeout")
+                logger.warning(f"MCP tool '{self._name}' timed out after {conn.call_timeout:g}s")
+                return f"Error: MCP tool '{self._name}' timed out after {conn.call_timeout:g}s"
+            except Exception as e:
+                mcp_metrics.record(self._name, time.perf_counter() - start, "error")
+                if _is_disconnect(e):
+                    conn.mark_dead()
+                    return f"Error: MCP server '{self._server_name}' disconnected; reconnecting, try again later"
+                raise
+        mcp_metrics.record(self._name, time.perf_counter() - start, "error" if is_error else "ok")
+        if cache_key and not is_error:
+            conn.cache_result(cache_key, result)
+        return result
+
+    async def _call(self, kwargs: dict[str, Any]) -> str:
+        return (await self._call_raw(kwargs))[0]
+
+    async def _call_raw(self, kwargs: dict[str, Any]) -> tuple[str, bool]:
+        """Call the tool; returns (text, whether the server flagged an error)."""
         from mcp import types
         result = await self._session.call_tool(self._original_name, arguments=kwargs)
         parts = []
@@ -40,41 +207,257 @@ class MCPToolWrapper(Tool):
                 parts.append(block.text)
             else:
                 parts.append(str(block))
-        return "\n".join(parts) or "(no output)"
+        is_error = bool(getattr(result, "isError", None) or getattr(result, "is_error", None))
+        return "\n".join(parts) or "(no output)", is_error
+
+
+def _is_disconnect(e: BaseException) -> bool:
+    """Whether an error means the session's transport is gone."""
+    import anyio
+
+    if isinstance(e, (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream,
+                      ConnectionError, EOFError)):
+        return True
+    return "connection closed" in str(e).lower()
+
 
+class MCPServerConnection:
+    """
+    Supervises one MCP server in its own task.
 
-async def connect_mcp_servers(
-    mcp_servers: dict, registry: ToolRegistry, stack: AsyncExitStack
-) -> None:
-    """Connect to configured MCP servers and register their tools."""
-    from mcp import ClientSession, StdioServerParameters
-    from mcp.client.stdio import stdio_client
+    Connects with a timeout, registers the server's tools, pings it while
+    idle and, when the session dies, unregisters the tools and reconnects
+    with exponential backoff. The transport contexts are entered and exited
+    inside the supervisor task, as the SDK's anyio cancel scopes require.
+    """
 
-    for name, cfg in mcp_servers.items():
+    def __init__(self, name: str, cfg, registry: ToolRegistry, ping_interval: float = PING_INTERVAL):
+        self.name = name
+        self.cfg = cfg
+        self.registry = registry
+        self.connect_timeout = getattr(cfg, "connect_timeout", None) or DEFAULT_CONNECT_TIMEOUT
+        self.call_timeout = getattr(cfg, "call_timeout", None) or DEFAULT_CALL_TIMEOUT
+        self.cache_ttl = getattr(cfg, "cache_ttl", None) or 0
+        self.ping_interval = ping_interval
+        # Bounds calls in flight to this server across all turns and subagents
+        self.semaphore = asyncio.Semaphore(getattr(cfg, "max_concurrent", None) or DEFAULT_MAX_CONCURRENT)
+        self._results: OrderedDict[tuple[str, str], tuple[float, str]] = OrderedDict()
+        self.session = None
+        self.tool_names: list[str] = []
+        self.failures = 0
+        self.first_attempt = asyncio.Event()  # Set once the first connect succeeded or failed
+        self.minify = getattr(cfg, "minify_schemas", True)
+        self.schema_tokens = {"full": 0, "sent": 0}
+        self._dead = False
+        self._refresh_pending = False
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def connected(self) -> bool:
+        return self.session is not None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._supervise(), name=f"mcp:{self.name}")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
         try:
-            if cfg.command:
-                params = StdioServerParameters(
-                    command=cfg.command, args=cfg.args, env=cfg.env or None
-                )
-                read, write = await stack.enter_async_context(stdio_client(params))
-            elif cfg.url:
-                from mcp.client.streamable_http import streamable_http_client
-                read, write, _ = await stack.enter_async_context(
-                    streamable_http_client(cfg.url)
-                )
-            else:
-                logger.warning(f"MCP server '{name}': no command or url configured, skipping")
+            await task
+        except (asyncio.CancelledError, RuntimeError, BaseExceptionGroup):
+            pass  # MCP SDK cancel scope cleanup is noisy but harmless
+        self._unregister()
+
+    def cached_result(self, key: tuple[str, str]) -> str | None:
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._results[key]
+            return None
+        self._results.move_to_end(key)
+        return entry[1]
+
+    def cache_result(self, key: tuple[str, str], result: str) -> None:
+        self._results[key] = (time.monotonic() + self.cache_ttl, result)
+        self._results.move_to_end(key)
+        while len(self._results) > RESULT_CACHE_MAX_ENTRIES:
+            self._results.popitem(last=False)
+
+    def mark_dead(self) -> None:
+        """Called when a tool call finds the transport gone; triggers a reconnect."""
+        self._dead = True
+        self._wake.set()
+
+    async def _on_message(self, message) -> None:
+        """Session message handler: refresh tools on tools/list_changed."""
+        root = getattr(message, "root", message)  # mcp 1.x wraps notifications in ServerNotification
+        if getattr(root, "method", None) == "notifications/tools/list_changed":
+            self._refresh_pending = True
+            self._wake.set()
+
+    async def _supervise(self) -> None:
+        if not (self.cfg.command or self.cfg.url):
+            logger.warning(f"MCP server '{self.name}': no command or url configured, skipping")
+            self.first_attempt.set()
+            return
+        backoff = INITIAL_BACKOFF
+        while True:
+            try:
+                async with AsyncExitStack() as stack:
+                    # asyncio.timeout (not wait_for) keeps the SDK contexts in this task
+                    async with asyncio.timeout(self.connect_timeout):
+                        session = await self._open(stack)
+                        tools = await session.list_tools()
+                    self._register(session, tools.tools)
+                    self.first_attempt.set()
+                    backoff = INITIAL_BACKOFF
+                    await self._watch(session)
+                logger.warning(f"MCP server '{self.name}': connection lost")
+            except asyncio.CancelledError:
+                raise
+            except TimeoutError:
+                self.failures += 1
+                logger.error(f"MCP server '{self.name}': no connection after {self.connect_timeout:.0f}s")
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"MCP server '{self.name}': failed to connect: {e}")
+            finally:
+                self._unregister()
+                self.first_attempt.set()
+            logger.info(f"MCP server '{self.name}': reconnecting in {backoff:.0f}s")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, MAX_BACKOFF)
+
+    async def _open(self, stack: AsyncExitStack):
+        """Start the transport and an initialized ClientSession on stack."""
+        from mcp import ClientSession, StdioServerParameters
+        from mcp.client.stdio import stdio_client
+
+        if self.cfg.command:
+            params = StdioServerParameters(
+                command=self.cfg.command, args=self.cfg.args, env=self.cfg.env or None
+            )
+            read, write = await stack.enter_async_context(stdio_client(params))
+        else:
+            from mcp.client.streamable_http import streamable_http_client
+            read, write, _ = await stack.enter_async_context(streamable_http_client(self.cfg.url))
+        session = await stack.enter_async_context(
+            ClientSession(read, write, message_handler=self._on_message)
+        )
+        await session.initialize()
+        return session
+
+    async def _watch(self, session) -> None:
+        """Serve tool list refreshes; return once the session is known to be dead."""
+        self._dead = False
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.ping_interval)
+            except TimeoutError:
+                try:
+                    async with asyncio.timeout(self.connect_timeout):
+                        await session.send_ping()
+                except Exception as e:
+                    logger.warning(f"MCP server '{self.name}': ping failed: {e or type(e).__name__}")
+                    return
                 continue
+            self._wake.clear()
+            if self._dead:
+                return
+            if self._refresh_pending:
+                self._refresh_pending = False
+                async with asyncio.timeout(self.connect_timeout):
+                    tools = await session.list_tools()
+                self._register(session, tools.tools)
+
+    def _register(self, session, tool_defs: list) -> None:
+        """Bring the registry in line with tool_defs: add new, replace changed, drop removed tools."""
+        first = self.session is None
+        self.session = session
+        wrappers = {
+            w.name: w for w in (
+                MCPToolWrapper(session, self.name, d, connection=self, minify=self.minify) for d in tool_defs
+            )
+        }
+        old = set(self.tool_names)
+        for name in old - wrappers.keys():
+            self.registry.unregister(name)
+        changed = 0
+        for name, wrapper in wrappers.items():
+            current = self.registry.get(name)
+            if name in old and current is not None and current.to_schema() != wrapper.to_schema():
+                changed += 1
+            self.registry.register(wrapper)
+            if name not in old:
+                logger.debug(f"MCP: registered tool '{name}' from server '{self.name}'")
+        self.tool_names = list(wrappers)
+        added, removed = len(wrappers.keys() - old), len(old - wrappers.keys())
+        if added or removed or changed:
+            self._results.clear()
+
+        full = sum(w.full_tokens for w in wrappers.values())
+        sent = sum(w.prompt_tokens() for w in wrappers.values())
+        self.schema_tokens = {"full": full, "sent": sent}
+        saved = f", schemas minified: ~{full - sent} prompt tokens saved per request ({full} -> {sent})" \
+            if self.minify and full > sent else ""
+        if first:
+            logger.info(f"MCP server '{self.name}': connected, {len(wrappers)} tools registered{saved}")
+        else:
+            logger.info(
+                f"MCP server '{self.name}': tool list changed (+{added} -{removed} ~{changed}){saved}"
+            )
+
+    def _unregister(self) -> None:
+        for name in self.tool_names:
+            self.registry.unregister(name)
+        self.tool_names = []
+        self.session = None
+        self._results.clear()  # A restarted server may return different data
+
+
+class MCPManager:
+    """Starts every configured MCP server concurrently; tools appear as servers come online."""
+
+    def __init__(self, mcp_servers: dict, registry: ToolRegistry):
+        self.connections = {
+            name: MCPServerConnection(name, cfg, registry) for name, cfg in mcp_servers.items()
+        }
+
+    def start(self) -> None:
+        for conn in self.connections.values():
+            conn.start()
+
+    async def wait_ready(self, timeout: float | None = None) -> None:
+        """Wait until every server has connected or failed once (at most timeout seconds)."""
+        if not self.connections:
+            return
+        waits = [conn.first_attempt.wait() for conn in self.connections.values()]
+        try:
+            await asyncio.wait_for(asyncio.gather(*waits), timeout=timeout)
+        except TimeoutError:
+            pending = [n for n, c in self.connections.items() if not c.first_attempt.is_set()]
+            logger.warning(f"MCP servers still connecting: {', '.join(pending)}")
 
-            session = await stack.enter_async_context(ClientSession(read, write))
-            await session.initialize()
+    def status(self) -> dict[str, dict[str, Any]]:
+        return {
+            name: {
+                "connected": conn.connected,
+                "tools": len(conn.tool_names),
+                "failures": conn.failures,
+                "schema_tokens_saved": conn.schema_tokens["full"] - conn.schema_tokens["sent"],
+            }
+            for name, conn in self.connections.items()
+        }
 
-            tools = await session.list_tools()
-            for tool_def in tools.tools:
-                wrapper = MCPToolWrapper(session, name, tool_def)
-                registry.register(wrapper)
-                logger.debug(f"MCP: registered tool '{wrapper.name}' from server '{name}'")
+    def metrics(self) -> dict[str, dict[str, float]]:
+        """Per-tool latency and error metrics for this manager's servers."""
+        prefixes = tuple(f"mcp_{name}_" for name in self.connections)
+        return {tool: s for tool, s in mcp_metrics.snapshot().items() if tool.startswith(prefixes)}
 
-            logger.info(f"MCP server '{name}': connected, {len(tools.tools)} tools registered")
-        except Exception as e:
-            logger.error(f"MCP server '{name}': failed to connect: {e}")
+    async def close(self) -> None:
+        await asyncio.gather(*(conn.stop() for conn in self.connections.values()))
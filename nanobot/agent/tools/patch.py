@@ -0,0 +1,141 @@
+"""Unified diff parsing and in-memory application for the edit tool."""
+
+import re
+from dataclasses import dataclass, field
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+class PatchError(ValueError):
+    """A patch that cannot be parsed or does not apply."""
+
+
+@dataclass
+class Hunk:
+    """One @@ block: old_start is 1-based, lines keep their ' ', '-' or '+' prefix."""
+
+    old_start: int
+    lines: list[str] = field(default_factory=list)
+
+    @property
+    def old_lines(self) -> list[str]:
+        return [line[1:] for line in self.lines if line[0] in " -"]
+
+    @property
+    def new_lines(self) -> list[str]:
+        return [line[1:] for line in self.lines if line[0] in " +"]
+
+
+@dataclass
+class FilePatch:
+    """All hunks for one file; old_path/new_path are None for /dev/null."""
+
+    old_path: str | None
+    new_path: str | None
+    hunks: list[Hunk] = field(default_factory=list)
+
+    @property
+    def path(self) -> str:
+        return self.new_path or self.old_path or ""
+
+
+def _strip_path(raw: str) -> str | None:
+    path = raw.split("\t", 1)[0].strip()
+    if path == "/dev/null":
+        return None
+    if path[:2] in ("a/", "b/"):
+        path = path[2:]
+    return path
+
+
+def parse_unified_diff(text: str) -> list[FilePatch]:
+    """Parse a (possibly multi-file) unified diff."""
+    patches: list[FilePatch] = []
+    current: FilePatch | None = None
+    hunk: Hunk | None = None
+    remaining_old = remaining_new = 0
+    lines = text.splitlines()
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if hunk is not None and (remaining_old > 0 or remaining_new > 0):
+            if line.startswith("\\"):  # "\ No newline at end of file"
+                i += 1
+                continue
+            tag = line[:1] or " "  # Some tools strip the space of empty context lines
+            if tag not in " -+":
+                raise PatchError(f"Malformed hunk line {i + 1}: {line!r}")
+            hunk.lines.append(tag + line[1:])
+            if tag in " -":
+                remaining_old -= 1
+            if tag in " +":
+                remaining_new -= 1
+            i += 1
+            continue
+        if line.startswith("--- ") and i + 1 < len(lines) and lines[i + 1].startswith("+++ "):
+            current = FilePatch(_strip_path(line[4:]), _strip_path(lines[i + 1][4:]))
+            patches.append(current)
+            hunk = None
+            i += 2
+            continue
+        m = _HUNK_HEADER.match(line)
+        if m:
+            if current is None:
+                raise PatchError(f"Hunk without file header at line {i + 1}")
+            remaining_old = int(m.group(2)) if m.group(2) is not None else 1
+            remaining_new = int(m.group(4)) if m.group(4) is not None else 1
+            hunk = Hunk(old_start=int(m.group(1)))
+            current.hunks.append(hunk)
+        i += 1
+    if hunk is not None and (remaining_old > 0 or remaining_new > 0):
+        raise PatchError("Patch ends in the middle of a hunk")
+    if not patches:
+        raise PatchError("No file headers (--- / +++) found in patch")
+    seen: set[str] = set()
+    for fp in patches:
+        if fp.old_path and fp.new_path and fp.old_path != fp.new_path:
+            raise PatchError(f"Renames are not supported ({fp.old_path} -> {fp.new_path})")
+        if fp.path in seen:
+            raise PatchError(f"{fp.path} has more than one file section; put all its hunks under one header")
+        seen.add(fp.path)
+    return patches
+
+
+def _find_block(lines: list[str], block: list[str], expected: int, start: int) -> int:
+    """Index of block in lines at or after start, preferring the position closest to expected."""
+    if not block:
+        return max(start, min(expected, len(lines)))
+    if expected >= start and lines[expected:expected + len(block)] == block:
+        return expected
+    best = -1
+    for pos in range(start, len(lines) - len(block) + 1):
+        if lines[pos:pos + len(block)] == block:
+            if best < 0 or abs(pos - expected) < abs(best - expected):
+                best = pos
+            elif pos > expected:
+                break
+    return best
+
+
+def apply_hunks(content: str, hunks: list[Hunk], path: str = "") -> str:
+    """Apply hunks to content, raising PatchError if any hunk's context is not found."""
+    lines = content.split("\n") if content else []
+    trailing_newline = content.endswith("\n")
+    if trailing_newline:
+        lines.pop()
+    out: list[str] = []
+    cursor = 0
+    for n, hunk in enumerate(hunks, 1):
+        old = hunk.old_lines
+        expected = max(hunk.old_start - 1, 0) if old else hunk.old_start
+        pos = _find_block(lines, old, expected, cursor)
+        if pos < 0:
+            preview = "\n".join(old[:3])
+            raise PatchError(f"{path}: hunk {n} does not apply; context not found:\n{preview}")
+        out.extend(lines[cursor:pos])
+        out.extend(hunk.new_lines)
+        cursor = pos + len(old)
+    out.extend(lines[cursor:])
+    if not out:
+        return ""
+    return "\n".join(out) + ("\n" if trailing_newline or not content else "")
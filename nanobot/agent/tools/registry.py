@@ -16,7 +16,11 @@ class ToolRegistry:
         self._tools: dict[str, Tool] = {}
     
     def register(self, tool: Tool) -> None:
-        """Register a tool."""
+        """Register a tool and compile its parameter validator."""
+        try:
+            tool.compile_params()
+        except ValueError:
+            pass  # Reported as an execution error when the tool is called
         self._tools[tool.name] = tool
     
     def unregister(self, name: str) -> None:
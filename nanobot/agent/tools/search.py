@@ -0,0 +1,513 @@
+"""Code search tool backed by a persistent trigram index."""
+
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Any, Iterator
+
+from loguru import logger
+
+from nanobot.agent.tools.base import Tool
+from nanobot.agent.tools.filesystem import _resolve_path
+from nanobot.utils.gitignore import GitIgnore, is_ignored
+
+try:
+    # CPython's private regex parser (sre_parse before 3.11); without it every search scans all files
+    from re import _parser as sre_parse
+except ImportError:
+    sre_parse = None
+
+INDEX_VERSION = 3
+MAX_INDEXED_FILE_SIZE = 1024 * 1024
+REFRESH_INTERVAL = 2.0  # Minimum seconds between incremental re-scans of the tree
+MAX_REFRESH_INTERVAL = 30.0
+REFRESH_COST_FACTOR = 10  # Wait this many times the last scan's duration before the next one
+SAVE_INTERVAL = 30.0  # Seconds between appends of pending changes to the index file
+PARALLEL_INDEX_THRESHOLD = 2000  # Changed files above which indexing uses worker processes
+SEARCH_WORKERS = min(8, os.cpu_count() or 4)
+MAX_LINE_CHARS = 300
+BINARY = -1  # Record bits of a binary file: never a search candidate
+
+_search_executor: ThreadPoolExecutor | None = None
+_search_executor_lock = threading.Lock()
+
+
+def _get_search_executor() -> ThreadPoolExecutor:
+    global _search_executor
+    if _search_executor is None:
+        with _search_executor_lock:
+            if _search_executor is None:
+                _search_executor = ThreadPoolExecutor(
+                    max_workers=SEARCH_WORKERS, thread_name_prefix="nanobot-search"
+                )
+    return _search_executor
+
+
+def _signature_bits(trigram_count: int) -> int:
+    """Signature size: next power of two >= 2 bits per trigram, within [512, 65536]."""
+    bits = 512
+    while bits < trigram_count * 2 and bits < 65536:
+        bits <<= 1
+    return bits
+
+
+def _trigram_signature(trigrams: set[bytes], bits: int) -> int:
+    """Bloom-filter style bitmask of (case-folded) trigrams."""
+    buf = bytearray(bits // 8)
+    mask = bits - 1
+    for tg in trigrams:
+        h = ((int.from_bytes(tg, "little") * 0x9E3779B1) >> 7) & mask
+        buf[h >> 3] |= 1 << (h & 7)
+    return int.from_bytes(buf, "little")
+
+
+def _trigrams(data: bytes) -> set[bytes]:
+    data = data.lower()
+    return {data[i:i + 3] for i in range(len(data) - 2)}
+
+
+def _index_one(path: str, mtime_ns: int, size: int) -> tuple[int, int, int, int]:
+    """
+    Build the (mtime_ns, size, bits, signature) record of one file.
+
+    bits is BINARY for binary files and 0 for text files that are not indexed
+    (too large or unreadable), which every search has to scan.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read(8192 if size > MAX_INDEXED_FILE_SIZE else -1)
+    except OSError:
+        return (mtime_ns, size, 0, 0)
+    if b"\0" in data[:8192]:
+        return (mtime_ns, size, BINARY, 0)
+    if size > MAX_INDEXED_FILE_SIZE:
+        return (mtime_ns, size, 0, 0)
+    trigrams = _trigrams(data)
+    bits = _signature_bits(len(trigrams))
+    return (mtime_ns, size, bits, _trigram_signature(trigrams, bits))
+
+
+def _index_chunk(chunk: list[tuple[str, str, int, int]]) -> list[tuple[str, tuple[int, int, int, int]]]:
+    return [(rel, _index_one(path, mtime_ns, size)) for rel, path, mtime_ns, size in chunk]
+
+
+def _index_files(todo: list[tuple[str, str, int, int]]) -> list[tuple[str, tuple[int, int, int, int]]]:
+    """Index files, spreading large batches (e.g. the first build) over worker processes."""
+    workers = os.cpu_count() or 1
+    if len(todo) < PARALLEL_INDEX_THRESHOLD or workers < 2:
+        return _index_chunk(todo)
+    size = max(64, len(todo) // (workers * 4))
+    chunks = [todo[i:i + size] for i in range(0, len(todo), size)]
+    try:
+        # Never fork: refresh() runs on a thread of the multithreaded gateway
+        with ProcessPoolExecutor(
+            max_workers=min(workers, 8), mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            return [item for part in pool.map(_index_chunk, chunks) for item in part]
+    except Exception as e:
+        logger.warning(f"Parallel indexing unavailable, indexing inline: {e}")
+        return _index_chunk(todo)
+
+
+def _collect_literals(items: list, out: list[str]) -> None:
+    run: list[str] = []
+
+    def flush() -> None:
+        if run:
+            out.append("".join(run))
+            run.clear()
+
+    for op, arg in items:
+        if op is sre_parse.LITERAL:
+            run.append(chr(arg))
+        elif op is sre_parse.AT:
+            continue  # Anchors consume nothing
+        elif op is sre_parse.SUBPATTERN:
+            flush()
+            _collect_literals(list(arg[3]), out)
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and arg[0] >= 1:
+            flush()
+            _collect_literals(list(arg[2]), out)
+        else:
+            flush()
+    flush()
+
+
+def required_literals(pattern: str, ignore_case: bool) -> list[str]:
+    """
+    Literal substrings (3+ chars) that every match of a regex must contain, best effort.
+
+    Returns [] (scan every file) when the pattern or the private regex parser
+    it relies on can't be used.
+    """
+    if sre_parse is None:
+        return []
+    literals: list[str] = []
+    try:
+        _collect_literals(list(sre_parse.parse(pattern)), literals)
+    except re.error:
+        return []
+    except Exception as e:  # The parser's internals changed in this Python version
+        logger.debug(f"search: literal extraction unavailable, scanning all files: {e}")
+        return []
+    # The index folds ASCII case only, so non-ASCII literals can't prefilter case-insensitive queries
+    return [lit for lit in literals if len(lit) >= 3 and (lit.isascii() or not ignore_case)]
+
+
+class TrigramIndex:
+    """
+    Per-file trigram signatures for a directory tree.
+
+    Each indexed file gets a Bloom-filter bitmask of its case-folded trigrams,
+    so a query only has to read files whose signature contains every trigram
+    of the query's required literals. The index respects .gitignore and is
+    updated incrementally (by mtime/size). Re-scans back off on large trees
+    so walking stays a small share of the time.
+
+    The index file is an append-only log: a JSON header line, then one
+    record per changed file (a JSON line, followed by the raw signature) or
+    removed file, batched at most every SAVE_INTERVAL seconds. Later records
+    win on load; the log is rewritten once it is mostly superseded records.
+    Unsaved changes are harmless: their files just look changed next run.
+    """
+
+    def __init__(self, root: Path, index_file: Path | None = None):
+        self.root = root
+        self.index_file = index_file
+        # rel path -> (mtime_ns, size, bits, signature); bits == 0 not indexed, BINARY skipped
+        self._files: dict[str, tuple[int, int, int, int]] = {}
+        self._last_refresh = 0.0
+        self._refresh_interval = REFRESH_INTERVAL
+        # Changes not yet in the index file (None = removed), records in the file, last save time
+        self._pending: dict[str, tuple[int, int, int, int] | None] = {}
+        self._log_records = 0
+        self._last_save = 0.0
+        self._lock = threading.Lock()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def refresh(self, force: bool = False) -> None:
+        """Re-scan the tree and re-index files that were added or changed."""
+        with self._lock:
+            if not force and time.monotonic() - self._last_refresh < self._refresh_interval:
+                return
+            start = time.perf_counter()
+            seen: set[str] = set()
+            todo: list[tuple[str, str, int, int]] = []
+            for rel, entry in self._walk():
+                seen.add(rel)
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                old = self._files.get(rel)
+                if not old or old[0] != st.st_mtime_ns or old[1] != st.st_size:
+                    todo.append((rel, entry.path, st.st_mtime_ns, st.st_size))
+            removed = [r for r in self._files if r not in seen]
+            for rel in removed:
+                del self._files[rel]
+                self._pending[rel] = None
+            for rel, record in _index_files(todo):
+                self._files[rel] = record
+                self._pending[rel] = record
+            elapsed = time.perf_counter() - start
+            self._last_refresh = time.monotonic()
+            self._refresh_interval = min(
+                max(REFRESH_INTERVAL, elapsed * REFRESH_COST_FACTOR), MAX_REFRESH_INTERVAL
+            )
+            if todo or removed:
+                logger.debug(
+                    f"Search index {self.root}: {len(todo)} files indexed, {len(removed)} removed, "
+                    f"{len(self._files)} total, {elapsed * 1000:.0f} ms"
+                )
+            self._save()
+
+    def flush(self) -> None:
+        """Write pending changes to the index file now instead of at the next save interval."""
+        with self._lock:
+            self._save(force=True)
+
+    def candidates(self, literals: list[str]) -> list[str]:
+        """Relative paths of text files that may contain all literals (all if none given)."""
+        trigrams = set()
+        for lit in literals:
+            trigrams |= _trigrams(lit.encode("utf-8"))
+        with self._lock:
+            files = list(self._files.items())
+        if not trigrams:
+            return [rel for rel, (_, _, bits, _) in files if bits != BINARY]
+        query_masks: dict[int, int] = {}
+        result = []
+        for rel, (_, _, bits, sig) in files:
+            if bits <= 0:
+                if not bits:
+                    result.append(rel)  # Unindexed text file: always scanned
+                continue
+            q = query_masks.get(bits)
+            if q is None:
+                q = query_masks[bits] = _trigram_signature(trigrams, bits)
+            if sig & q == q:
+                result.append(rel)
+        return result
+
+    def _walk(self) -> Iterator[tuple[str, os.DirEntry]]:
+        """Yield (relative POSIX path, DirEntry) for files not excluded by .gitignore."""
+        stack: list[tuple[str, str, list[GitIgnore]]] = [(str(self.root), "", [])]
+        while stack:
+            dir_path, rel_dir, specs = stack.pop()
+            spec = GitIgnore.load(Path(dir_path), rel_dir)
+            if spec:
+                specs = specs + [spec]
+            try:
+                it = os.scandir(dir_path)
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not is_ignored(specs, rel, True):
+                                stack.append((entry.path, rel, specs))
+                        elif entry.is_file(follow_symlinks=False) and not is_ignored(specs, rel, False):
+                            yield rel, entry
+                    except OSError:
+                        continue
+
+    def _load(self) -> None:
+        if not self.index_file or not self.index_file.exists():
+            return
+        files: dict[str, tuple[int, int, int, int]] = {}
+        records = 0
+        try:
+            with open(self.index_file, "rb") as f:
+                header = json.loads(f.readline())
+                if header.get("version") != INDEX_VERSION or header.get("root") != str(self.root):
+                    return
+                for line in f:
+                    record = json.loads(line)
+                    records += 1
+                    if len(record) == 1:
+                        files.pop(record[0], None)
+                        continue
+                    rel, mtime_ns, size, bits = record
+                    sig = 0
+                    if bits > 0:
+                        raw = f.read(bits // 8)
+                        if len(raw) != bits // 8:
+                            raise ValueError("truncated signature")
+                        sig = int.from_bytes(raw, "little")
+                    files[rel] = (mtime_ns, size, bits, sig)
+        except Exception as e:
+            # A torn append only loses the last records; those files are re-indexed
+            logger.warning(f"Search index {self.index_file} damaged after {records} records: {e}")
+            self._log_records = -1  # Rewrite on the next save
+        self._files = files
+        if self._log_records == 0:
+            self._log_records = records
+        logger.debug(f"Search index {self.root}: loaded {len(files)} files from {self.index_file}")
+
+    def _save(self, force: bool = False) -> None:
+        """Append pending changes to the index file, at most every SAVE_INTERVAL seconds."""
+        if not self.index_file or not self._pending:
+            return
+        now = time.monotonic()
+        if not force and self._last_save and now - self._last_save < SAVE_INTERVAL:
+            return
+        compact = (
+            self._log_records < 0
+            or not self.index_file.exists()
+            or self._log_records + len(self._pending) > 2 * len(self._files) + 1000
+        )
+        try:
+            self.index_file.parent.mkdir(parents=True, exist_ok=True)
+            if compact:
+                tmp = self.index_file.with_suffix(".tmp")
+                header = {"version": INDEX_VERSION, "root": str(self.root)}
+                with open(tmp, "wb") as f:
+                    f.write(json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n")
+                    for rel, record in self._files.items():
+                        f.write(_encode_record(rel, record))
+                os.replace(tmp, self.index_file)
+                self._log_records = len(self._files)
+            else:
+                with open(self.index_file, "ab") as f:
+                    f.write(b"".join(_encode_record(rel, rec) for rel, rec in self._pending.items()))
+                self._log_records += len(self._pending)
+        except OSError as e:
+            logger.warning(f"Failed to save search index {self.index_file}: {e}")
+            self._log_records = -1
+            return
+        self._pending.clear()
+        self._last_save = now
+
+
+def _encode_record(rel: str, record: tuple[int, int, int, int] | None) -> bytes:
+    """One index log record: [rel] for a removed file, else [rel, mtime_ns, size, bits] + signature."""
+    if record is None:
+        return json.dumps([rel], ensure_ascii=False).encode("utf-8") + b"\n"
+    mtime_ns, size, bits, sig = record
+    line = json.dumps([rel, mtime_ns, size, bits], ensure_ascii=False).encode("utf-8") + b"\n"
+    return line + sig.to_bytes(bits // 8, "little") if bits > 0 else line
+
+
+def _scan_file(
+    root: Path, rel: str, regex: re.Pattern[str], context: int, max_matches: int
+) -> tuple[str, list[tuple[int, str, bool]], int]:
+    """Grep one file. Returns (rel, [(line_no, text, is_match)], match_count)."""
+    try:
+        text = (root / rel).read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return rel, [], 0
+    lines = text.splitlines()
+    hits = [i for i, line in enumerate(lines) if regex.search(line)]
+    if not hits:
+        return rel, [], 0
+    shown: dict[int, bool] = {}
+    for i in hits[:max_matches]:
+        for j in range(max(0, i - context), min(len(lines), i + context + 1)):
+            shown[j] = shown.get(j, False) or j == i
+    out = [(j + 1, lines[j][:MAX_LINE_CHARS], is_match) for j, is_match in sorted(shown.items())]
+    return rel, out, len(hits)
+
+
+class SearchTool(Tool):
+    """Regex search over workspace files using a persistent trigram index."""
+
+    def __init__(self, root: Path, allowed_dir: Path | None = None, index_dir: Path | None = None):
+        self.root = root.expanduser().resolve()
+        self._allowed_dir = allowed_dir
+        self._index_dir = index_dir
+        self._indexes: dict[Path, TrigramIndex] = {}
+        self._indexes_lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return "search"
+
+    @property
+    def description(self) -> str:
+        return (
+            "Search file contents with a regular expression (like grep -rn, but indexed and "
+            "respecting .gitignore). Returns ranked matches with line numbers and context lines."
+        )
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "pattern": {"type": "string", "description": "Regular expression (Python syntax)"},
+                "path": {"type": "string", "description": "Directory to search (default: workspace)"},
+                "glob": {"type": "string", "description": "Only search files matching this glob, e.g. '*.py'"},
+                "context": {"type": "integer", "description": "Context lines around each match (default 2)", "minimum": 0, "maximum": 10},
+                "max_results": {"type": "integer", "description": "Maximum matches to return (default 50)", "minimum": 1, "maximum": 500},
+                "case_sensitive": {"type": "boolean", "description": "Case-sensitive match (default false)"},
+            },
+            "required": ["pattern"],
+        }
+
+    async def execute(
+        self,
+        pattern: str,
+        path: str | None = None,
+        glob: str | None = None,
+        context: int = 2,
+        max_results: int = 50,
+        case_sensitive: bool = False,
+        **kwargs: Any,
+    ) -> str:
+        try:
+            regex = re.compile(pattern, 0 if case_sensitive else re.IGNORECASE)
+        except re.error as e:
+            return f"Error: Invalid regex: {e}"
+        try:
+            base = _resolve_path(path, self._allowed_dir) if path else self.root
+        except PermissionError as e:
+            return f"Error: {e}"
+        if not base.is_dir():
+            return f"Error: Not a directory: {path}"
+        return await asyncio.to_thread(
+            self._search, base, pattern, regex, glob, context, max_results, not case_sensitive
+        )
+
+    def _get_index(self, root: Path) -> TrigramIndex:
+        with self._indexes_lock:
+            index = self._indexes.get(root)
+            if index is None:
+                from nanobot.utils.helpers import get_data_path
+                index_dir = self._index_dir or get_data_path() / "search"
+                digest = hashlib.sha1(str(root).encode("utf-8")).hexdigest()[:16]
+                index = self._indexes[root] = TrigramIndex(root, index_dir / f"{digest}.idx")
+            return index
+
+    def _search(
+        self,
+        base: Path,
+        pattern: str,
+        regex: re.Pattern[str],
+        glob: str | None,
+        context: int,
+        max_results: int,
+        ignore_case: bool,
+    ) -> str:
+        start = time.perf_counter()
+        in_root = base == self.root or self.root in base.parents
+        index_root = self.root if in_root else base
+        index = self._get_index(index_root)
+        index.refresh()
+
+        prefix = "" if base == index_root else base.relative_to(index_root).as_posix() + "/"
+        candidates = [
+            rel for rel in index.candidates(required_literals(pattern, ignore_case))
+            if rel.startswith(prefix) and (not glob or fnmatch(rel.rsplit("/", 1)[-1], glob) or fnmatch(rel, glob))
+        ]
+
+        pool = _get_search_executor()
+        futures = [pool.submit(_scan_file, index_root, rel, regex, context, max_results) for rel in candidates]
+        results = [r for r in (f.result() for f in futures) if r[2]]
+
+        def rank(item: tuple[str, list, int]) -> tuple:
+            rel, _, count = item
+            path_bonus = 10 if regex.search(rel) else 0
+            return (-(min(count, max_results) + path_bonus), rel.count("/"), rel)
+
+        results.sort(key=rank)
+        total = sum(count for _, _, count in results)
+        elapsed = (time.perf_counter() - start) * 1000
+        logger.debug(
+            f"search {pattern!r}: {len(candidates)}/{len(index)} candidate files, "
+            f"{total} matches in {len(results)} files, {elapsed:.0f} ms"
+        )
+        if not results:
+            return f"No matches for: {pattern}"
+
+        out = []
+        shown = 0
+        for rel, lines, _ in results:
+            if shown >= max_results:
+                break
+            display = (index_root / rel).relative_to(base).as_posix() if prefix else rel
+            group = []
+            for line_no, text, is_match in lines:
+                if is_match:
+                    if shown >= max_results:
+                        break
+                    shown += 1
+                group.append(f"{display}{':' if is_match else '-'}{line_no}{':' if is_match else '-'} {text}")
+            out.append("\n".join(group))
+
+        header = f"Found {total} matches in {len(results)} files"
+        if shown < total:
+            header += f" (showing {shown})"
+        return header + "\n\n" + "\n--\n".join(out)
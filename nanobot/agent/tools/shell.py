@@ -1,13 +1,240 @@
 """Shell execution tool."""
 
 import asyncio
+import codecs
+import functools
 import os
 import re
+import shlex
+import signal
+import time
+from collections import deque
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any
+from typing import Any, Awaitable, Callable
+
+from loguru import logger
 
 from nanobot.agent.tools.base import Tool
 
+if os.name != "nt":
+    import resource  # Imported up front: preexec_fn must not take the import lock after fork
+
+READ_CHUNK_SIZE = 64 * 1024
+PROGRESS_INTERVAL = 30.0  # Seconds between progress reports while a command runs
+
+# Called with (command, seconds running, output bytes so far, last output line)
+ProgressCallback = Callable[[str, float, int, str], Awaitable[None]]
+
+
+# Path extraction for restrict_to_workspace. Only absolute paths are matched,
+# so relative paths like ".venv/bin/python" don't yield "/bin/python".
+_WIN_PATH_RE = re.compile(r"[A-Za-z]:\\[^\\\"']+")
+_POSIX_PATH_RE = re.compile(r"(?:^|[\s|>])(/[^\s\"'>]+)")
+
+
+class _PatternSet:
+    """Several regexes searched as one: a single alternation when they can be combined safely."""
+
+    def __init__(self, patterns: tuple[str, ...]):
+        self._combined: re.Pattern[str] | None = None
+        self._each: list[re.Pattern[str]] = []
+        # Backreferences and global inline flags change meaning inside an alternation
+        if not any(re.search(r"\\[1-9]|\(\?P=|^\(\?[aiLmsux]+\)", p) for p in patterns):
+            # CPython's re doesn't factor alternations, so hoist the common
+            # leading word boundary to avoid retrying every branch at every position.
+            bounded = [p[2:] for p in patterns if p.startswith("\\b")]
+            parts = [f"(?:{p})" for p in patterns if not p.startswith("\\b")]
+            if bounded:
+                parts.insert(0, "\\b(?:" + "|".join(f"(?:{p})" for p in bounded) + ")")
+            try:
+                self._combined = re.compile("|".join(parts))
+            except re.error:
+                self._combined = None
+        if self._combined is None:
+            self._each = [re.compile(p) for p in patterns]
+
+    def search(self, text: str) -> bool:
+        if self._combined is not None:
+            return self._combined.search(text) is not None
+        return any(p.search(text) for p in self._each)
+
+
+@functools.lru_cache(maxsize=64)
+def _compile_patterns(patterns: tuple[str, ...]) -> _PatternSet:
+    return _PatternSet(patterns)
+
+
+class OutputCapture:
+    """
+    Bounded capture of a process output stream.
+
+    Keeps the first ``head_chars`` and the last ``tail_chars`` characters,
+    decoding UTF-8 incrementally so multi-byte characters split across reads
+    survive. Memory use is constant no matter how much the process prints.
+    """
+
+    def __init__(self, head_chars: int, tail_chars: int):
+        self.head_chars = head_chars
+        self.tail_chars = tail_chars
+        self.total_bytes = 0
+        self.total_chars = 0
+        self.last_line = ""
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._head: list[str] = []
+        self._head_len = 0
+        self._tail: deque[str] = deque()
+        self._tail_len = 0
+
+    def feed(self, data: bytes, final: bool = False) -> None:
+        self.total_bytes += len(data)
+        text = self._decoder.decode(data, final)
+        if not text:
+            return
+        self.total_chars += len(text)
+        lines = text.rstrip("\n").rsplit("\n", 1)
+        if lines[-1]:
+            self.last_line = lines[-1][-200:]
+
+        room = self.head_chars - self._head_len
+        if room > 0:
+            self._head.append(text[:room])
+            self._head_len += min(room, len(text))
+            text = text[room:]
+        if not text:
+            return
+        self._tail.append(text)
+        self._tail_len += len(text)
+        while self._tail_len - len(self._tail[0]) >= self.tail_chars:
+            self._tail_len -= len(self._tail.popleft())
+
+    def finish(self) -> None:
+        self.feed(b"", final=True)
+
+    @property
+    def omitted_chars(self) -> int:
+        return max(self.total_chars - self.head_chars - self.tail_chars, 0)
+
+    def text(self) -> str:
+        head = "".join(self._head)
+        tail = "".join(self._tail)
+        if self.omitted_chars:
+            tail = tail[-self.tail_chars:]
+            return f"{head}\n... ({self.omitted_chars} chars omitted) ...\n{tail}"
+        return head + tail
+
+
+def kill_process_group(process: asyncio.subprocess.Process) -> None:
+    """SIGKILL a process started with start_new_session, including all its children."""
+    if process.returncode is not None:
+        return
+    try:
+        if os.name != "nt":
+            os.killpg(process.pid, signal.SIGKILL)
+            return
+    except (ProcessLookupError, PermissionError):
+        pass
+    try:
+        process.kill()
+    except ProcessLookupError:
+        pass
+
+
+def format_progress(command: str, elapsed: float, output_bytes: int, last_line: str) -> str:
+    """Chat-friendly progress note for a long-running exec command."""
+    shown = command if len(command) <= 60 else command[:57] + "..."
+    note = f"⏳ Still running `{shown}` ({elapsed:.0f}s, {output_bytes} bytes of output)"
+    return f"{note}\n{last_line}" if last_line else note
+
+
+class ExecScheduler:
+    """
+    Admission control and resource limits for exec subprocesses.
+
+    At most ``max_concurrent`` commands run at once overall and
+    ``max_per_session`` per agent session; further commands wait in FIFO
+    order. Each process gets the configured rlimits (0 = unlimited), applied
+    in the child before exec. One scheduler is shared by the agent and its
+    subagents.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 4,
+        max_per_session: int = 2,
+        cpu_seconds: int = 0,
+        memory_mb: int = 0,
+        max_open_files: int = 0,
+        max_file_size_mb: int = 0,
+        max_output_bytes: int = 0,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_per_session = max_per_session
+        self.max_output_bytes = max_output_bytes
+        # (resource.RLIMIT_* constant, soft limit) pairs, resolved before any fork
+        self._limits: list[tuple[int, int]] = []
+        if os.name != "nt":
+            self._limits = [
+                (getattr(resource, name), value) for name, value in (
+                    ("RLIMIT_CPU", cpu_seconds),
+                    ("RLIMIT_AS", memory_mb * 1024 * 1024),
+                    ("RLIMIT_NOFILE", max_open_files),
+                    ("RLIMIT_FSIZE", max_file_size_mb * 1024 * 1024),
+                ) if value > 0 and hasattr(resource, name)
+            ]
+        self._global = asyncio.Semaphore(max_concurrent)
+        # Per-session semaphores and how many commands hold or wait on each; dropped when idle
+        self._sessions: dict[str, asyncio.Semaphore] = {}
+        self._session_users: dict[str, int] = {}
+        self.running = 0
+        self.waiting = 0
+
+    @asynccontextmanager
+    async def slot(self, session_key: str):
+        """Wait for a free slot for session_key and hold it for the duration of the block."""
+        session_sem = self._sessions.get(session_key)
+        if session_sem is None:
+            session_sem = self._sessions[session_key] = asyncio.Semaphore(self.max_per_session)
+        self._session_users[session_key] = self._session_users.get(session_key, 0) + 1
+        start = time.monotonic()
+        self.waiting += 1
+        admitted = False
+        try:
+            async with session_sem, self._global:
+                self.waiting -= 1
+                admitted = True
+                waited = time.monotonic() - start
+                if waited > 0.1:
+                    logger.debug(f"exec: waited {waited:.1f}s for a process slot ({session_key})")
+                self.running += 1
+                try:
+                    yield
+                finally:
+                    self.running -= 1
+        finally:
+            if not admitted:
+                self.waiting -= 1
+            self._session_users[session_key] -= 1
+            if not self._session_users[session_key]:
+                del self._session_users[session_key], self._sessions[session_key]
+
+    def popen_kwargs(self) -> dict[str, Any]:
+        """Extra subprocess arguments: own process group and (on POSIX) rlimits."""
+        if os.name == "nt":
+            return {}
+        kwargs: dict[str, Any] = {"start_new_session": True}
+        if self._limits:
+            kwargs["preexec_fn"] = self._apply_limits
+        return kwargs
+
+    def _apply_limits(self) -> None:
+        """Runs in the forked child before exec, so it only makes rlimit calls (no imports)."""
+        for limit, value in self._limits:
+            _, hard = resource.getrlimit(limit)
+            if hard != resource.RLIM_INFINITY:
+                value = min(value, hard)
+            resource.setrlimit(limit, (value, hard))
+
 
 class ExecTool(Tool):
     """Tool to execute shell commands."""
@@ -19,8 +246,23 @@ class ExecTool(Tool):
         deny_patterns: list[str] | None = None,
         allow_patterns: list[str] | None = None,
         restrict_to_workspace: bool = False,
+        max_output: int = 10000,
+        progress_callback: ProgressCallback | None = None,
+        progress_interval: float = PROGRESS_INTERVAL,
+        persistent: bool = False,
+        idle_timeout: int = 600,
+        scheduler: ExecScheduler | None = None,
     ):
         self.timeout = timeout
+        self.scheduler = scheduler or ExecScheduler()
+        self.max_output = max_output
+        self.progress_callback = progress_callback
+        self.progress_interval = progress_interval
+        # Persistent mode keeps one shell per agent session (not supported on Windows)
+        self.persistent = persistent and os.name != "nt"
+        self.idle_timeout = idle_timeout
+        self._session_key = "default"
+        self._shells = None
         self.working_dir = working_dir
         self.deny_patterns = deny_patterns or [
             r"\brm\s+-[rf]{1,2}\b",          # rm -r, rm -rf, rm -fr
@@ -41,7 +283,22 @@ class ExecTool(Tool):
     
     @property
     def description(self) -> str:
-        return "Execute a shell command and return its output. Use with caution."
+        desc = "Execute a shell command and return its output. Use with caution."
+        if self.persistent:
+            desc += (
+                " Commands run in a persistent shell for this conversation: the current directory, "
+                "environment variables and activated virtualenvs carry over between calls."
+            )
+        return desc
+
+    def set_context(self, session_key: str) -> None:
+        """Set the agent session whose persistent shell subsequent commands use."""
+        self._session_key = session_key
+
+    async def close(self) -> None:
+        """Close persistent shells."""
+        if self._shells:
+            await self._shells.close()
     
     @property
     def parameters(self) -> dict[str, Any]:
@@ -65,89 +322,180 @@ class ExecTool(Tool):
         guard_error = self._guard_command(command, cwd)
         if guard_error:
             return guard_error
-        
+        async with self.scheduler.slot(self._session_key):
+            if self.persistent:
+                return await self._execute_persistent(command, working_dir)
+            return await self._execute_once(command, cwd)
+
+    async def _execute_once(self, command: str, cwd: str) -> str:
         try:
             process = await asyncio.create_subprocess_shell(
                 command,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
                 cwd=cwd,
+                **self.scheduler.popen_kwargs(),
             )
+            stdout = OutputCapture(self.max_output // 2, self.max_output // 2)
+            stderr = OutputCapture(self.max_output // 4, self.max_output // 4)
             
             try:
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(),
-                    timeout=self.timeout
-                )
+                async with self._progress(command, stdout, stderr):
+                    await asyncio.wait_for(
+                        self._collect(process, stdout, stderr),
+                        timeout=self.timeout
+                    )
             except asyncio.TimeoutError:
-                process.kill()
-                return f"Error: Command timed out after {self.timeout} seconds"
-            
-            output_parts = []
-            
-            if stdout:
-                try:
-                    output_parts.append(stdout.decode("utf-8"))
-                except UnicodeDecodeError:
-                    # Fallback for Windows console (often cp950/mbcs)
-                    try:
-                        output_parts.append(stdout.decode("mbcs" if os.name == "nt" else "latin-1", errors="replace"))
-                    except Exception:
-                         output_parts.append(stdout.decode("utf-8", errors="replace"))
-            
-            if stderr:
-                try:
-                    stderr_text = stderr.decode("utf-8")
-                except UnicodeDecodeError:
-                    try:
-                         stderr_text = stderr.decode("mbcs" if os.name == "nt" else "latin-1", errors="replace")
-                    except Exception:
-                        stderr_text = stderr.decode("utf-8", errors="replace")
-                
-                if stderr_text.strip():
-                    output_parts.append(f"STDERR:\n{stderr_text}")
-            
-            if process.returncode != 0:
-                output_parts.append(f"\nExit code: {process.returncode}")
-            
-            result = "\n".join(output_parts) if output_parts else "(no output)"
-            
-            # Truncate very long output
-            max_len = 10000
-            if len(result) > max_len:
-                result = result[:max_len] + f"\n... (truncated, {len(result) - max_len} more chars)"
+                kill_process_group(process)
+                await process.wait()
+                partial = self._format_output(stdout, stderr, None)
+                return f"Error: Command timed out after {self.timeout} seconds\n{partial}"
             
+            result = self._format_output(stdout, stderr, process.returncode)
+            limit = self.scheduler.max_output_bytes
+            if limit and stdout.total_bytes + stderr.total_bytes > limit:
+                result += f"\n[process killed: output exceeded {limit} bytes]"
             return result
             
         except Exception as e:
             return f"Error executing command: {str(e)}"
 
+    async def _execute_persistent(self, command: str, working_dir: str | None) -> str:
+        from nanobot.agent.tools.shell_session import (
+            OutputLimitError,
+            ShellExitedError,
+            ShellSessionPool,
+        )
+
+        if self._shells is None:
+            self._shells = ShellSessionPool(
+                idle_timeout=self.idle_timeout, popen_kwargs=self.scheduler.popen_kwargs()
+            )
+        shell = self._shells.get(self._session_key, self.working_dir or os.getcwd())
+        if working_dir:
+            command = f"cd {shlex.quote(working_dir)} && {command}"
+        stdout = OutputCapture(self.max_output // 2, self.max_output // 2)
+        stderr = OutputCapture(self.max_output // 4, self.max_output // 4)
+        limit = self.scheduler.max_output_bytes
+        try:
+            async with self._progress(command, stdout, stderr):
+                returncode = await shell.run(command, stdout, stderr, self.timeout, limit)
+        except asyncio.TimeoutError:
+            partial = self._format_output(stdout, stderr, None)
+            return (
+                f"Error: Command timed out after {self.timeout} seconds "
+                f"(the persistent shell was restarted; cwd and environment were reset)\n{partial}"
+            )
+        except OutputLimitError:
+            partial = self._format_output(stdout, stderr, None)
+            return (
+                f"{partial}\n[process killed: output exceeded {limit} bytes; "
+                "the persistent shell was restarted, cwd and environment were reset]"
+            )
+        except ShellExitedError:
+            partial = self._format_output(stdout, stderr, None)
+            return f"{partial}\n[shell exited; a new shell will be started for the next command]"
+        except Exception as e:
+            return f"Error executing command: {str(e)}"
+        return self._format_output(stdout, stderr, returncode)
+
+    @asynccontextmanager
+    async def _progress(self, command: str, stdout: OutputCapture, stderr: OutputCapture):
+        """Report progress every progress_interval seconds while the block runs, output or not."""
+        if not self.progress_callback or self.progress_interval <= 0:
+            yield
+            return
+        start = time.monotonic()
+
+        async def report() -> None:
+            while True:
+                await asyncio.sleep(self.progress_interval)
+                try:
+                    await self.progress_callback(
+                        command,
+                        time.monotonic() - start,
+                        stdout.total_bytes + stderr.total_bytes,
+                        stdout.last_line or stderr.last_line,
+                    )
+                except Exception as e:
+                    logger.warning(f"exec progress callback failed: {e}")
+
+        task = asyncio.create_task(report())
+        try:
+            yield
+        finally:
+            task.cancel()
+
+    async def _collect(
+        self,
+        process: asyncio.subprocess.Process,
+        stdout: OutputCapture,
+        stderr: OutputCapture,
+    ) -> None:
+        """Drain stdout/stderr into bounded captures until the process exits."""
+        start = time.monotonic()
+
+        async def pump(stream: asyncio.StreamReader | None, capture: OutputCapture) -> None:
+            if stream is None:
+                return
+            limit = self.scheduler.max_output_bytes
+            while chunk := await stream.read(READ_CHUNK_SIZE):
+                capture.feed(chunk)
+                if limit and stdout.total_bytes + stderr.total_bytes > limit:
+                    kill_process_group(process)
+            capture.finish()
+
+        await asyncio.gather(pump(process.stdout, stdout), pump(process.stderr, stderr))
+        await process.wait()
+        logger.debug(
+            f"exec: {stdout.total_bytes + stderr.total_bytes} output bytes in "
+            f"{time.monotonic() - start:.2f}s (exit {process.returncode})"
+        )
+
+    def _format_output(self, stdout: OutputCapture, stderr: OutputCapture, returncode: int | None) -> str:
+        output_parts = []
+        
+        if stdout.total_bytes:
+            output_parts.append(stdout.text())
+        
+        stderr_text = stderr.text()
+        if stderr_text.strip():
+            output_parts.append(f"STDERR:\n{stderr_text}")
+        
+        if returncode:
+            output_parts.append(f"\nExit code: {returncode}")
+        
+        result = "\n".join(output_parts) if output_parts else "(no output)"
+        if stdout.omitted_chars or stderr.omitted_chars:
+            result += f"\n[output: {stdout.total_bytes + stderr.total_bytes} bytes total, middle omitted]"
+        return result
+
     def _guard_command(self, command: str, cwd: str) -> str | None:
         """Best-effort safety guard for potentially destructive commands."""
         cmd = command.strip()
         lower = cmd.lower()
 
-        for pattern in self.deny_patterns:
-            if re.search(pattern, lower):
-                return "Error: Command blocked by safety guard (dangerous pattern detected)"
+        if self.deny_patterns and _compile_patterns(tuple(self.deny_patterns)).search(lower):
+            return "Error: Command blocked by safety guard (dangerous pattern detected)"
 
         if self.allow_patterns:
-            if not any(re.search(p, lower) for p in self.allow_patterns):
+            if not _compile_patterns(tuple(self.allow_patterns)).search(lower):
                 return "Error: Command blocked by safety guard (not in allowlist)"
 
         if self.restrict_to_workspace:
             if "..\\" in cmd or "../" in cmd:
                 return "Error: Command blocked by safety guard (path traversal detected)"
 
+            # Resolved on every command: a cached result would miss symlinks swapped since
             cwd_path = Path(cwd).resolve()
 
-            win_paths = re.findall(r"[A-Za-z]:\\[^\\\"']+", cmd)
-            # Only match absolute paths — avoid false positives on relative
-            # paths like ".venv/bin/python" where "/bin/python" would be
-            # incorrectly extracted by the old pattern.
-            posix_paths = re.findall(r"(?:^|[\s|>])(/[^\s\"'>]+)", cmd)
+            candidates: list[str] = []
+            if ":\\" in cmd:
+                candidates += _WIN_PATH_RE.findall(cmd)
+            if "/" in cmd:
+                candidates += _POSIX_PATH_RE.findall(cmd)
 
-            for raw in win_paths + posix_paths:
+            for raw in set(candidates):
                 try:
                     p = Path(raw.strip()).resolve()
                 except Exception:
@@ -156,3 +504,4 @@ class ExecTool(Tool):
                     return "Error: Command blocked by safety guard (path outside working dir)"
 
         return None
+
@@ -0,0 +1,213 @@
+"""Long-lived shell processes for the exec tool's persistent mode."""
+
+import asyncio
+import shlex
+import shutil
+import time
+import uuid
+from typing import Any, Callable
+
+from loguru import logger
+
+from nanobot.agent.tools.shell import READ_CHUNK_SIZE, OutputCapture, kill_process_group
+
+
+class ShellExitedError(Exception):
+    """The shell process ended while a command was running."""
+
+
+class OutputLimitError(Exception):
+    """A command printed more than the output byte cap; the shell was killed."""
+
+
+async def _read_until(
+    stream: asyncio.StreamReader,
+    sentinel: bytes,
+    capture: OutputCapture,
+    check: Callable[[], None] | None = None,
+) -> bytes:
+    """Feed stream into capture up to sentinel; return what was read after it."""
+    buf = b""
+    keep = len(sentinel) - 1
+    while True:
+        chunk = await stream.read(READ_CHUNK_SIZE)
+        if not chunk:
+            capture.feed(buf)
+            raise ShellExitedError()
+        buf += chunk
+        idx = buf.find(sentinel)
+        if idx >= 0:
+            capture.feed(buf[:idx])
+            return buf[idx + len(sentinel):]
+        # Hold back a possible partial sentinel at the end of the buffer
+        capture.feed(buf[:-keep])
+        buf = buf[-keep:]
+        if check:
+            check()
+
+
+class ShellSession:
+    """
+    One shell process that runs commands sequentially and keeps its state.
+
+    Each command is run through ``eval`` (so syntax errors do not kill the
+    shell) and followed by a unique marker on stdout (with the exit code)
+    and stderr, which delimits that command's output.
+    """
+
+    def __init__(self, cwd: str, shell: str | None = None, popen_kwargs: dict[str, Any] | None = None):
+        self.cwd = cwd
+        self.shell = shell or shutil.which("bash") or "/bin/sh"
+        # start_new_session is always set so timeouts can kill the whole process group
+        self.popen_kwargs = {**(popen_kwargs or {}), "start_new_session": True}
+        self.last_used = time.monotonic()
+        self._process: asyncio.subprocess.Process | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.returncode is None
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    async def start(self) -> None:
+        args = [self.shell, "--noprofile", "--norc"] if self.shell.endswith("bash") else [self.shell]
+        self._process = await asyncio.create_subprocess_exec(
+            *args,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=self.cwd,
+            **self.popen_kwargs,
+        )
+        logger.debug(f"Started persistent shell {self.shell} (pid {self._process.pid}) in {self.cwd}")
+
+    async def run(
+        self,
+        command: str,
+        stdout: OutputCapture,
+        stderr: OutputCapture,
+        timeout: float,
+        max_output_bytes: int = 0,
+    ) -> int:
+        """
+        Run one command.
+
+        Raises asyncio.TimeoutError or OutputLimitError (the shell is killed in
+        both cases), or ShellExitedError.
+        """
+
+        def check_output() -> None:
+            if stdout.total_bytes + stderr.total_bytes > max_output_bytes:
+                raise OutputLimitError()
+
+        check = check_output if max_output_bytes else None
+        async with self._lock:
+            if not self.alive:
+                await self.start()
+            process = self._process
+            marker = f"__NANOBOT_{uuid.uuid4().hex}__"
+            script = (
+                f"eval {shlex.quote(command)} < /dev/null\n"
+                f"__nanobot_rc=$?\n"
+                f"printf '\\n{marker} %d\\n' \"$__nanobot_rc\"\n"
+                f"printf '\\n{marker}\\n' >&2\n"
+            )
+            sentinel = f"\n{marker}".encode()
+            readers: list[asyncio.Future] = []
+            try:
+                process.stdin.write(script.encode())
+                await process.stdin.drain()
+
+                async def read_stdout() -> int:
+                    rest = await _read_until(process.stdout, sentinel, stdout, check)
+                    while b"\n" not in rest:
+                        chunk = await process.stdout.read(READ_CHUNK_SIZE)
+                        if not chunk:
+                            raise ShellExitedError()
+                        rest += chunk
+                    return int(rest.split(b"\n", 1)[0].strip() or 0)
+
+                readers = [
+                    asyncio.ensure_future(read_stdout()),
+                    asyncio.ensure_future(_read_until(process.stderr, sentinel + b"\n", stderr, check)),
+                ]
+                returncode, _ = await asyncio.wait_for(asyncio.gather(*readers), timeout=timeout)
+                return returncode
+            except (
+                asyncio.TimeoutError, OutputLimitError, ShellExitedError, BrokenPipeError, ConnectionResetError
+            ) as e:
+                for reader in readers:  # gather leaves the other reader running when one fails
+                    reader.cancel()
+                await asyncio.gather(*readers, return_exceptions=True)
+                await self._kill()
+                if isinstance(e, (asyncio.TimeoutError, OutputLimitError)):
+                    raise
+                raise ShellExitedError() from e
+            finally:
+                stdout.finish()
+                stderr.finish()
+                self.last_used = time.monotonic()
+
+    async def close(self) -> None:
+        async with self._lock:
+            await self._kill()
+
+    async def _kill(self) -> None:
+        process, self._process = self._process, None
+        if process is None or process.returncode is not None:
+            return
+        kill_process_group(process)
+        for stream in (process.stdout, process.stderr):
+            # Unread output keeps the pipe paused, and wait() only returns once pipes close
+            while stream and await stream.read(READ_CHUNK_SIZE):
+                pass
+        await process.wait()
+
+
+class ShellSessionPool:
+    """Persistent shells keyed by agent session, closed after idle_timeout seconds unused."""
+
+    def __init__(self, idle_timeout: float = 600, popen_kwargs: dict[str, Any] | None = None):
+        self.idle_timeout = idle_timeout
+        self.popen_kwargs = popen_kwargs
+        self._sessions: dict[str, ShellSession] = {}
+        self._reaper: asyncio.Task | None = None
+
+    def get(self, key: str, cwd: str) -> ShellSession:
+        session = self._sessions.get(key)
+        if session is None:
+            session = self._sessions[key] = ShellSession(cwd, popen_kwargs=self.popen_kwargs)
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_loop())
+        return session
+
+    async def reap(self) -> int:
+        """Close shells idle for longer than idle_timeout; returns how many were closed."""
+        now = time.monotonic()
+        expired = [
+            key for key, s in self._sessions.items()
+            if not s.busy and now - s.last_used > self.idle_timeout
+        ]
+        for key in expired:
+            await self._sessions.pop(key).close()
+        if expired:
+            logger.debug(f"Reaped {len(expired)} idle persistent shell(s)")
+        return len(expired)
+
+    async def close(self, key: str | None = None) -> None:
+        """Close one session's shell, or all of them."""
+        keys = [key] if key is not None else list(self._sessions)
+        for k in keys:
+            if session := self._sessions.pop(k, None):
+                await session.close()
+        if not self._sessions and self._reaper:
+            self._reaper.cancel()
+            self._reaper = None
+
+    async def _reap_loop(self) -> None:
+        while self._sessions:
+            await asyncio.sleep(max(self.idle_timeout / 2, 1))
+            await self.reap()
@@ -0,0 +1,418 @@
+"""
+JSON-schema validators for tool parameters, compiled once per schema.
+
+``compile_schema`` turns a schema into a closure that only does the checks
+the schema actually declares; labels are built at compile time. Array item
+paths carry an index placeholder that is filled in only when an item has
+errors, so valid calls build no strings at all.
+
+Supported: type (including type lists and "null"), enum, const, minimum,
+maximum, exclusiveMinimum, exclusiveMaximum, minLength, maxLength, pattern,
+properties, required, additionalProperties, minItems, maxItems, items,
+anyOf, oneOf, allOf and local $ref (#/$defs/..., #/definitions/...).
+Other keywords are ignored. ``compile_defaults`` compiles the "default"
+keywords separately, to be applied once params are known to be valid.
+"""
+
+import copy
+import re
+from typing import Any, Callable, Sequence
+
+# Returns the error messages for a value; an empty sequence means valid
+Validator = Callable[[Any], Sequence[str]]
+# Fills declared defaults into a value that already passed validation
+Filler = Callable[[Any], None]
+
+TYPE_MAP: dict[str, type | tuple[type, ...]] = {
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "array": list,
+    "object": dict,
+    "null": type(None),
+}
+
+# Stand for an array index / additional property name in a compiled path until a value fails
+_INDEX = "\x00"
+_KEY = "\x01"
+_IMMUTABLE = (str, int, float, bool, type(None))
+_OK: tuple[str, ...] = ()
+
+
+def _valid(val: Any) -> Sequence[str]:
+    return _OK
+
+
+def _child(path: str, key: str) -> str:
+    return f"{path}.{key}" if path else key
+
+
+def _fill_index(errors: Sequence[str], i: int) -> list[str]:
+    # Deeper arrays have already filled theirs, so this array's placeholder is the last one
+    out = []
+    for e in errors:
+        head, sep, tail = e.rpartition(_INDEX)
+        out.append(f"{head}{i}{tail}" if sep else e)
+    return out
+
+
+class _Compiler:
+    def __init__(self, root: dict[str, Any]):
+        self.root = root
+        self._active: set[str] = set()  # $refs being compiled, to detect recursion
+
+    def compile(self, schema: Any, path: str) -> Validator:
+        if not isinstance(schema, dict):
+            return _valid
+        if isinstance(ref := schema.get("$ref"), str):
+            return self._ref(ref, path)
+
+        label = path or "parameter"
+        t = schema.get("type")
+        declared = [t] if isinstance(t, str) else t if isinstance(t, list) else []
+        types = [x for x in declared if isinstance(x, str) and x in TYPE_MAP]
+
+        checks: list[Validator] = []
+        if "enum" in schema:
+            enum, enum_error = schema["enum"], (f"{label} must be one of {schema['enum']}",)
+            checks.append(lambda val: _OK if val in enum else enum_error)
+        if "const" in schema:
+            const, const_error = schema["const"], (f"{label} must be {schema['const']!r}",)
+            checks.append(lambda val: _OK if val == const else const_error)
+        if "integer" in types or "number" in types:
+            checks.extend(self._bounds(schema, label))
+        if "string" in types:
+            checks.extend(self._string(schema, label))
+        if "object" in types and (check := self._object(schema, path)) is not None:
+            checks.append(check)
+        if "array" in types:
+            checks.extend(self._array(schema, path, label))
+        for key in ("anyOf", "oneOf", "allOf"):
+            if isinstance(schema.get(key), list) and schema[key]:
+                checks.append(self._combinator(key, schema[key], path, label))
+
+        if not types:
+            return _all(checks)
+        py_types = tuple({k for x in types for k in _flat(TYPE_MAP[x])})
+        type_error = (f"{label} should be {' or '.join(types)}",)
+        if len(types) > 1:
+            # e.g. ["string", "null"]: keyword checks only apply to values of their own type
+            checks = [_guarded(c, py_types) for c in checks]
+        if not checks:
+            return lambda val: _OK if isinstance(val, py_types) else type_error
+        check = _all(checks)
+        return lambda val: check(val) if isinstance(val, py_types) else type_error
+
+    def _ref(self, ref: str, path: str) -> Validator:
+        target = _resolve_ref(self.root, ref)
+        if target is None:
+            return _valid  # Remote or malformed refs are not followed
+        if ref in self._active:
+            # Recursive schema: compile the next level on first use, so only as deep as the data goes
+            compiled: list[Validator] = []
+
+            def lazy(val: Any) -> Sequence[str]:
+                if not compiled:
+                    compiled.append(_Compiler(self.root).compile(target, path))
+                return compiled[0](val)
+
+            return lazy
+        self._active.add(ref)
+        try:
+            return self.compile(target, path)
+        finally:
+            self._active.discard(ref)
+
+    @staticmethod
+    def _bounds(schema: dict[str, Any], label: str) -> list[Validator]:
+        checks = []
+        if "minimum" in schema:
+            lo, lo_error = schema["minimum"], (f"{label} must be >= {schema['minimum']}",)
+            checks.append(lambda val: lo_error if val < lo else _OK)
+        if "maximum" in schema:
+            hi, hi_error = schema["maximum"], (f"{label} must be <= {schema['maximum']}",)
+            checks.append(lambda val: hi_error if val > hi else _OK)
+        if _is_number(schema.get("exclusiveMinimum")):
+            xlo, xlo_error = schema["exclusiveMinimum"], (f"{label} must be > {schema['exclusiveMinimum']}",)
+            checks.append(lambda val: xlo_error if val <= xlo else _OK)
+        if _is_number(schema.get("exclusiveMaximum")):
+            xhi, xhi_error = schema["exclusiveMaximum"], (f"{label} must be < {schema['exclusiveMaximum']}",)
+            checks.append(lambda val: xhi_error if val >= xhi else _OK)
+        return checks
+
+    @staticmethod
+    def _string(schema: dict[str, Any], label: str) -> list[Validator]:
+        checks = []
+        if "minLength" in schema:
+            lo, lo_error = schema["minLength"], (f"{label} must be at least {schema['minLength']} chars",)
+            checks.append(lambda val: lo_error if len(val) < lo else _OK)
+        if "maxLength" in schema:
+            hi, hi_error = schema["maxLength"], (f"{label} must be at most {schema['maxLength']} chars",)
+            checks.append(lambda val: hi_error if len(val) > hi else _OK)
+        if isinstance(schema.get("pattern"), str):
+            try:
+                search = re.compile(schema["pattern"]).search
+            except re.error:
+                search = None  # Not a Python regex (e.g. \p{L}); skip rather than reject every call
+            if search is not None:
+                re_error = (f"{label} must match pattern {schema['pattern']}",)
+                checks.append(lambda val: _OK if search(val) else re_error)
+        return checks
+
+    def _object(self, schema: dict[str, Any], path: str) -> Validator | None:
+        props = schema.get("properties") if isinstance(schema.get("properties"), dict) else {}
+        required = [k for k in schema.get("required", []) if isinstance(k, str)]
+        missing = [(k, f"missing required {_child(path, k)}") for k in required]
+        prop_checks = {k: v for k, s in props.items() if (v := self.compile(s, _child(path, k))) is not _valid}
+        extra = schema.get("additionalProperties", True)
+        reject = extra is False
+        extra_check = self.compile(extra, _child(path, _KEY)) if isinstance(extra, dict) else _valid
+        if not (missing or prop_checks or reject or extra_check is not _valid):
+            return None
+        get_check = prop_checks.get
+        open_props = not reject and extra_check is _valid
+
+        def check_object(val: dict) -> Sequence[str]:
+            errors = None
+            for k, msg in missing:
+                if k not in val:
+                    errors = errors or []
+                    errors.append(msg)
+            for k, v in val.items():
+                if (check := get_check(k)) is not None:
+                    if found := check(v):
+                        errors = errors or []
+                        errors.extend(found)
+                elif open_props or k in props:
+                    continue
+                elif reject:
+                    errors = errors or []
+                    errors.append(f"unexpected parameter {_child(path, k)}")
+                elif found := extra_check(v):
+                    errors = errors or []
+                    errors.extend(e.replace(_KEY, k, 1) for e in found)
+            return errors or _OK
+
+        return check_object
+
+    def _array(self, schema: dict[str, Any], path: str, label: str) -> list[Validator]:
+        checks = []
+        if "minItems" in schema:
+            lo, lo_error = schema["minItems"], (f"{label} must have at least {schema['minItems']} items",)
+            checks.append(lambda val: lo_error if len(val) < lo else _OK)
+        if "maxItems" in schema:
+            hi, hi_error = schema["maxItems"], (f"{label} must have at most {schema['maxItems']} items",)
+            checks.append(lambda val: hi_error if len(val) > hi else _OK)
+        if isinstance(schema.get("items"), dict):
+            item = self.compile(schema["items"], f"{path}[{_INDEX}]")
+            if item is not _valid:
+                def check_items(val: list) -> Sequence[str]:
+                    errors = None
+                    for i, v in enumerate(val):
+                        if found := item(v):
+                            errors = errors or []
+                            errors.extend(_fill_index(found, i))
+                    return errors or _OK
+
+                checks.append(check_items)
+        return checks
+
+    def _combinator(self, key: str, subschemas: list, path: str, label: str) -> Validator:
+        subs = [self.compile(s, path) for s in subschemas]
+        if key == "allOf":
+            return _all(subs)
+        none_error = (f"{label} does not match any of the allowed schemas",)
+        if key == "anyOf":
+            def any_of(val: Any) -> Sequence[str]:
+                first = None
+                for s in subs:
+                    if not (errors := s(val)):
+                        return _OK
+                    first = first or errors
+                return first if len(subs) == 1 else none_error
+
+            return any_of
+        many_error = (f"{label} matches more than one of the allowed schemas",)
+
+        def one_of(val: Any) -> Sequence[str]:
+            matched = 0
+            first = None
+            for s in subs:
+                if errors := s(val):
+                    first = first or errors
+                else:
+                    matched += 1
+            if matched == 1:
+                return _OK
+            if matched > 1:
+                return many_error
+            return first if len(subs) == 1 else none_error
+
+        return one_of
+
+
+class _DefaultsCompiler:
+    """Compiles the fillers that apply declared defaults to already validated params."""
+
+    def __init__(self, root: dict[str, Any]):
+        self.root = root
+        self._active: set[str] = set()
+
+    def compile(self, schema: Any) -> Filler | None:
+        """Filler for values of schema, or None when nothing below it declares a default."""
+        if not isinstance(schema, dict):
+            return None
+        if isinstance(ref := schema.get("$ref"), str):
+            return self._ref(ref)
+
+        fillers: list[Filler] = []
+        if (fill := self._object(schema)) is not None:
+            fillers.append(fill)
+        if (item := self.compile(schema.get("items"))) is not None:
+            def fill_items(val: Any) -> None:
+                if isinstance(val, list):
+                    for v in val:
+                        item(v)
+
+            fillers.append(fill_items)
+        for key in ("anyOf", "oneOf"):
+            if isinstance(schema.get(key), list) and (fill := self._choice(schema[key])) is not None:
+                fillers.append(fill)
+        if isinstance(schema.get("allOf"), list):
+            fillers.extend(f for s in schema["allOf"] if (f := self.compile(s)) is not None)
+
+        if not fillers:
+            return None
+        if len(fillers) == 1:
+            return fillers[0]
+
+        def fill_all(val: Any) -> None:
+            for f in fillers:
+                f(val)
+
+        return fill_all
+
+    def _ref(self, ref: str) -> Filler | None:
+        target = _resolve_ref(self.root, ref)
+        if target is None:
+            return None
+        if ref in self._active:
+            compiled: list[Filler | None] = []
+
+            def lazy(val: Any) -> None:
+                if not compiled:
+                    compiled.append(_DefaultsCompiler(self.root).compile(target))
+                if compiled[0] is not None:
+                    compiled[0](val)
+
+            return lazy
+        self._active.add(ref)
+        try:
+            return self.compile(target)
+        finally:
+            self._active.discard(ref)
+
+    def _object(self, schema: dict[str, Any]) -> Filler | None:
+        props = schema.get("properties") if isinstance(schema.get("properties"), dict) else {}
+        required = set(schema.get("required") or ())
+        own = [
+            (k, s["default"]) for k, s in props.items()
+            if isinstance(s, dict) and "default" in s and k not in required
+        ]
+        nested = [(k, f) for k, s in props.items() if (f := self.compile(s)) is not None]
+        if not (own or nested):
+            return None
+
+        def fill_object(val: Any) -> None:
+            if not isinstance(val, dict):
+                return
+            for k, d in own:
+                if k not in val:
+                    val[k] = d if isinstance(d, _IMMUTABLE) else copy.deepcopy(d)
+            for k, f in nested:
+                if k in val:
+                    f(val[k])
+
+        return fill_object
+
+    def _choice(self, subschemas: list) -> Filler | None:
+        """Apply the defaults of the first branch the value matches."""
+        branches = [(self.compile(s), s) for s in subschemas]
+        if all(f is None for f, _ in branches):
+            return None
+        checks = [(_Compiler(self.root).compile(s, ""), f) for f, s in branches]
+
+        def fill_choice(val: Any) -> None:
+            for check, f in checks:
+                if not check(val):
+                    if f is not None:
+                        f(val)
+                    return
+
+        return fill_choice
+
+
+def _resolve_ref(root: dict[str, Any], ref: str) -> dict[str, Any] | None:
+    """Target of a local $ref; None for remote, malformed or dangling refs."""
+    if not ref.startswith("#/"):
+        return None
+    target: Any = root
+    for part in ref[2:].split("/"):
+        if not isinstance(target, dict):
+            return None
+        target = target.get(part.replace("~1", "/").replace("~0", "~"))
+    return target if isinstance(target, dict) else None
+
+
+def _all(checks: list[Validator]) -> Validator:
+    """Run every check and concatenate their errors."""
+    if not checks:
+        return _valid
+    if len(checks) == 1:
+        return checks[0]
+
+    def run_all(val: Any) -> Sequence[str]:
+        errors = None
+        for c in checks:
+            if found := c(val):
+                errors = errors or []
+                errors.extend(found)
+        return errors or _OK
+
+    return run_all
+
+
+def _guarded(check: Validator, kinds: tuple[type, ...]) -> Validator:
+    kinds = tuple(k for k in kinds if k is not type(None))
+    return lambda val: check(val) if isinstance(val, kinds) else _OK
+
+
+def _is_number(value: Any) -> bool:
+    # Draft 4 used booleans for exclusiveMinimum/exclusiveMaximum
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _flat(kinds: type | tuple[type, ...]) -> tuple[type, ...]:
+    return kinds if isinstance(kinds, tuple) else (kinds,)
+
+
+def compile_schema(schema: dict[str, Any]) -> Validator:
+    """
+    Compile a parameters schema into a validator.
+
+    The validator returns the error messages (empty if valid) and never
+    modifies the value, so anyOf/oneOf branches can be tried freely.
+    """
+    return _Compiler(schema).compile(schema, "")
+
+
+def compile_defaults(schema: dict[str, Any]) -> Filler | None:
+    """
+    Compile the declared defaults of a schema into a filler, or None if it has none.
+
+    Run the filler only on params that passed validation: it adds defaults
+    for omitted optional properties, and under anyOf/oneOf only those of
+    the branch the value matches.
+    """
+    return _DefaultsCompiler(schema).compile(schema)
@@ -1,33 +1,43 @@
-"""Web tools: web_search and web_fetch."""
+"""Web tools: web_search, web_fetch and web_fetch_many."""
 
-import html
+import asyncio
+import codecs
 import json
 import os
 import re
+import time
 from typing import Any
 from urllib.parse import urlparse
 
 import httpx
+from loguru import logger
 
 from nanobot.agent.tools.base import Tool
+from nanobot.agent.tools.web_cache import (
+    STORED_HEADERS,
+    CacheEntry,
+    SearchCache,
+    WebCache,
+    freshness_lifetime,
+)
+from nanobot.utils.html_extract import extract_async
+from nanobot.utils.http import get_http_client
 
 # Shared constants
 USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_7_2) AppleWebKit/537.36"
-MAX_REDIRECTS = 5  # Limit redirects to prevent DoS attacks
 
-
-def _strip_tags(text: str) -> str:
-    """Remove HTML tags and decode entities."""
-    text = re.sub(r'<script[\s\S]*?</script>', '', text, flags=re.I)
-    text = re.sub(r'<style[\s\S]*?</style>', '', text, flags=re.I)
-    text = re.sub(r'<[^>]+>', '', text)
-    return html.unescape(text).strip()
-
-
-def _normalize(text: str) -> str:
-    """Normalize whitespace."""
-    text = re.sub(r'[ \t]+', ' ', text)
-    return re.sub(r'\n{3,}', '\n\n', text).strip()
+# Download ceiling per requested character: HTML shrinks a lot when extracted,
+# other text is roughly 1:1 (up to 4 bytes per character in UTF-8)
+HTML_BYTES_PER_CHAR = 16
+TEXT_BYTES_PER_CHAR = 4
+MIN_DOWNLOAD_BYTES = 256 * 1024
+MAX_DOWNLOAD_BYTES = 16 * 1024 * 1024
+_TEXT_MIME_SUFFIXES = ("json", "xml", "javascript", "ecmascript", "x-www-form-urlencoded", "yaml", "csv")
+# web_fetch_many: URLs per call, default overall timeout (s), concurrent fetches per host
+MAX_FETCH_URLS = 20
+FETCH_MANY_TIMEOUT = 60
+FETCH_MANY_PER_HOST = 4
+_META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w.:-]+)', re.I)
 
 
 def _validate_url(url: str) -> tuple[bool, str]:
@@ -43,6 +53,65 @@ def _validate_url(url: str) -> tuple[bool, str]:
         return False, str(e)
 
 
+class UnsupportedContentError(Exception):
+    """The response is not text and was not downloaded."""
+
+
+def _is_text_type(ctype: str) -> bool:
+    """Whether a Content-Type is worth downloading (missing types are sniffed later)."""
+    mime = ctype.split(";", 1)[0].strip().lower()
+    return not mime or mime.startswith("text/") or mime.endswith(_TEXT_MIME_SUFFIXES)
+
+
+def _download_limit(ctype: str, max_chars: int) -> int:
+    """Byte ceiling for a body that should yield about max_chars characters."""
+    mime = ctype.split(";", 1)[0].strip().lower()
+    per_char = TEXT_BYTES_PER_CHAR if mime and "html" not in mime else HTML_BYTES_PER_CHAR
+    return min(max(max_chars * per_char, MIN_DOWNLOAD_BYTES), MAX_DOWNLOAD_BYTES)
+
+
+def _charset(ctype: str, head: bytes) -> str:
+    """Encoding from the Content-Type charset, an HTML meta tag, or UTF-8."""
+    m = re.search(r'charset="?([\w.:-]+)', ctype, re.I) or _META_CHARSET.search(head[:2048])
+    if m:
+        name = m.group(1)
+        name = name.decode("ascii", "ignore") if isinstance(name, bytes) else name
+        try:
+            return codecs.lookup(name).name
+        except LookupError:
+            pass
+    return "utf-8"
+
+
+async def _download(r: httpx.Response, limit: int) -> tuple[bytes, str, bool]:
+    """
+    Read at most limit (decompressed) bytes of a streamed response, decoding
+    incrementally. Returns (raw body, text, whether the body was cut off).
+    """
+    ctype = r.headers.get("content-type", "")
+    chunks: list[bytes] = []
+    parts: list[str] = []
+    size = 0
+    cut = False
+    decoder = None
+    async for chunk in r.aiter_bytes():
+        if decoder is None:
+            if not ctype and b"\x00" in chunk[:1024]:
+                raise UnsupportedContentError("Unsupported content (binary data without a content type)")
+            decoder = codecs.getincrementaldecoder(_charset(ctype, chunk))(errors="replace")
+        if size + len(chunk) > limit:
+            chunk = chunk[:limit - size]
+            cut = True
+        size += len(chunk)
+        chunks.append(chunk)
+        parts.append(decoder.decode(chunk))
+        if cut:
+            break
+    if decoder is not None and not cut:
+        parts.append(decoder.decode(b"", final=True))
+    return b"".join(chunks), "".join(parts), cut
+
+
 class WebSearchTool(Tool):
     """Search the web using Brave Search API."""
     
@@ -57,9 +126,10 @@ class WebSearchTool(Tool):
         "required": ["query"]
     }
     
-    def __init__(self, api_key: str | None = None, max_results: int = 5):
+    def __init__(self, api_key: str | None = None, max_results: int = 5, cache: SearchCache | None = None):
         self.api_key = api_key or os.environ.get("BRAVE_API_KEY", "")
         self.max_results = max_results
+        self.cache = cache
     
     async def execute(self, query: str, count: int | None = None, **kwargs: Any) -> str:
         if not self.api_key:
@@ -67,16 +137,27 @@ class WebSearchTool(Tool):
         
         try:
             n = min(max(count or self.max_results, 1), 10)
-            async with httpx.AsyncClient() as client:
-                r = await client.get(
+            # get/put may load the cache file on first use, so keep them off the event loop
+            results = await asyncio.to_thread(self.cache.get, query, n) if self.cache else None
+            if results is None:
+                r = await get_http_client().get(
                     "https://api.search.brave.com/res/v1/web/search",
                     params={"q": query, "count": n},
                     headers={"Accept": "application/json", "X-Subscription-Token": self.api_key},
                     timeout=10.0
                 )
                 r.raise_for_status()
-            
-            results = r.json().get("web", {}).get("results", [])
+                
+                results = [
+                    {k: item.get(k, "") for k in ("title", "url", "description")}
+                    for item in r.json().get("web", {}).get("results", [])[:n]
+                ]
+                if self.cache:
+                    await asyncio.to_thread(self.cache.put, query, n, results)
+                    if self.cache.path:
+                        await asyncio.to_thread(self.cache.save)
+            else:
+                logger.debug(f"web_search cache hit: {query!r}")
             if not results:
                 return f"No results for: {query}"
             
@@ -100,64 +181,217 @@ class WebFetchTool(Tool):
         "properties": {
             "url": {"type": "string", "description": "URL to fetch"},
             "extractMode": {"type": "string", "enum": ["markdown", "text"], "default": "markdown"},
-            "maxChars": {"type": "integer", "minimum": 100}
+            "maxChars": {"type": "integer", "minimum": 100},
+            "bypass_cache": {
+                "type": "boolean",
+                "description": "Fetch from the network even if a cached copy is still fresh",
+                "default": False,
+            },
         },
         "required": ["url"]
     }
     
-    def __init__(self, max_chars: int = 50000):
+    def __init__(self, max_chars: int = 50000, cache: WebCache | None = None):
         self.max_chars = max_chars
+        self.cache = cache
     
-    async def execute(self, url: str, extractMode: str = "markdown", maxChars: int | None = None, **kwargs: Any) -> str:
-        from readability import Document
-
-        max_chars = maxChars or self.max_chars
+    async def execute(
+        self,
+        url: str,
+        extractMode: str = "markdown",
+        maxChars: int | None = None,
+        bypass_cache: bool = False,
+        **kwargs: Any,
+    ) -> str:
+        return json.dumps(await self.fetch(url, extractMode, maxChars or self.max_chars, bypass_cache))
 
+    async def fetch(
+        self, url: str, extract_mode: str, max_chars: int, bypass_cache: bool = False
+    ) -> dict[str, Any]:
+        """Fetch one URL; returns the result dict (with "error" on failure)."""
         # Validate URL before fetching
         is_valid, error_msg = _validate_url(url)
         if not is_valid:
-            return json.dumps({"error": f"URL validation failed: {error_msg}", "url": url})
+            return {"error": f"URL validation failed: {error_msg}", "url": url}
 
         try:
-            async with httpx.AsyncClient(
-                follow_redirects=True,
-                max_redirects=MAX_REDIRECTS,
-                timeout=30.0
-            ) as client:
-                r = await client.get(url, headers={"User-Agent": USER_AGENT})
+            entry = None
+            if self.cache and not bypass_cache:
+                entry = await asyncio.to_thread(self.cache.get, url)
+                if entry and entry.fresh:
+                    self.cache.hits += 1
+                    return await self._from_cache(entry, extract_mode, max_chars, changed=False)
+
+            headers = {"User-Agent": USER_AGENT}
+            if entry:
+                headers.update(entry.validators())
+            # The shared client caps redirects (nanobot.utils.http.MAX_REDIRECTS)
+            async with get_http_client().stream(
+                "GET", url, headers=headers, follow_redirects=True, timeout=30.0
+            ) as r:
+                if entry and r.status_code == 304:
+                    self.cache.revalidated += 1
+                    entry.refresh(r.headers)
+                    return await self._from_cache(entry, extract_mode, max_chars, changed=True)
                 r.raise_for_status()
+                ctype = r.headers.get("content-type", "")
+                if not _is_text_type(ctype):
+                    return {"error": f"Unsupported content type '{ctype}' (not text)", "url": url}
+                body, text, cut = await _download(r, _download_limit(ctype, max_chars))
             
-            ctype = r.headers.get("content-type", "")
-            
-            # JSON
-            if "application/json" in ctype:
-                text, extractor = json.dumps(r.json(), indent=2), "json"
-            # HTML
-            elif "text/html" in ctype or r.text[:256].lower().startswith(("<!doctype", "<html")):
-                doc = Document(r.text)
-                content = self._to_markdown(doc.summary()) if extractMode == "markdown" else _strip_tags(doc.summary())
-                text = f"# {doc.title()}\n\n{content}" if doc.title() else content
-                extractor = "readability"
-            else:
-                text, extractor = r.text, "raw"
-            
-            truncated = len(text) > max_chars
-            if truncated:
-                text = text[:max_chars]
-            
-            return json.dumps({"url": url, "finalUrl": str(r.url), "status": r.status_code,
-                              "extractor": extractor, "truncated": truncated, "length": len(text), "text": text})
+            text, extractor = await extract_async(text, ctype, extract_mode)
+            # A cut-off body cannot serve later calls with a larger maxChars
+            if self.cache and not cut:
+                self.cache.misses += 1
+                await asyncio.to_thread(self._store, url, r, body, extract_mode, text, extractor)
+            return self._result(url, str(r.url), r.status_code, extractor, text, max_chars, cached=False, cut=cut)
         except Exception as e:
-            return json.dumps({"error": str(e), "url": url})
-    
-    def _to_markdown(self, html: str) -> str:
-        """Convert HTML to markdown."""
-        # Convert links, headings, lists before stripping tags
-        text = re.sub(r'<a\s+[^>]*href=["\']([^"\']+)["\'][^>]*>([\s\S]*?)</a>',
-                      lambda m: f'[{_strip_tags(m[2])}]({m[1]})', html, flags=re.I)
-        text = re.sub(r'<h([1-6])[^>]*>([\s\S]*?)</h\1>',
-                      lambda m: f'\n{"#" * int(m[1])} {_strip_tags(m[2])}\n', text, flags=re.I)
-        text = re.sub(r'<li[^>]*>([\s\S]*?)</li>', lambda m: f'\n- {_strip_tags(m[1])}', text, flags=re.I)
-        text = re.sub(r'</(p|div|section|article)>', '\n\n', text, flags=re.I)
-        text = re.sub(r'<(br|hr)\s*/?>', '\n', text, flags=re.I)
-        return _normalize(_strip_tags(text))
+            return {"error": str(e), "url": url}
+
+    async def _from_cache(
+        self, entry: CacheEntry, extract_mode: str, max_chars: int, changed: bool
+    ) -> dict[str, Any]:
+        """Answer from a cache entry, extracting from the stored body if this mode is new."""
+        cached = entry.extracted.get(extract_mode)
+        if cached is None:
+            body = await asyncio.to_thread(self.cache.read_body, entry)
+            if body is None:
+                raise RuntimeError("cached body is missing; retry with bypass_cache=true")
+            ctype = entry.headers.get("content-type", "")
+            decoded = body.decode(_charset(ctype, body), errors="replace")
+            text, extractor = await extract_async(decoded, ctype, extract_mode)
+            cached = entry.extracted[extract_mode] = {"text": text, "extractor": extractor}
+            changed = True
+        if changed:
+            await asyncio.to_thread(self.cache.put, entry)
+        return self._result(
+            entry.url, entry.final_url, entry.status, cached["extractor"], cached["text"], max_chars, cached=True
+        )
+
+    def _store(
+        self, url: str, r: httpx.Response, body: bytes, extract_mode: str, text: str, extractor: str
+    ) -> None:
+        """Cache a 200 response unless it is uncacheable or could never be reused."""
+        if r.status_code != 200:
+            return
+        now = time.time()
+        lifetime = freshness_lifetime(r.headers, now)
+        if lifetime is None or (lifetime <= 0 and not ("etag" in r.headers or "last-modified" in r.headers)):
+            return
+        entry = CacheEntry(
+            url=url,
+            final_url=str(r.url),
+            status=r.status_code,
+            headers={k: r.headers[k] for k in STORED_HEADERS if k in r.headers},
+            stored_at=now,
+            expires_at=now + lifetime,
+            extracted={extract_mode: {"text": text, "extractor": extractor}},
+        )
+        self.cache.put(entry, body)
+
+    @staticmethod
+    def _result(
+        url: str, final_url: str, status: int, extractor: str, text: str, max_chars: int,
+        cached: bool, cut: bool = False,
+    ) -> dict[str, Any]:
+        truncated = cut or len(text) > max_chars
+        if len(text) > max_chars:
+            text = text[:max_chars]
+        return {"url": url, "finalUrl": final_url, "status": status, "extractor": extractor,
+                "truncated": truncated, "length": len(text), "cached": cached, "text": text}
+
+
+def _share_budget(lengths: list[int], budget: int) -> list[int]:
+    """Split budget over texts: short ones keep everything, long ones get equal shares of the rest."""
+    shares = [0] * len(lengths)
+    remaining = budget
+    pending = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    for n, i in enumerate(pending):
+        share = min(lengths[i], remaining // (len(pending) - n))
+        shares[i] = share
+        remaining -= share
+    return shares
+
+
+class WebFetchManyTool(Tool):
+    """Fetch several URLs concurrently and split a character budget between them."""
+
+    name = "web_fetch_many"
+    description = (
+        f"Fetch up to {MAX_FETCH_URLS} URLs concurrently and extract readable content from each. "
+        "Prefer this over several web_fetch calls when you already know the URLs. "
+        "maxChars is shared by all pages; errors and timeouts are reported per URL."
+    )
+    parameters = {
+        "type": "object",
+        "properties": {
+            "urls": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "URLs to fetch",
+                "minItems": 1,
+                "maxItems": MAX_FETCH_URLS,
+            },
+            "extractMode": {"type": "string", "enum": ["markdown", "text"], "default": "markdown"},
+            "maxChars": {"type": "integer", "minimum": 1000, "description": "Total characters for all pages"},
+            "timeout": {
+                "type": "integer",
+                "minimum": 1,
+                "maximum": 300,
+                "description": f"Overall time limit in seconds (default {FETCH_MANY_TIMEOUT})",
+            },
+            "bypass_cache": {"type": "boolean", "default": False},
+        },
+        "required": ["urls"],
+    }
+
+    def __init__(self, fetcher: WebFetchTool | None = None, max_per_host: int = FETCH_MANY_PER_HOST):
+        self._fetcher = fetcher or WebFetchTool()
+        self.max_per_host = max_per_host
+
+    async def execute(
+        self,
+        urls: list[str],
+        extractMode: str = "markdown",
+        maxChars: int | None = None,
+        timeout: int = FETCH_MANY_TIMEOUT,
+        bypass_cache: bool = False,
+        **kwargs: Any,
+    ) -> str:
+        urls = list(dict.fromkeys(urls))  # Drop duplicates, keep order
+        if not urls:
+            return json.dumps({"error": "urls is empty"})
+        if len(urls) > MAX_FETCH_URLS:
+            return json.dumps({"error": f"at most {MAX_FETCH_URLS} URLs per call, got {len(urls)}"})
+        budget = maxChars or self._fetcher.max_chars
+        hosts: dict[str, asyncio.Semaphore] = {}
+
+        async def fetch_one(url: str) -> dict[str, Any]:
+            sem = hosts.setdefault(urlparse(url).netloc.lower(), asyncio.Semaphore(self.max_per_host))
+            async with sem:
+                # Each page may use the whole budget until we know how long the others are
+                return await self._fetcher.fetch(url, extractMode, budget, bypass_cache)
+
+        tasks = [asyncio.create_task(fetch_one(url)) for url in urls]
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        results = []
+        for url, task in zip(urls, tasks):
+            if task in pending:
+                results.append({"url": url, "error": f"timed out after {timeout}s"})
+            elif task.exception() is not None:
+                results.append({"url": url, "error": str(task.exception())})
+            else:
+                results.append(task.result())
+
+        ok = [r for r in results if "text" in r]
+        for r, share in zip(ok, _share_budget([len(r["text"]) for r in ok], budget)):
+            if share < len(r["text"]):
+                r["text"] = r["text"][:share]
+                r["truncated"] = True
+            r["length"] = len(r["text"])
+        return json.dumps({"results": results, "fetched": len(ok), "failed": len(results) - len(ok)})
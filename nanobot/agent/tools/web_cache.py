@@ -0,0 +1,358 @@
+"""Caches for the web tools: an on-disk HTTP cache for web_fetch and a TTL cache for web_search."""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Mapping
+
+from loguru import logger
+
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+# Heuristic freshness for responses with only Last-Modified (RFC 9111 4.2.2)
+HEURISTIC_FRACTION = 0.1
+MAX_HEURISTIC_LIFETIME = 24 * 3600
+STORED_HEADERS = ("content-type", "etag", "last-modified", "cache-control", "expires", "date")
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Write via a temp file in the same directory and rename it over the target."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _parse_date(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def parse_cache_control(value: str | None) -> dict[str, str | None]:
+    """Split a Cache-Control header into lowercase directives and their arguments."""
+    directives: dict[str, str | None] = {}
+    for part in (value or "").split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip().strip('"') if arg else None
+    return directives
+
+
+def freshness_lifetime(headers: Mapping[str, str], now: float | None = None) -> float | None:
+    """Seconds a response stays fresh after it is received; None if it must not be stored."""
+    cc = parse_cache_control(headers.get("cache-control"))
+    if "no-store" in cc:
+        return None
+    if "no-cache" in cc:
+        return 0.0
+    try:
+        age = max(float(headers.get("age") or 0), 0.0)
+    except ValueError:
+        age = 0.0
+    if "max-age" in cc:
+        try:
+            return max(int(cc["max-age"] or 0) - age, 0.0)
+        except ValueError:
+            return 0.0
+    date = _parse_date(headers.get("date")) or now or time.time()
+    if "expires" in headers:
+        expires = _parse_date(headers.get("expires"))
+        # An invalid Expires (e.g. "0") means already expired
+        return max(expires - date - age, 0.0) if expires is not None else 0.0
+    last_modified = _parse_date(headers.get("last-modified"))
+    if last_modified is not None:
+        return min(max(date - last_modified, 0.0) * HEURISTIC_FRACTION, MAX_HEURISTIC_LIFETIME)
+    return 0.0
+
+
+@dataclass
+class CacheEntry:
+    """
+    Stored response metadata plus extracted text per extract mode.
+
+    The raw body is kept in a separate file so another extract mode can be
+    produced from the cache without refetching.
+    """
+
+    url: str
+    final_url: str
+    status: int
+    headers: dict[str, str]
+    stored_at: float
+    expires_at: float
+    extracted: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def validators(self) -> dict[str, str]:
+        """Conditional request headers for revalidation."""
+        out = {}
+        if etag := self.headers.get("etag"):
+            out["If-None-Match"] = etag
+        if last_modified := self.headers.get("last-modified"):
+            out["If-Modified-Since"] = last_modified
+        return out
+
+    def refresh(self, headers: Mapping[str, str]) -> None:
+        """Apply the headers of a 304 response and restart the freshness clock."""
+        for name in STORED_HEADERS:
+            if name != "content-type" and name in headers:
+                self.headers[name] = headers[name]
+        now = time.time()
+        self.stored_at = now
+        self.expires_at = now + (freshness_lifetime(self.headers, now) or 0.0)
+
+
+class WebCache:
+    """
+    Size-bounded LRU cache of fetched pages in a directory.
+
+    Each URL has ``<sha256>.json`` (CacheEntry) and ``<sha256>.body`` (raw
+    bytes). Recency is the metadata file's mtime, so the LRU order survives
+    restarts and is shared by every process using the directory. Methods do
+    blocking file I/O; call them from a worker thread.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory).expanduser()
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: OrderedDict[str, int] | None = None  # key -> bytes on disk, oldest first
+        # Counted by the caller, which knows how each lookup was resolved
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha256(url.encode()).hexdigest()
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        return self.directory / f"{key}.json", self.directory / f"{key}.body"
+
+    def _load_index(self) -> OrderedDict[str, int]:
+        if self._index is None:
+            found = []
+            if self.directory.is_dir():
+                for meta in self.directory.glob("*.json"):
+                    try:
+                        st = meta.stat()
+                        body = meta.with_suffix(".body")
+                        size = st.st_size + (body.stat().st_size if body.exists() else 0)
+                    except OSError:
+                        continue
+                    found.append((st.st_mtime, meta.stem, size))
+            found.sort()
+            self._index = OrderedDict((key, size) for _, key, size in found)
+        return self._index
+
+    def get(self, url: str) -> CacheEntry | None:
+        key = self.key(url)
+        meta, _ = self._paths(key)
+        with self._lock:
+            try:
+                entry = CacheEntry(**json.loads(meta.read_text(encoding="utf-8")))
+            except FileNotFoundError:
+                return None
+            except (OSError, ValueError, TypeError) as e:
+                logger.debug(f"Dropping unreadable web cache entry {meta.name}: {e}")
+                self._remove(key)
+                return None
+            index = self._load_index()
+            if key in index:
+                index.move_to_end(key)
+            try:
+                os.utime(meta)
+            except OSError:
+                pass
+            return entry
+
+    def read_body(self, entry: CacheEntry) -> bytes | None:
+        _, body = self._paths(self.key(entry.url))
+        try:
+            return body.read_bytes()
+        except OSError:
+            return None
+
+    def put(self, entry: CacheEntry, body: bytes | None = None) -> None:
+        """Store entry metadata, and the raw body when given."""
+        key = self.key(entry.url)
+        meta_path, body_path = self._paths(key)
+        meta = json.dumps(asdict(entry), ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            index = self._load_index()
+            body_size = len(body) if body is not None else self._body_size(body_path)
+            size = len(meta) + body_size
+            if size > self.max_bytes // 4:
+                self._remove(key)
+                return
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                if body is not None:
+                    _write_atomic(body_path, body)
+                _write_atomic(meta_path, meta)
+            except OSError as e:
+                logger.warning(f"Web cache write failed for {entry.url}: {e}")
+                return
+            index[key] = size
+            index.move_to_end(key)
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._load_index()):
+                self._remove(key)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            index = self._load_index()
+            return {
+                "entries": len(index),
+                "bytes": sum(index.values()),
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+            }
+
+    def _evict(self) -> None:
+        index = self._load_index()
+        total = sum(index.values())
+        while total > self.max_bytes and len(index) > 1:
+            key, size = next(iter(index.items()))
+            self._remove(key)
+            total -= size
+
+    def _remove(self, key: str) -> None:
+        for path in self._paths(key):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        if self._index is not None:
+            self._index.pop(key, None)
+
+    @staticmethod
+    def _body_size(path: Path) -> int:
+        try:
+            return path.stat().st_size
+        except OSError:
+            return 0
+
+
+class SearchCache:
+    """
+    LRU cache of web search results with a TTL, keyed by normalized query.
+
+    Optionally persisted to a JSON file (loaded on first use, rewritten after
+    each new result) so results survive restarts; get/put may read that file,
+    so async callers run them in a thread. One instance is shared by the main
+    agent and its subagents.
+    """
+
+    def __init__(self, ttl: float = 3600, max_entries: int = 256, path: Path | None = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = Path(path).expanduser() if path else None
+        # key -> (expires_at wall-clock, requested count, results)
+        self._entries: OrderedDict[str, tuple[float, int, list[dict[str, Any]]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._loaded = self.path is None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return " ".join(query.casefold().split())
+
+    def get(self, query: str, count: int) -> list[dict[str, Any]] | None:
+        """Cached results for at least count items, or None."""
+        key = self.normalize(query)
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, stored_count, results = entry
+                if expires_at <= time.time():
+                    del self._entries[key]
+                # Fewer stored results than asked for is only final if the API had no more
+                elif stored_count >= count or len(results) < stored_count:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return results[:count]
+            self.misses += 1
+            return None
+
+    def put(self, query: str, count: int, results: list[dict[str, Any]]) -> None:
+        key = self.normalize(query)
+        with self._lock:
+            self._load()
+            self._entries[key] = (time.time() + self.ttl, count, results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def save(self) -> None:
+        """Write unexpired entries to the cache file (blocking; call from a thread)."""
+        if self.path is None:
+            return
+        now = time.time()
+        with self._lock:
+            data = {k: list(v) for k, v in self._entries.items() if v[0] > now}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            _write_atomic(self.path, json.dumps(data, ensure_ascii=False).encode("utf-8"))
+        except OSError as e:
+            logger.warning(f"Search cache write failed: {e}")
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.debug(f"Ignoring unreadable search cache {self.path}: {e}")
+            return
+        now = time.time()
+        try:
+            for key, (expires_at, count, results) in sorted(data.items(), key=lambda kv: kv[1][0]):
+                if expires_at > now:
+                    self._entries[key] = (expires_at, count, results)
+        except (AttributeError, TypeError, ValueError) as e:
+            logger.debug(f"Ignoring malformed search cache {self.path}: {e}")
+            self._entries.clear()
@@ -5,7 +5,6 @@ import json
 from pathlib import Path
 from typing import Any
 
-import httpx
 import websockets
 from loguru import logger
 
@@ -13,7 +12,7 @@ from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
 from nanobot.config.schema import DiscordConfig
-
+from nanobot.utils.http import get_http_client
 
 DISCORD_API_BASE = "https://discord.com/api/v10"
 MAX_ATTACHMENT_BYTES = 20 * 1024 * 1024  # 20MB
@@ -31,7 +30,6 @@ class DiscordChannel(BaseChannel):
         self._seq: int | None = None
         self._heartbeat_task: asyncio.Task | None = None
         self._typing_tasks: dict[str, asyncio.Task] = {}
-        self._http: httpx.AsyncClient | None = None
 
     async def start(self) -> None:
         """Start the Discord gateway connection."""
@@ -40,7 +38,6 @@ class DiscordChannel(BaseChannel):
             return
 
         self._running = True
-        self._http = httpx.AsyncClient(timeout=30.0)
 
         while self._running:
             try:
@@ -68,14 +65,11 @@ class DiscordChannel(BaseChannel):
         if self._ws:
             await self._ws.close()
             self._ws = None
-        if self._http:
-            await self._http.aclose()
-            self._http = None
 
     async def send(self, msg: OutboundMessage) -> None:
         """Send a message through Discord REST API."""
-        if not self._http:
-            logger.warning("Discord HTTP client not initialized")
+        if not self._running:
+            logger.warning("Discord channel not running")
             return
 
         url = f"{DISCORD_API_BASE}/channels/{msg.chat_id}/messages"
@@ -90,7 +84,7 @@ class DiscordChannel(BaseChannel):
         try:
             for attempt in range(3):
                 try:
-                    response = await self._http.post(url, headers=headers, json=payload)
+                    response = await get_http_client().post(url, headers=headers, json=payload)
                     if response.status_code == 429:
                         data = response.json()
                         retry_after = float(data.get("retry_after", 1.0))
@@ -205,7 +199,7 @@ class DiscordChannel(BaseChannel):
             url = attachment.get("url")
             filename = attachment.get("filename") or "attachment"
             size = attachment.get("size") or 0
-            if not url or not self._http:
+            if not url:
                 continue
             if size and size > MAX_ATTACHMENT_BYTES:
                 content_parts.append(f"[attachment: {filename} - too large]")
@@ -213,7 +207,7 @@ class DiscordChannel(BaseChannel):
             try:
                 media_dir.mkdir(parents=True, exist_ok=True)
                 file_path = media_dir / f"{attachment.get('id', 'file')}_{filename.replace('/', '_')}"
-                resp = await self._http.get(url)
+                resp = await get_http_client().get(url)
                 resp.raise_for_status()
                 file_path.write_bytes(resp.content)
                 media_paths.append(str(file_path))
@@ -247,7 +241,7 @@ class DiscordChannel(BaseChannel):
             headers = {"Authorization": f"Bot {self.config.token}"}
             while self._running:
                 try:
-                    await self._http.post(url, headers=headers)
+                    await get_http_client().post(url, headers=headers)
                 except Exception:
                     pass
                 await asyncio.sleep(8)
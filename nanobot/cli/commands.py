@@ -213,6 +213,7 @@ def gateway(
     from nanobot.session.manager import SessionManager
     from nanobot.cron.service import CronService
     from nanobot.cron.types import CronJob
+    from nanobot.utils.http import close_http_clients
     from nanobot.heartbeat.service import HeartbeatService
     
     if verbose:
@@ -248,6 +249,8 @@ def gateway(
         max_iterations=config.agents.defaults.max_tool_iterations,
         memory_window=config.agents.defaults.memory_window,
         brave_api_key=config.tools.web.search.api_key or None,
+        web_search_config=config.tools.web.search,
+        web_fetch_config=config.tools.web.fetch,
         exec_config=config.tools.exec,
         cron_service=cron,
         restrict_to_workspace=config.tools.restrict_to_workspace,
@@ -255,6 +258,9 @@ def gateway(
         mcp_servers=config.tools.mcp_servers,
         lsp_config=config.tools.lsp,
         custom_tools=config.tools.custom,
+        skills_config=config.agents.defaults.skills,
+        image_config=config.agents.defaults.images,
+        tool_selection_config=config.agents.defaults.tool_selection,
     )
     
     # Set cron callback (needs agent)
@@ -318,6 +324,7 @@ def gateway(
             cron.stop()
             agent.stop()
             await channels.stop_all()
+            await close_http_clients()  # In case a channel used the pool while stopping
     
     asyncio.run(run())
 
@@ -371,11 +378,16 @@ def agent(
         max_iterations=config.agents.defaults.max_tool_iterations,
         memory_window=config.agents.defaults.memory_window,
         brave_api_key=config.tools.web.search.api_key or None,
+        web_search_config=config.tools.web.search,
+        web_fetch_config=config.tools.web.fetch,
         exec_config=config.tools.exec,
         restrict_to_workspace=config.tools.restrict_to_workspace,
         mcp_servers=config.tools.mcp_servers,
         lsp_config=config.tools.lsp,
         custom_tools=config.tools.custom,
+        skills_config=config.agents.defaults.skills,
+        image_config=config.agents.defaults.images,
+        tool_selection_config=config.agents.defaults.tool_selection,
     )
     
     # Show spinner when logs are off (no output to miss); skip when logs are on
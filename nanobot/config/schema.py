@@ -88,6 +88,30 @@ class ChannelsConfig(BaseModel):
     slack: SlackConfig = Field(default_factory=SlackConfig)
 
 
+class SkillsConfig(BaseModel):
+    """Skills summary selection configuration."""
+    top_k: int = 8  # Max relevant skills listed per message (0 = list every skill)
+    max_tokens: int = 1500  # Token budget for the skills summary (pinned skills always fit)
+    min_score: float = 0.05  # Minimum relevance score (0-1) for a skill to be listed
+    pinned: list[str] = Field(default_factory=list)  # Skills listed on every message
+
+
+class ToolSelectionConfig(BaseModel):
+    """Per-message tool subset selection configuration."""
+    top_k: int = 8  # Max relevant tools attached per message besides pinned/recent ones (0 = attach every tool)
+    min_score: float = 0.05  # Minimum relevance score (0-1) for a tool to be attached
+    recent_turns: int = 3  # Tools used in this many recent turns of the session stay attached
+    pinned: list[str] = Field(default_factory=lambda: [
+        "read_file", "write_file", "edit_file", "list_dir", "exec", "web_search", "web_fetch",
+    ])  # Tools attached on every message
+
+
+class ImageConfig(BaseModel):
+    """Image attachment processing configuration."""
+    max_dimension: int = 1568  # Longest side in pixels after downscaling
+    quality: int = 85  # JPEG quality for re-encoded images
+
+
 class AgentDefaults(BaseModel):
     """Default agent configuration."""
     workspace: str = "~/.nanobot/workspace"
@@ -96,6 +120,9 @@ class AgentDefaults(BaseModel):
     temperature: float = 0.7
     max_tool_iterations: int = 20
     memory_window: int = 50
+    skills: SkillsConfig = Field(default_factory=SkillsConfig)
+    tool_selection: ToolSelectionConfig = Field(default_factory=ToolSelectionConfig)
+    images: ImageConfig = Field(default_factory=ImageConfig)
 
 
 class AgentsConfig(BaseModel):
@@ -141,16 +168,39 @@ class WebSearchConfig(BaseModel):
     """Web search tool configuration."""
     api_key: str = ""  # Brave Search API key
     max_results: int = 5
+    cache_ttl: int = 3600  # Seconds a cached result is reused (0 = no cache)
+    cache_max_entries: int = 256
+    cache_file: str = ""  # Persist cached results to this JSON file (empty = memory only)
+
+
+class WebFetchConfig(BaseModel):
+    """Web fetch tool configuration."""
+    max_chars: int = 50000
+    cache: bool = True  # On-disk HTTP cache (honors Cache-Control/ETag/Last-Modified)
+    cache_dir: str = "~/.nanobot/cache/web"
+    cache_max_mb: int = 100
 
 
 class WebToolsConfig(BaseModel):
     """Web tools configuration."""
     search: WebSearchConfig = Field(default_factory=WebSearchConfig)
+    fetch: WebFetchConfig = Field(default_factory=WebFetchConfig)
 
 
 class ExecToolConfig(BaseModel):
     """Shell exec tool configuration."""
     timeout: int = 60
+    persistent: bool = False  # Keep one shell per session (cwd/env/venv carry over)
+    idle_timeout: int = 600  # Seconds before an unused persistent shell is closed
+    progress_interval: int = 30  # Seconds between "still running" notes to the chat (0 = off)
+    max_concurrent: int = 4  # Commands running at once across all sessions and subagents
+    max_per_session: int = 2  # Commands running at once per session
+    # Per-process resource limits (0 = unlimited, POSIX only)
+    cpu_seconds: int = 0
+    memory_mb: int = 0
+    max_open_files: int = 0
+    max_file_size_mb: int = 0
+    max_output_bytes: int = 0  # Kill the command once it has printed this many bytes
 
 
 class MCPServerConfig(BaseModel):
@@ -159,6 +209,11 @@ class MCPServerConfig(BaseModel):
     args: list[str] = Field(default_factory=list)  # Stdio: command arguments
     env: dict[str, str] = Field(default_factory=dict)  # Stdio: extra env vars
     url: str = ""  # HTTP: streamable HTTP endpoint URL
+    connect_timeout: int = 30  # Seconds to start and initialize before retrying with backoff
+    call_timeout: int = 60  # Seconds before a tool call is cancelled
+    max_concurrent: int = 4  # Tool calls in flight to this server at once
+    cache_ttl: int = 0  # Seconds to reuse results of tools marked readOnlyHint (0 = off)
+    minify_schemas: bool = True  # Strip titles/examples/redundant defaults and cap descriptions in tool schemas
 
 
 class LSPConfig(BaseModel):
@@ -0,0 +1,111 @@
+"""Minimal .gitignore matching for workspace walks."""
+
+import re
+from pathlib import Path
+
+# Directories never worth descending into
+ALWAYS_IGNORED_DIRS = frozenset({".git", ".hg", ".svn"})
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """Translate a gitignore glob (without leading/trailing slash handling) to a regex."""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == n:
+            out.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif c == "*":
+            out.append("[^/]*")
+            i += 1
+        elif c == "?":
+            out.append("[^/]")
+            i += 1
+        elif c == "[":
+            j = pattern.find("]", i + 1)
+            if j < 0:
+                out.append(re.escape(c))
+                i += 1
+            else:
+                body = pattern[i + 1:j]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = j + 1
+        elif c == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return "".join(out)
+
+
+class GitIgnore:
+    """
+    Rules from one .gitignore file.
+
+    Paths passed to ``match`` are POSIX paths relative to the walk root; ``base``
+    is the directory (relative to the same root) containing the .gitignore.
+    """
+
+    def __init__(self, lines: list[str], base: str = ""):
+        self.base = base.strip("/")
+        self.rules: list[tuple[re.Pattern[str], bool, bool]] = []
+        prefix = re.escape(self.base + "/") if self.base else ""
+        for raw in lines:
+            line = raw.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            elif line.startswith("\\"):
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            anchored = "/" in line
+            body = _glob_to_regex(line.lstrip("/"))
+            regex = f"^{prefix}{body}$" if anchored else f"^{prefix}(?:.*/)?{body}$"
+            self.rules.append((re.compile(regex), negate, dir_only))
+
+    @classmethod
+    def load(cls, directory: Path, base: str = "") -> "GitIgnore | None":
+        """Load ``directory/.gitignore`` if it exists and has rules."""
+        try:
+            lines = (directory / ".gitignore").read_text(encoding="utf-8", errors="replace").splitlines()
+        except OSError:
+            return None
+        spec = cls(lines, base)
+        return spec if spec.rules else None
+
+    def match(self, rel_path: str, is_dir: bool) -> bool | None:
+        """Return True (ignored), False (re-included) or None (no rule applies)."""
+        result = None
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                result = not negate
+        return result
+
+
+def is_ignored(specs: list[GitIgnore], rel_path: str, is_dir: bool) -> bool:
+    """Check a path against .gitignore specs ordered from the root down (deeper files win)."""
+    if is_dir and rel_path.rsplit("/", 1)[-1] in ALWAYS_IGNORED_DIRS:
+        return True
+    ignored = False
+    for spec in specs:
+        result = spec.match(rel_path, is_dir)
+        if result is not None:
+            ignored = result
+    return ignored
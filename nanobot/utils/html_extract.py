@@ -0,0 +1,199 @@
+"""
+Content extraction for web_fetch, run off the event loop.
+
+Readability and the markdown regexes are CPU-bound, so documents above
+OFFLOAD_MIN_CHARS are extracted in a worker process. Documents above
+STREAMING_MIN_CHARS skip readability (superlinear on huge pages) and use a
+single-pass lxml parser target that never builds a tree.
+
+This module is imported by pool workers, so it must stay light on imports.
+"""
+
+import asyncio
+import html
+import json
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from loguru import logger
+
+# Below this, pickling the document to a worker costs more than extracting it inline
+OFFLOAD_MIN_CHARS = 32 * 1024
+# Above this, use the streaming extractor instead of readability
+STREAMING_MIN_CHARS = 512 * 1024
+MAX_WORKERS = 4
+FEED_CHUNK_CHARS = 64 * 1024
+
+_SKIP_TAGS = frozenset({
+    "script", "style", "noscript", "template", "svg", "iframe", "object", "head",
+    "nav", "header", "footer", "aside", "form", "button", "select",
+})
+_BLOCK_TAGS = frozenset({
+    "p", "div", "section", "article", "main", "blockquote", "pre", "table", "tr",
+    "ul", "ol", "dl", "dt", "dd", "figure", "figcaption", "hr", "address",
+})
+_HEADINGS = frozenset({"h1", "h2", "h3", "h4", "h5", "h6"})
+
+
+def strip_tags(text: str) -> str:
+    """Remove HTML tags and decode entities."""
+    text = re.sub(r'<script[\s\S]*?</script>', '', text, flags=re.I)
+    text = re.sub(r'<style[\s\S]*?</style>', '', text, flags=re.I)
+    text = re.sub(r'<[^>]+>', '', text)
+    return html.unescape(text).strip()
+
+
+def normalize(text: str) -> str:
+    """Normalize whitespace."""
+    text = re.sub(r'[ \t]+', ' ', text)
+    return re.sub(r'\n{3,}', '\n\n', text).strip()
+
+
+def html_to_markdown(html: str) -> str:
+    """Convert HTML to markdown."""
+    # Convert links, headings, lists before stripping tags
+    text = re.sub(r'<a\s+[^>]*href=["\']([^"\']+)["\'][^>]*>([\s\S]*?)</a>',
+                  lambda m: f'[{strip_tags(m[2])}]({m[1]})', html, flags=re.I)
+    text = re.sub(r'<h([1-6])[^>]*>([\s\S]*?)</h\1>',
+                  lambda m: f'\n{"#" * int(m[1])} {strip_tags(m[2])}\n', text, flags=re.I)
+    text = re.sub(r'<li[^>]*>([\s\S]*?)</li>', lambda m: f'\n- {strip_tags(m[1])}', text, flags=re.I)
+    text = re.sub(r'</(p|div|section|article)>', '\n\n', text, flags=re.I)
+    text = re.sub(r'<(br|hr)\s*/?>', '\n', text, flags=re.I)
+    return normalize(strip_tags(text))
+
+
+class _TextTarget:
+    """lxml parser target that turns SAX-style events into text or markdown."""
+
+    def __init__(self, markdown: bool):
+        self.markdown = markdown
+        self.out: list[str] = []
+        self.title: list[str] = []
+        self.links: list[str | None] = []
+        self.skip = 0
+        self.in_title = False
+
+    def start(self, tag: str, attrib) -> None:
+        tag = tag.lower() if isinstance(tag, str) else ""
+        if tag == "title":
+            self.in_title = True
+        if tag in _SKIP_TAGS:
+            self.skip += 1
+        if self.skip:
+            return
+        if tag in _HEADINGS:
+            self.out.append("\n\n" + ("#" * int(tag[1]) + " " if self.markdown else ""))
+        elif tag == "li":
+            self.out.append("\n- " if self.markdown else "\n")
+        elif tag == "br":
+            self.out.append("\n")
+        elif tag in _BLOCK_TAGS:
+            self.out.append("\n\n")
+        elif tag == "a" and self.markdown:
+            href = attrib.get("href") or ""
+            if href and not href.startswith(("#", "javascript:")):
+                self.links.append(href)
+                self.out.append("[")
+            else:
+                self.links.append(None)
+
+    def end(self, tag: str) -> None:
+        tag = tag.lower() if isinstance(tag, str) else ""
+        if tag == "title":
+            self.in_title = False
+        if tag in _SKIP_TAGS:
+            self.skip = max(self.skip - 1, 0)
+            return
+        if self.skip:
+            return
+        if tag == "a" and self.markdown and self.links:
+            if href := self.links.pop():
+                self.out.append(f"]({href})")
+        elif tag in _HEADINGS or tag in _BLOCK_TAGS:
+            self.out.append("\n\n")
+
+    def data(self, text: str) -> None:
+        if self.in_title:
+            self.title.append(text)
+        elif not self.skip:
+            self.out.append(re.sub(r"\s+", " ", text))
+
+    def comment(self, text: str) -> None:
+        pass
+
+    def close(self) -> tuple[str, str]:
+        body = re.sub(r" *\n *", "\n", "".join(self.out))
+        return " ".join("".join(self.title).split()), normalize(body)
+
+
+def stream_extract(text: str, markdown: bool = True) -> tuple[str, str]:
+    """(title, content) of an HTML document in one pass without building a tree."""
+    from lxml import etree
+
+    parser = etree.HTMLParser(target=_TextTarget(markdown), recover=True, no_network=True)
+    for i in range(0, len(text), FEED_CHUNK_CHARS):
+        parser.feed(text[i:i + FEED_CHUNK_CHARS])
+    return parser.close()
+
+
+def extract(text: str, ctype: str, extract_mode: str) -> tuple[str, str]:
+    """Extract (text, extractor name) from a decoded body."""
+    # JSON (a body cut at the download limit no longer parses; return it raw)
+    if "json" in ctype:
+        try:
+            return json.dumps(json.loads(text), indent=2), "json"
+        except ValueError:
+            return text, "raw"
+    # HTML
+    if "text/html" in ctype or text[:256].lower().startswith(("<!doctype", "<html")):
+        if len(text) >= STREAMING_MIN_CHARS:
+            title, content = stream_extract(text, markdown=extract_mode == "markdown")
+            extractor = "lxml-stream"
+        else:
+            from readability import Document
+
+            doc = Document(text)
+            summary = doc.summary()
+            content = html_to_markdown(summary) if extract_mode == "markdown" else strip_tags(summary)
+            title = doc.title()
+            extractor = "readability"
+        return (f"# {title}\n\n{content}" if title else content), extractor
+    return text, "raw"
+
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: the agent process runs threads (asyncio.to_thread), which fork does not copy safely
+        _pool = ProcessPoolExecutor(
+            max_workers=min(os.cpu_count() or 1, MAX_WORKERS),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+async def extract_async(text: str, ctype: str, extract_mode: str) -> tuple[str, str]:
+    """extract() without blocking the event loop."""
+    if len(text) < OFFLOAD_MIN_CHARS:
+        return extract(text, ctype, extract_mode)
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_get_pool(), extract, text, ctype, extract_mode)
+    except (BrokenProcessPool, OSError, NotImplementedError) as e:
+        # No worker processes (sandbox, crashed worker): extract in a thread instead
+        logger.warning(f"Extraction worker unavailable, using a thread: {e}")
+        shutdown_extract_pool()
+        return await asyncio.to_thread(extract, text, ctype, extract_mode)
+
+
+def shutdown_extract_pool() -> None:
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,131 @@
+"""Shared, pooled HTTP client for tools, providers and channels."""
+
+import asyncio
+import importlib.util
+import weakref
+from collections import defaultdict
+from typing import AsyncIterator
+
+import httpx
+from loguru import logger
+
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 20
+KEEPALIVE_EXPIRY = 30.0
+MAX_CONNECTIONS_PER_HOST = 10
+DEFAULT_TIMEOUT = 30.0
+MAX_REDIRECTS = 5
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body that releases a per-host slot once it is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._release:
+                self._release()
+                self._release = None
+
+
+class PerHostLimitTransport(httpx.AsyncBaseTransport):
+    """Wraps a transport so at most max_per_host requests per host are in flight."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_per_host: int):
+        self._transport = transport
+        self._max_per_host = max_per_host
+        self._semaphores: dict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(self._max_per_host)
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        sem = self._semaphores[request.url.host]
+        await sem.acquire()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            sem.release()
+            raise
+        if response.is_stream_consumed:
+            # Body was already read by the inner transport; the slot is free now
+            sem.release()
+        else:
+            response.stream = _ReleasingStream(response.stream, sem.release)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class HttpClientPool:
+    """
+    Process-wide httpx clients with keep-alive, HTTP/2 (when ``h2`` is
+    installed) and a per-host connection cap.
+
+    httpx clients must not be shared across event loops, so one client is
+    kept per running loop. Callers must not close the returned client; use
+    ``aclose()`` (via ``close_http_clients``) at shutdown.
+    """
+
+    def __init__(self, max_per_host: int = MAX_CONNECTIONS_PER_HOST):
+        self.max_per_host = max_per_host
+        self._clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def get(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = self._clients[loop] = self._create()
+        return client
+
+    def _create(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        )
+        http2 = http2_available()
+        transport = httpx.AsyncHTTPTransport(http2=http2, limits=limits, retries=1)
+        logger.debug(f"Creating shared HTTP client (http2={http2}, per-host cap {self.max_per_host})")
+        return httpx.AsyncClient(
+            transport=PerHostLimitTransport(transport, self.max_per_host),
+            timeout=DEFAULT_TIMEOUT,
+            max_redirects=MAX_REDIRECTS,
+        )
+
+    async def aclose(self) -> None:
+        """Close the client of the current event loop."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        client = self._clients.pop(loop, None)
+        if client is not None and not client.is_closed:
+            await client.aclose()
+
+
+http_pool = HttpClientPool()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared client for the running event loop. Do not close it."""
+    return http_pool.get()
+
+
+async def close_http_clients() -> None:
+    await http_pool.aclose()
@@ -0,0 +1,172 @@
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from nanobot.agent.tools.shell import ExecScheduler, ExecTool, OutputCapture, format_progress
+
+
+def test_output_capture_keeps_head_and_tail_across_split_utf8() -> None:
+    capture = OutputCapture(head_chars=5, tail_chars=5)
+    data = ("héllo" + "x" * 1000 + "wörld").encode("utf-8")
+    for i in range(0, len(data), 3):  # Splits the multi-byte characters
+        capture.feed(data[i:i + 3])
+    capture.finish()
+
+    assert capture.total_bytes == len(data)
+    assert capture.text() == "héllo\n... (1000 chars omitted) ...\nwörld"
+
+
+async def test_exec_streams_large_output_with_bounded_result(tmp_path) -> None:
+    tool = ExecTool(working_dir=str(tmp_path), max_output=1000)
+    script = "import sys\nfor i in range(200000): print(i)\nsys.stderr.write('done\\n')\nsys.exit(3)"
+    (tmp_path / "big.py").write_text(script, encoding="utf-8")
+
+    result = await tool.execute(command=f"{sys.executable} big.py")
+
+    assert result.startswith("0\n1\n2\n")
+    assert "199999" in result
+    assert "STDERR:\ndone" in result
+    assert "Exit code: 3" in result
+    assert "bytes total, middle omitted]" in result
+    assert len(result) < 1500
+
+
+@pytest.mark.parametrize("persistent", [False, True])
+async def test_exec_reports_progress_on_a_timer_for_silent_commands(tmp_path, persistent) -> None:
+    reports: list[tuple[str, float, int, str]] = []
+
+    async def on_progress(command: str, elapsed: float, output_bytes: int, last_line: str) -> None:
+        reports.append((command, elapsed, output_bytes, last_line))
+
+    tool = ExecTool(
+        working_dir=str(tmp_path), persistent=persistent,
+        progress_callback=on_progress, progress_interval=0.2,
+    )
+    try:
+        assert await tool.execute(command="echo warming up; sleep 0.7") == "warming up\n"
+    finally:
+        await tool.close()
+
+    assert len(reports) >= 2  # Reported while no new output arrived
+    assert reports[0][0] == "echo warming up; sleep 0.7"
+    if not persistent:  # The session reader holds back a marker's length of output
+        assert reports[0][3] == "warming up"
+    assert reports[-1][1] > reports[0][1]
+    assert format_progress(*reports[0]).startswith("⏳ Still running `echo warming up; sleep 0.7`")
+
+
+async def test_exec_timeout_reports_partial_output(tmp_path) -> None:
+    tool = ExecTool(timeout=1, working_dir=str(tmp_path))
+    result = await tool.execute(command="echo started; exec sleep 5")
+    assert result.startswith("Error: Command timed out after 1 seconds")
+    assert "started" in result
+
+
+async def test_persistent_shell_keeps_state_per_session(tmp_path) -> None:
+    (tmp_path / "sub").mkdir()
+    tool = ExecTool(working_dir=str(tmp_path), persistent=True, timeout=2)
+    try:
+        tool.set_context("cli:a")
+        assert await tool.execute(command="cd sub && export GREETING=hi") == "(no output)"
+        assert await tool.execute(command='echo "$GREETING from $(basename $PWD)"') == "hi from sub\n"
+        result = await tool.execute(command="printf partial; echo oops >&2; false")
+        assert result == "partial\nSTDERR:\noops\n\n\nExit code: 1"
+        assert "syntax error" in await tool.execute(command="if then")
+        assert await tool.execute(command="echo still alive") == "still alive\n"
+
+        tool.set_context("cli:b")  # Other sessions get their own shell
+        assert await tool.execute(command='echo "[$GREETING]"') == "[]\n"
+
+        tool.set_context("cli:a")
+        timed_out = await tool.execute(command="sleep 5")
+        assert timed_out.startswith("Error: Command timed out after 2 seconds")
+        assert await tool.execute(command='echo "[$GREETING]"') == "[]\n"  # Fresh shell
+    finally:
+        await tool.close()
+
+
+async def test_persistent_shell_enforces_output_cap(tmp_path) -> None:
+    tool = ExecTool(
+        working_dir=str(tmp_path), persistent=True, timeout=5,
+        scheduler=ExecScheduler(max_output_bytes=100_000),
+    )
+    try:
+        assert await tool.execute(command="export GREETING=hi") == "(no output)"
+        result = await tool.execute(command="yes")
+        assert "[process killed: output exceeded 100000 bytes;" in result
+        assert await tool.execute(command='echo "[$GREETING]"') == "[]\n"  # Fresh shell
+    finally:
+        await tool.close()
+
+
+async def test_scheduler_limits_concurrency_per_session_and_globally(tmp_path) -> None:
+    scheduler = ExecScheduler(max_concurrent=2, max_per_session=1)
+    tools = []
+    for key in ("a", "a", "b", "c"):
+        tool = ExecTool(working_dir=str(tmp_path), scheduler=scheduler)
+        tool.set_context(key)
+        tools.append(tool)
+
+    start = time.monotonic()
+    results = await asyncio.gather(*(t.execute(command="sleep 0.3; echo ok") for t in tools))
+    elapsed = time.monotonic() - start
+
+    assert results == ["ok\n"] * 4
+    assert elapsed >= 0.6  # Never more than two at once
+    assert scheduler.running == 0 and scheduler.waiting == 0
+    assert not scheduler._sessions  # Idle per-session semaphores are dropped
+
+
+@pytest.mark.skipif(os.name == "nt", reason="process groups and rlimits are POSIX only")
+async def test_timeout_kills_process_group_and_limits_apply(tmp_path) -> None:
+    pid_file = tmp_path / "child.pid"
+    tool = ExecTool(timeout=1, working_dir=str(tmp_path))
+    result = await tool.execute(command=f"sleep 30 & echo $! > {pid_file}; wait")
+    assert result.startswith("Error: Command timed out")
+    await asyncio.sleep(0.1)
+    status = Path(f"/proc/{pid_file.read_text().strip()}/status")
+    if status.exists():  # Background child was killed too (possibly not yet reaped)
+        assert "zombie" in status.read_text()
+
+    limited = ExecTool(
+        working_dir=str(tmp_path), scheduler=ExecScheduler(max_open_files=16, max_output_bytes=100_000)
+    )
+    assert await limited.execute(command="ulimit -n") == "16\n"
+    result = await limited.execute(command="yes")
+    assert result.endswith("[process killed: output exceeded 100000 bytes]")
+
+
+def test_guard_blocks_same_commands_as_before(tmp_path) -> None:
+    tool = ExecTool(working_dir=str(tmp_path), restrict_to_workspace=True)
+    blocked = "Error: Command blocked by safety guard (dangerous pattern detected)"
+    assert tool._guard_command("ls && RM -rf build", str(tmp_path)) == blocked
+    assert tool._guard_command("sudo reboot", str(tmp_path)) == blocked
+    assert tool._guard_command("echo performance", str(tmp_path)) is None
+    assert tool._guard_command(f"cat {tmp_path}/a.txt > {tmp_path}/b.txt", str(tmp_path)) is None
+    assert "outside working dir" in tool._guard_command("cat /etc/passwd", str(tmp_path))
+    assert "path traversal" in tool._guard_command("cat ../secret", str(tmp_path))
+    assert tool._guard_command(".venv/bin/python -V", str(tmp_path)) is None
+
+    # Patterns that can't be merged into one alternation (backreference) still work
+    custom = ExecTool(deny_patterns=[r"(\w+) \1"], allow_patterns=[r"^echo\b", r"^ls\b"])
+    assert custom._guard_command("echo hello hello", ".") == blocked
+    assert custom._guard_command("echo hello world", ".") is None
+    assert "not in allowlist" in custom._guard_command("cat x", ".")
+
+
+def test_guard_resolves_paths_on_every_command(tmp_path) -> None:
+    workspace = tmp_path / "ws"
+    workspace.mkdir()
+    link = workspace / "link"
+    link.symlink_to(workspace)
+    tool = ExecTool(working_dir=str(workspace), restrict_to_workspace=True)
+    assert tool._guard_command(f"cat {link}/a.txt", str(workspace)) is None
+
+    # Swapping the symlink to point outside must be caught on the next command
+    link.unlink()
+    link.symlink_to(tmp_path)
+    assert "outside working dir" in tool._guard_command(f"cat {link}/a.txt", str(workspace))
@@ -0,0 +1,252 @@
+from pathlib import Path
+
+from nanobot.agent.tools.filesystem import (
+    EditFileTool,
+    ListDirTool,
+    ReadFilesTool,
+    ReadFileTool,
+    WriteFileTool,
+    fs_metrics,
+)
+
+
+async def test_tools_round_trip_through_fs_pool(tmp_path: Path) -> None:
+    fs_metrics.reset()
+    target = tmp_path / "sub" / "a.txt"
+
+    assert "Successfully wrote" in await WriteFileTool().execute(path=str(target), content="hello world")
+    assert await EditFileTool().execute(path=str(target), old_text="world", new_text="there") == (
+        f"Successfully edited {target}"
+    )
+    assert await ReadFileTool().execute(path=str(target)) == "hello there"
+    assert "📄 a.txt" in await ListDirTool().execute(path=str(target.parent))
+
+    stats = fs_metrics.snapshot()
+    assert {"read_file", "write_file", "edit_file", "list_dir"} <= stats.keys()
+    assert stats["read_file"]["calls"] == 1
+
+
+async def test_allowed_dir_is_enforced(tmp_path: Path) -> None:
+    tool = ReadFileTool(allowed_dir=tmp_path / "inside")
+    result = await tool.execute(path=str(tmp_path / "outside.txt"))
+    assert result.startswith("Error:") and "outside allowed directory" in result
+
+
+async def test_read_line_range_small_and_large_files(tmp_path: Path, monkeypatch) -> None:
+    import nanobot.agent.tools.filesystem as fs
+
+    path = tmp_path / "log.txt"
+    path.write_text("".join(f"line {i}\n" for i in range(1, 1001)), encoding="utf-8")
+    tool = ReadFileTool()
+
+    small = await tool.execute(path=str(path), offset=10, limit=3)
+    assert small == "line 10\nline 11\nline 12\n\n[lines 10-12 of 1000]"
+
+    # Force the mmap + line index path for the same file
+    monkeypatch.setattr(fs, "MMAP_THRESHOLD", 0)
+    large = await tool.execute(path=str(path), offset=10, limit=3, force=True)
+    assert large == small
+    numbered = await tool.execute(path=str(path), offset=999, limit=5, line_numbers=True)
+    assert numbered == "   999\tline 999\n  1000\tline 1000\n\n[lines 999-1000 of 1000]"
+    assert "past the end" in await tool.execute(path=str(path), offset=2000)
+
+
+async def test_read_lines_split_on_newline_only(tmp_path: Path, monkeypatch) -> None:
+    import nanobot.agent.tools.filesystem as fs
+
+    path = tmp_path / "mixed.txt"
+    path.write_bytes(b"one\x0cpage\ntwo\rcr\nthree\n")
+    tool = ReadFileTool()
+
+    small = await tool.execute(path=str(path), offset=2, limit=1, line_numbers=True)
+    assert small == "     2\ttwo\rcr\n\n[lines 2-2 of 3]"
+
+    monkeypatch.setattr(fs, "MMAP_THRESHOLD", 0)
+    assert await tool.execute(path=str(path), offset=2, limit=1, line_numbers=True, force=True) == small
+    assert (await tool.execute(path=str(path), offset=1, force=True)).endswith("[lines 1-3 of 3]")
+
+
+async def test_read_line_index_tracks_file_changes(tmp_path: Path, monkeypatch) -> None:
+    import os
+
+    import nanobot.agent.tools.filesystem as fs
+
+    monkeypatch.setattr(fs, "MMAP_THRESHOLD", 0)
+    path = tmp_path / "grow.txt"
+    path.write_text("a\nb\n", encoding="utf-8")
+    os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+    tool = ReadFileTool()
+    assert (await tool.execute(path=str(path), offset=2)).endswith("[lines 2-2 of 2]")
+
+    path.write_text("a\nb\nc\n", encoding="utf-8")
+    assert (await tool.execute(path=str(path), offset=2)).endswith("[lines 2-3 of 3]")
+
+
+async def test_read_byte_range(tmp_path: Path) -> None:
+    path = tmp_path / "data.txt"
+    path.write_text("0123456789", encoding="utf-8")
+    tool = ReadFileTool()
+
+    assert await tool.execute(path=str(path), byte_offset=2, byte_length=3) == "234\n\n[bytes 2-5 of 10]"
+    assert "either" in await tool.execute(path=str(path), offset=1, byte_offset=0)
+
+
+async def test_list_dir_recursive_with_gitignore_and_pagination(tmp_path: Path) -> None:
+    repo = tmp_path / "repo"
+    (repo / ".git").mkdir(parents=True)
+    (repo / ".gitignore").write_text("build/\n*.log\n", encoding="utf-8")
+    (repo / "src" / "pkg").mkdir(parents=True)
+    (repo / "src" / "main.py").write_text("x", encoding="utf-8")
+    (repo / "src" / "debug.log").write_text("x", encoding="utf-8")
+    (repo / "src" / "pkg" / "util.py").write_text("x", encoding="utf-8")
+    (repo / "build").mkdir()
+    (repo / "build" / "out.bin").write_text("x", encoding="utf-8")
+    tool = ListDirTool()
+
+    assert await tool.execute(path=str(repo), depth=3) == (
+        "📄 .gitignore\n📁 src\n📄 src/main.py\n📁 src/pkg\n📄 src/pkg/util.py"
+    )
+    # Rules from the repository root apply when listing a subdirectory
+    assert await tool.execute(path=str(repo / "src")) == "📄 main.py\n📁 pkg"
+    assert await tool.execute(path=str(repo), depth=3, pattern="*.py") == (
+        "📄 src/main.py\n📄 src/pkg/util.py"
+    )
+    assert "build/out.bin" in await tool.execute(path=str(repo), depth=2, gitignore=False)
+
+    page = await tool.execute(path=str(repo), depth=3, limit=2)
+    assert page == "📄 .gitignore\n📁 src\n\n[entries 1-2 of 5; use offset=2 to continue]"
+    page = await tool.execute(path=str(repo), depth=3, offset=4, limit=2)
+    assert page == "📄 src/pkg/util.py\n\n[entries 5-5 of 5]"
+
+    detailed = await tool.execute(path=str(repo / "src"), details=True)
+    assert detailed.startswith("📄 main.py  1 B  ")
+
+
+async def test_edit_batch_is_all_or_nothing(tmp_path: Path) -> None:
+    path = tmp_path / "app.py"
+    path.write_text("a = 1\nb = 2\nc = 1\n", encoding="utf-8")
+    tool = EditFileTool()
+
+    result = await tool.execute(path=str(path), edits=[
+        {"old_text": "a = 1", "new_text": "a = 10"},
+        {"old_text": "missing", "new_text": "x"},
+    ])
+    assert result.startswith("Error: edit 2 of 2") and "No changes were written" in result
+    assert path.read_text(encoding="utf-8") == "a = 1\nb = 2\nc = 1\n"
+
+    result = await tool.execute(path=str(path), edits=[
+        {"old_text": "b = 2", "new_text": "b = 20"},
+        {"old_text": "= 1\n", "new_text": "= 3\n", "replace_all": True},
+    ])
+    assert result == f"Successfully applied 2 edit(s) to {path}"
+    assert path.read_text(encoding="utf-8") == "a = 3\nb = 20\nc = 3\n"
+    assert [p.name for p in tmp_path.iterdir()] == ["app.py"]  # No temp files left behind
+
+
+async def test_edit_applies_multi_file_unified_diff(tmp_path: Path) -> None:
+    (tmp_path / "one.txt").write_text("alpha\nbeta\ngamma\ndelta\n", encoding="utf-8")
+    (tmp_path / "two.txt").write_text("x\ny\n", encoding="utf-8")
+    patch = (
+        "--- a/one.txt\n+++ b/one.txt\n"
+        "@@ -2,2 +2,2 @@\n beta\n-gamma\n+GAMMA\n"
+        "--- /dev/null\n+++ b/three.txt\n"
+        "@@ -0,0 +1,1 @@\n+new file\n"
+        "--- a/two.txt\n+++ b/two.txt\n"
+        "@@ -5,1 +5,1 @@\n-y\n+z\n"  # Wrong line number: located by context
+    )
+    tool = EditFileTool()
+
+    result = await tool.execute(path=str(tmp_path), patch=patch)
+    assert result.startswith("Successfully patched 3 file(s)")
+    assert (tmp_path / "one.txt").read_text(encoding="utf-8") == "alpha\nbeta\nGAMMA\ndelta\n"
+    assert (tmp_path / "two.txt").read_text(encoding="utf-8") == "x\nz\n"
+    assert (tmp_path / "three.txt").read_text(encoding="utf-8") == "new file\n"
+
+    bad = "--- a/one.txt\n+++ b/one.txt\n@@ -1,1 +1,1 @@\n-alpha\n+ALPHA\n--- a/two.txt\n+++ b/two.txt\n@@ -1,1 +1,1 @@\n-nope\n+q\n"
+    result = await tool.execute(path=str(tmp_path), patch=bad)
+    assert "hunk 1 does not apply" in result and "No changes were written" in result
+    assert (tmp_path / "one.txt").read_text(encoding="utf-8").startswith("alpha\n")
+
+
+async def test_edit_patch_rejects_renames_and_repeated_files(tmp_path: Path) -> None:
+    (tmp_path / "x.txt").write_text("one\ntwo\n", encoding="utf-8")
+    tool = EditFileTool()
+
+    rename = "--- a/x.txt\n+++ b/y.txt\n@@ -1,1 +1,1 @@\n-one\n+ONE\n"
+    result = await tool.execute(path=str(tmp_path), patch=rename)
+    assert result == "Error: Renames are not supported (x.txt -> y.txt). No changes were written."
+
+    twice = (
+        "--- a/x.txt\n+++ b/x.txt\n@@ -1,1 +1,1 @@\n-one\n+ONE\n"
+        "--- a/x.txt\n+++ b/x.txt\n@@ -2,1 +2,1 @@\n-two\n+TWO\n"
+    )
+    result = await tool.execute(path=str(tmp_path), patch=twice)
+    assert "x.txt has more than one file section" in result and "No changes were written" in result
+    assert (tmp_path / "x.txt").read_text(encoding="utf-8") == "one\ntwo\n"
+    assert not (tmp_path / "y.txt").exists()
+
+
+async def test_read_files_batches_with_errors_and_cap(tmp_path: Path) -> None:
+    (tmp_path / "a.txt").write_text("alpha\n", encoding="utf-8")
+    (tmp_path / "b.txt").write_text("".join(f"b{i}\n" for i in range(1, 6)), encoding="utf-8")
+    (tmp_path / "big.txt").write_text("x" * 5000, encoding="utf-8")
+    tool = ReadFilesTool()
+
+    result = await tool.execute(files=[
+        {"path": str(tmp_path / "a.txt")},
+        {"path": str(tmp_path / "missing.txt")},
+        {"path": str(tmp_path / "b.txt"), "offset": 2, "limit": 2},
+    ])
+    assert result == (
+        f"==> {tmp_path / 'a.txt'} <==\nalpha\n\n"
+        f"==> {tmp_path / 'missing.txt'} <==\nError: File not found: {tmp_path / 'missing.txt'}\n\n"
+        f"==> {tmp_path / 'b.txt'} <==\nb2\nb3\n\n[lines 2-3 of 5]\n\n"
+        "[3 files read, 1 with errors]"
+    )
+
+    result = await tool.execute(
+        files=[{"path": str(tmp_path / "big.txt")}, {"path": str(tmp_path / "a.txt")}], max_chars=1000
+    )
+    assert "[truncated: max_chars reached" in result
+    assert f"==> {tmp_path / 'a.txt'} <==\n[skipped: max_chars reached]" in result
+
+
+async def test_read_files_does_not_mark_cut_files_as_seen(tmp_path: Path) -> None:
+    (tmp_path / "big.txt").write_text("x" * 5000, encoding="utf-8")
+    (tmp_path / "small.txt").write_text("small\n", encoding="utf-8")
+    reader = ReadFileTool()
+    batch = ReadFilesTool(reader=reader)
+
+    result = await batch.execute(
+        files=[{"path": str(tmp_path / "big.txt")}, {"path": str(tmp_path / "small.txt")}], max_chars=1000
+    )
+    assert "[truncated: max_chars reached" in result and "[skipped: max_chars reached]" in result
+
+    # Neither file reached the model in full, so both are served again
+    assert await reader.execute(path=str(tmp_path / "big.txt")) == "x" * 5000
+    assert await reader.execute(path=str(tmp_path / "small.txt")) == "small\n"
+
+
+async def test_read_cache_serves_repeats_and_detects_changes(tmp_path: Path) -> None:
+    from nanobot.agent.tools.filesystem import ReadCache
+
+    path = tmp_path / "notes.txt"
+    path.write_text("one\ntwo\nthree\n", encoding="utf-8")
+    cache = ReadCache()
+    tool = ReadFileTool(cache=cache)
+    batch = ReadFilesTool(reader=tool)
+
+    assert await tool.execute(path=str(path)) == "one\ntwo\nthree\n"
+    marker = await tool.execute(path=str(path))
+    assert marker.startswith(f"[{path} unchanged since earlier read (3 lines)")
+    assert "unchanged since earlier read" in await batch.execute(files=[{"path": str(path)}])
+    assert await tool.execute(path=str(path), force=True) == "one\ntwo\nthree\n"
+
+    tool.reset_seen()  # New turn: content is served again, from memory
+    assert await tool.execute(path=str(path)) == "one\ntwo\nthree\n"
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 1 and stats["unchanged"] == 2
+
+    path.write_text("one\ntwo\nthree\nfour\n", encoding="utf-8")
+    assert await tool.execute(path=str(path)) == "one\ntwo\nthree\nfour\n"
+    assert cache.stats()["misses"] == 2
@@ -0,0 +1,32 @@
+from nanobot.utils import html_extract
+from nanobot.utils.html_extract import extract, extract_async, shutdown_extract_pool, stream_extract
+
+PAGE = """<!DOCTYPE html><html><head><title> Guide </title><script>var x = "<p>no</p>";</script></head>
+<body><nav><a href="/home">Home</a></nav><article>
+<h1>Install</h1><p>Run <a href="https://x.test/pip">pip</a> now.</p>
+<ul><li>first</li><li>second</li></ul></article></body></html>"""
+
+
+def test_stream_extract_markdown_and_text() -> None:
+    title, content = stream_extract(PAGE)
+    assert title == "Guide"
+    assert content == "# Install\n\nRun [pip](https://x.test/pip) now.\n\n- first\n- second"
+
+    _, text = stream_extract(PAGE, markdown=False)
+    assert text == "Install\n\nRun pip now.\n\nfirst\nsecond"
+
+
+def test_large_html_uses_streaming_extractor(monkeypatch) -> None:
+    monkeypatch.setattr(html_extract, "STREAMING_MIN_CHARS", 100)
+    text, extractor = extract(PAGE, "text/html", "markdown")
+    assert extractor == "lxml-stream" and text.startswith("# Guide\n\n# Install")
+
+
+async def test_extract_async_offloads_to_worker(monkeypatch) -> None:
+    monkeypatch.setattr(html_extract, "OFFLOAD_MIN_CHARS", 10)
+    try:
+        text, extractor = await extract_async(PAGE, "text/html", "markdown")
+        assert html_extract._pool is not None
+    finally:
+        shutdown_extract_pool()
+    assert extractor == "readability" and "pip" in text
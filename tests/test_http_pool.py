@@ -0,0 +1,36 @@
+import asyncio
+
+import httpx
+
+from nanobot.utils.http import HttpClientPool, PerHostLimitTransport
+
+
+async def test_pool_reuses_client_per_loop_and_recreates_after_close() -> None:
+    pool = HttpClientPool()
+    client = pool.get()
+    assert pool.get() is client
+    await pool.aclose()
+    assert client.is_closed
+    assert pool.get() is not client
+    await pool.aclose()
+
+
+async def test_per_host_limit_caps_in_flight_requests() -> None:
+    active = {"a.test": 0, "b.test": 0}
+    peak = {"a.test": 0, "b.test": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        active[host] += 1
+        peak[host] = max(peak[host], active[host])
+        await asyncio.sleep(0.02)
+        active[host] -= 1
+        return httpx.Response(200, text="ok")
+
+    transport = PerHostLimitTransport(httpx.MockTransport(handler), max_per_host=2)
+    async with httpx.AsyncClient(transport=transport) as client:
+        urls = [f"https://{host}/{i}" for host in ("a.test", "b.test") for i in range(6)]
+        responses = await asyncio.gather(*(client.get(u) for u in urls))
+
+    assert all(r.text == "ok" for r in responses)
+    assert peak == {"a.test": 2, "b.test": 2}
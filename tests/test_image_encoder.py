@@ -0,0 +1,33 @@
+import base64
+import io
+from pathlib import Path
+
+import pytest
+
+from nanobot.agent.media import ImageEncoder
+
+
+async def test_non_image_and_missing_files_are_skipped(tmp_path: Path) -> None:
+    text_file = tmp_path / "notes.txt"
+    text_file.write_text("hi")
+    encoder = ImageEncoder()
+
+    assert await encoder.encode(str(text_file)) is None
+    assert await encoder.encode(str(tmp_path / "missing.png")) is None
+
+
+async def test_large_image_is_downscaled_and_cached(tmp_path: Path) -> None:
+    pil_image = pytest.importorskip("PIL.Image")
+    path = tmp_path / "photo.png"
+    pil_image.new("RGB", (4000, 3000), (200, 30, 30)).save(path)
+    encoder = ImageEncoder(max_dimension=800)
+
+    url = await encoder.encode(str(path))
+    assert url.startswith("data:image/jpeg;base64,")
+    with pil_image.open(io.BytesIO(base64.b64decode(url.split(",", 1)[1]))) as img:
+        assert max(img.size) == 800
+
+    # Same content under another name is served from the content-hash cache
+    copy = tmp_path / "copy.png"
+    copy.write_bytes(path.read_bytes())
+    assert await encoder.encode(str(copy)) is url
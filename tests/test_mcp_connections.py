@@ -0,0 +1,190 @@
+import asyncio
+from types import SimpleNamespace
+
+import anyio
+
+from nanobot.agent.tools import mcp as mcp_mod
+from nanobot.agent.tools.mcp import MCPManager, minify_schema
+from nanobot.agent.tools.registry import ToolRegistry
+
+
+class FakeSession:
+    def __init__(self, tools: list[str]):
+        self.tools = tools
+        self.alive = True
+
+    async def list_tools(self):
+        return SimpleNamespace(tools=[
+            SimpleNamespace(name=t, description=t, inputSchema={"type": "object", "properties": {}})
+            for t in self.tools
+        ])
+
+    async def send_ping(self):
+        if not self.alive:
+            raise anyio.ClosedResourceError()
+
+    async def call_tool(self, name, arguments=None):
+        if not self.alive:
+            raise anyio.ClosedResourceError()
+        return SimpleNamespace(content=[])
+
+
+def _cfg(**kw):
+    return SimpleNamespace(command="fake", args=[], env={}, url="", **kw)
+
+
+async def test_servers_connect_concurrently_and_slow_ones_time_out(monkeypatch) -> None:
+    sessions = {"fast": FakeSession(["a", "b"]), "slow": FakeSession(["c"])}
+
+    async def fake_open(self, stack):
+        await asyncio.sleep(10 if self.name == "slow" else 0.05)
+        return sessions[self.name]
+
+    monkeypatch.setattr(mcp_mod.MCPServerConnection, "_open", fake_open)
+    monkeypatch.setattr(mcp_mod, "INITIAL_BACKOFF", 30)
+    registry = ToolRegistry()
+    manager = MCPManager({"fast": _cfg(), "slow": _cfg(connect_timeout=0.2)}, registry)
+
+    manager.start()
+    assert registry.tool_names == []  # start() does not block
+    start = asyncio.get_running_loop().time()
+    await manager.wait_ready()
+    assert asyncio.get_running_loop().time() - start < 1
+
+    assert sorted(registry.tool_names) == ["mcp_fast_a", "mcp_fast_b"]
+    assert manager.status()["slow"] == {
+        "connected": False, "tools": 0, "failures": 1, "schema_tokens_saved": 0,
+    }
+    await manager.close()
+    assert registry.tool_names == []
+
+
+async def test_dead_session_is_reconnected(monkeypatch) -> None:
+    opened: list[FakeSession] = []
+
+    async def fake_open(self, stack):
+        opened.append(FakeSession(["t"]))
+        return opened[-1]
+
+    monkeypatch.setattr(mcp_mod.MCPServerConnection, "_open", fake_open)
+    monkeypatch.setattr(mcp_mod, "INITIAL_BACKOFF", 0.01)
+    registry = ToolRegistry()
+    manager = MCPManager({"srv": _cfg()}, registry)
+    manager.start()
+    await manager.wait_ready()
+
+    opened[0].alive = False
+    result = await registry.execute("mcp_srv_t", {})
+    assert "disconnected" in result
+
+    for _ in range(100):
+        if len(opened) == 2 and registry.has("mcp_srv_t"):
+            break
+        await asyncio.sleep(0.01)
+    assert len(opened) == 2 and registry.has("mcp_srv_t")
+    await manager.close()
+
+
+class SlowSession(FakeSession):
+    def __init__(self):
+        super().__init__([])
+        self.active = self.peak = self.calls = 0
+
+    async def list_tools(self):
+        return SimpleNamespace(tools=[
+            SimpleNamespace(name=name, description=name, inputSchema=None,
+                            annotations=SimpleNamespace(readOnlyHint=name == "lookup"))
+            for name in ("lookup", "write", "hang")
+        ])
+
+    async def call_tool(self, name, arguments=None):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(10 if name == "hang" else 0.02)
+        finally:
+            self.active -= 1
+        return SimpleNamespace(content=[], isError=False)
+
+
+async def test_calls_are_limited_timed_out_and_read_only_results_cached(monkeypatch) -> None:
+    session = SlowSession()
+
+    async def fake_open(self, stack):
+        return session
+
+    monkeypatch.setattr(mcp_mod.MCPServerConnection, "_open", fake_open)
+    mcp_mod.mcp_metrics.reset()
+    registry = ToolRegistry()
+    manager = MCPManager({"srv": _cfg(max_concurrent=2, call_timeout=0.1, cache_ttl=60)}, registry)
+    manager.start()
+    await manager.wait_ready()
+
+    await asyncio.gather(*(registry.execute("mcp_srv_write", {"n": i}) for i in range(6)))
+    assert session.peak == 2
+
+    assert "timed out" in await registry.execute("mcp_srv_hang", {})
+
+    calls = session.calls
+    for _ in range(3):
+        await registry.execute("mcp_srv_lookup", {"q": "x"})
+    await registry.execute("mcp_srv_write", {"n": 0})
+    assert session.calls == calls + 2  # lookup once, write always
+
+    metrics = manager.metrics()
+    assert metrics["mcp_srv_hang"]["timeouts"] == 1
+    assert metrics["mcp_srv_lookup"]["cache_hits"] == 2
+    assert metrics["mcp_srv_write"]["calls"] == 7
+    await manager.close()
+
+
+def test_minify_schema_strips_keywords_not_property_names() -> None:
+    schema = {
+        "$schema": "http://json-schema.org/draft-07/schema#",
+        "title": "Args",
+        "type": "object",
+        "properties": {
+            "title": {"type": "string", "title": "Title", "examples": ["x"]},
+            "limit": {"type": "integer", "default": 10},
+            "query": {"type": "string", "default": "", "description": "Word " * 200},
+            "tags": {"type": "array", "items": {"type": "string", "title": "Tag", "default": None}},
+        },
+        "required": ["title", "query"],
+    }
+    out = minify_schema(schema)
+    assert set(out) == {"type", "properties", "required"}
+    props = out["properties"]
+    assert props["title"] == {"type": "string"}
+    assert props["limit"] == {"type": "integer", "default": 10}
+    assert "default" not in props["query"]
+    assert len(props["query"]["description"]) <= 257 and props["query"]["description"].endswith("…")
+    assert props["tags"]["items"] == {"type": "string"}
+    assert schema["properties"]["title"]["title"] == "Title"  # input untouched
+
+
+async def test_tool_list_changed_updates_registry_incrementally(monkeypatch) -> None:
+    session = FakeSession(["a", "b"])
+
+    async def fake_open(self, stack):
+        return session
+
+    monkeypatch.setattr(mcp_mod.MCPServerConnection, "_open", fake_open)
+    registry = ToolRegistry()
+    manager = MCPManager({"srv": _cfg()}, registry)
+    manager.start()
+    await manager.wait_ready()
+
+    session.tools = ["a", "c"]
+    await manager.connections["srv"]._on_message(
+        SimpleNamespace(root=SimpleNamespace(method="notifications/tools/list_changed"))
+    )
+    for _ in range(50):
+        if "mcp_srv_c" in registry:
+            break
+        await asyncio.sleep(0.01)
+
+    assert sorted(registry.tool_names) == ["mcp_srv_a", "mcp_srv_c"]
+    assert manager.status()["srv"]["connected"]
+    await registry.execute("mcp_srv_c", {})
+    await manager.close()
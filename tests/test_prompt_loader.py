@@ -0,0 +1,62 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from nanobot.agent.context import PromptLoader, PromptRegistry
+
+
+def _write(path: Path, body: str, mtime_ns: int | None = None) -> None:
+    path.write_text(body, encoding="utf-8")
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_get_formats_compiled_template(tmp_path: Path) -> None:
+    path = tmp_path / "CONTEXT.md"
+    _write(path, "# ===[Greeting START]===\nHi {name}, see {{skill-name}}\n# ===[Greeting END]===\n")
+
+    loader = PromptLoader(path)
+    assert loader.get("Greeting", name="Ada") == "Hi Ada, see {skill-name}"
+    assert loader.get("Missing") == ""
+
+
+def test_unknown_placeholder_fails_at_load(tmp_path: Path) -> None:
+    path = tmp_path / "CONTEXT.md"
+    _write(path, "# ===[Identity START]===\nNow: {now} {typo}\n# ===[Identity END]===\n")
+
+    with pytest.raises(ValueError, match="typo"):
+        PromptLoader(path)
+
+
+def test_template_blocks_with_lone_braces_load_as_raw_text(tmp_path: Path) -> None:
+    path = tmp_path / "CONTEXT.md"
+    _write(
+        path,
+        "# ===[Identity START]===\nNow: {now}\n# ===[Identity END]===\n"
+        "# ===[Template: USER.md START]===\nUse } to close a block\n# ===[Template: USER.md END]===\n",
+    )
+
+    loader = PromptLoader(path)
+    assert loader.get("Identity", now="t") == "Now: t"
+    assert loader.prompts["Template: USER.md"] == "Use } to close a block"
+
+def test_reloads_on_mtime_change_and_keeps_old_on_error(tmp_path: Path) -> None:
+    path = tmp_path / "CONTEXT.md"
+    _write(path, "# ===[Identity START]===\nv1 {now}\n# ===[Identity END]===\n", mtime_ns=1_000_000_000)
+    loader = PromptLoader(path)
+    assert loader.get("Identity", now="t") == "v1 t"
+
+    _write(path, "# ===[Identity START]===\nv2 {now}\n# ===[Identity END]===\n", mtime_ns=2_000_000_000)
+    assert loader.get("Identity", now="t") == "v2 t"
+
+    _write(path, "# ===[Identity START]===\nv3 {bogus}\n# ===[Identity END]===\n", mtime_ns=3_000_000_000)
+    assert loader.get("Identity", now="t") == "v2 t"
+
+
+def test_registry_shares_loader_per_path(tmp_path: Path) -> None:
+    path = tmp_path / "CONTEXT.md"
+    _write(path, "# ===[A START]===\na\n# ===[A END]===\n")
+    registry = PromptRegistry()
+
+    assert registry.get(path) is registry.get(tmp_path / "." / "CONTEXT.md")
@@ -0,0 +1,120 @@
+from pathlib import Path
+
+from nanobot.agent.tools.search import (
+    MAX_INDEXED_FILE_SIZE,
+    SearchTool,
+    TrigramIndex,
+    required_literals,
+)
+from nanobot.utils.gitignore import GitIgnore, is_ignored
+
+
+def _make_tree(root: Path) -> None:
+    (root / "src").mkdir(parents=True)
+    (root / "src" / "app.py").write_text("import os\n\ndef handle_request(req):\n    return req\n")
+    (root / "src" / "util.py").write_text("def helper():\n    pass\n")
+    (root / "build").mkdir()
+    (root / "build" / "app.py").write_text("def handle_request(): ...\n")
+    (root / "notes.log").write_text("handle_request called\n")
+    (root / ".gitignore").write_text("build/\n*.log\n")
+
+
+def test_required_literals() -> None:
+    assert required_literals(r"def handle_\w+\(", ignore_case=True) == ["def handle_"]
+    assert required_literals(r"foo(bar|baz)qux", ignore_case=False) == ["foo", "qux"]
+    assert required_literals(r"a|bcdef", ignore_case=False) == []
+    assert required_literals(r"(", ignore_case=False) == []
+
+
+async def test_search_falls_back_to_full_scan_without_regex_parser(tmp_path: Path, monkeypatch) -> None:
+    import nanobot.agent.tools.search as search
+
+    monkeypatch.setattr(search, "sre_parse", None)
+    assert required_literals(r"def handle_\w+", ignore_case=True) == []
+
+    root = tmp_path / "ws"
+    _make_tree(root)
+    result = await SearchTool(root=root, index_dir=tmp_path / "idx").execute(pattern=r"def handle_\w+")
+    assert result.startswith("Found 1 matches in 1 files")
+
+def test_gitignore_rules() -> None:
+    specs = [GitIgnore(["build/", "*.log", "!keep.log", "/top.txt"])]
+    assert is_ignored(specs, "build", True)
+    assert not is_ignored(specs, "build", False)
+    assert is_ignored(specs, "a/b/c.log", False)
+    assert not is_ignored(specs, "keep.log", False)
+    assert is_ignored(specs, "top.txt", False)
+    assert not is_ignored(specs, "sub/top.txt", False)
+    assert is_ignored([], ".git", True)
+
+
+async def test_search_respects_gitignore_and_returns_context(tmp_path: Path) -> None:
+    root = tmp_path / "ws"
+    _make_tree(root)
+    tool = SearchTool(root=root, index_dir=tmp_path / "idx")
+
+    result = await tool.execute(pattern=r"def handle_\w+", context=1)
+    assert result.startswith("Found 1 matches in 1 files")
+    assert "src/app.py:3: def handle_request(req):" in result
+    assert "src/app.py-2- " in result
+    assert "build/" not in result and "notes.log" not in result
+
+    assert (await tool.execute(pattern="helper", glob="*.txt")).startswith("No matches")
+    assert "Error: Invalid regex" in await tool.execute(pattern="(")
+
+
+async def test_index_updates_incrementally_and_persists(tmp_path: Path) -> None:
+    root = tmp_path / "ws"
+    _make_tree(root)
+    index_file = tmp_path / "idx" / "ws.idx"
+
+    index = TrigramIndex(root, index_file)
+    index.refresh(force=True)
+    assert sorted(index.candidates(["handle_request"])) == ["src/app.py"]
+
+    saved = index_file.read_bytes()
+
+    (root / "src" / "new.py").write_text("x = handle_request(None)\n")
+    (root / "src" / "util.py").unlink()
+    index.refresh(force=True)
+    assert sorted(index.candidates(["handle_request"])) == ["src/app.py", "src/new.py"]
+    assert "src/util.py" not in index.candidates([])
+    assert index_file.read_bytes() == saved  # Saves are batched
+
+    index.flush()
+    appended = index_file.read_bytes()
+    assert appended.startswith(saved) and len(appended) > len(saved)  # Only the changes are appended
+
+    reloaded = TrigramIndex(root, index_file)
+    assert len(reloaded) == len(index)
+    assert sorted(reloaded.candidates(["handle_request"])) == ["src/app.py", "src/new.py"]
+
+    # A torn append loses only the last records; their files are re-indexed
+    index_file.write_bytes(appended[:-3])
+    torn = TrigramIndex(root, index_file)
+    assert "src/app.py" in torn.candidates([])
+    torn.refresh(force=True)
+    assert sorted(torn.candidates(["handle_request"])) == ["src/app.py", "src/new.py"]
+    assert sorted(TrigramIndex(root, index_file).candidates([])) == sorted(index.candidates([]))
+
+
+async def test_unindexed_text_files_are_searched_and_binaries_skipped(tmp_path: Path) -> None:
+    root = tmp_path / "ws"
+    root.mkdir()
+    big = "log line without the marker\n" * 50000 + "needle_here\n"
+    assert len(big) > MAX_INDEXED_FILE_SIZE
+    (root / "big.txt").write_text(big)
+    (root / "blob.bin").write_bytes(b"\0\1needle_here\0")
+    (root / "small.txt").write_text("nothing to see\n")
+    index_file = tmp_path / "idx" / "ws.idx"
+
+    index = TrigramIndex(root, index_file)
+    index.refresh(force=True)
+    assert index.candidates(["needle_here"]) == ["big.txt"]
+    assert sorted(index.candidates([])) == ["big.txt", "small.txt"]
+    assert TrigramIndex(root, index_file).candidates(["needle_here"]) == ["big.txt"]
+
+    tool = SearchTool(root=root, index_dir=tmp_path / "idx2")
+    result = await tool.execute(pattern="needle_here")
+    assert result.startswith("Found 1 matches in 1 files")
+    assert "big.txt:50001: needle_here" in result
@@ -0,0 +1,68 @@
+import os
+from pathlib import Path
+
+from nanobot.agent.skills import SkillsLoader
+
+
+def _write_skill(root: Path, name: str, description: str, body: str, extra: str = "") -> None:
+    skill_dir = root / name
+    skill_dir.mkdir(parents=True)
+    (skill_dir / "SKILL.md").write_text(
+        f"---\nname: {name}\ndescription: {description}\n{extra}---\n\n{body}\n",
+        encoding="utf-8",
+    )
+
+
+def _make_loader(tmp_path: Path, **kwargs) -> SkillsLoader:
+    skills = tmp_path / "workspace" / "skills"
+    _write_skill(skills, "weather", "Get current weather and forecasts.", "Use curl wttr.in for forecast.")
+    _write_skill(skills, "github", "Interact with GitHub pull requests and issues.", "Use the gh CLI.")
+    _write_skill(skills, "tmux", "Remote-control tmux sessions.", "Send keystrokes to panes.")
+    _write_skill(skills, "memory", "Two-layer memory system.", "Write facts.", extra="always: true\n")
+    builtin = tmp_path / "builtin"
+    builtin.mkdir()
+    return SkillsLoader(tmp_path / "workspace", builtin_skills_dir=builtin, **kwargs)
+
+
+def test_summary_lists_relevant_and_pinned_skills(tmp_path: Path) -> None:
+    loader = _make_loader(tmp_path, pinned=["tmux"])
+    summary = loader.build_skills_summary("What's the weather forecast in Taipei?")
+
+    assert "<name>weather</name>" in summary
+    assert "<name>tmux</name>" in summary  # pinned
+    assert "<name>memory</name>" in summary  # always
+    assert "<name>github</name>" not in summary
+    assert '<omitted count="1">' in summary
+
+
+def test_summary_without_query_lists_everything(tmp_path: Path) -> None:
+    loader = _make_loader(tmp_path)
+    summary = loader.build_skills_summary()
+
+    for name in ("weather", "github", "tmux", "memory"):
+        assert f"<name>{name}</name>" in summary
+    assert "<omitted" not in summary
+
+
+def test_summary_respects_token_budget(tmp_path: Path) -> None:
+    loader = _make_loader(tmp_path, max_tokens=1)
+    summary = loader.build_skills_summary("weather forecast for github issues")
+
+    assert "<name>memory</name>" in summary
+    assert "<name>weather</name>" not in summary
+    assert "<name>github</name>" not in summary
+
+
+def test_index_picks_up_edited_skills(tmp_path: Path) -> None:
+    loader = _make_loader(tmp_path)
+    skill_file = tmp_path / "workspace" / "skills" / "tmux" / "SKILL.md"
+    os.utime(skill_file, ns=(1_000_000_000, 1_000_000_000))
+    assert "<name>tmux</name>" not in loader.build_skills_summary("deploy kubernetes cluster")
+
+    # Rewritten within the timestamp granularity: same mtime, different size
+    skill_file.write_text(
+        "---\nname: tmux\ndescription: Deploy a kubernetes cluster.\n---\n\nkubectl apply\n",
+        encoding="utf-8",
+    )
+    os.utime(skill_file, ns=(1_000_000_000, 1_000_000_000))
+    assert "<name>tmux</name>" in loader.build_skills_summary("deploy kubernetes cluster")
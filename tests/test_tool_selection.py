@@ -0,0 +1,121 @@
+import shutil
+from pathlib import Path
+from typing import Any
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.agent.tool_selection import ToolSelector
+from nanobot.agent.tools.base import Tool
+from nanobot.agent.tools.registry import ToolRegistry
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+
+WORKSPACE_TEMPLATE = Path(__file__).parent.parent / "nanobot" / "workspace"
+
+
+class NamedTool(Tool):
+    def __init__(self, name: str, description: str, params: dict[str, Any] | None = None):
+        self._name = name
+        self._description = description
+        self._params = params or {}
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def description(self) -> str:
+        return self._description
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {"type": "object", "properties": self._params}
+
+    async def execute(self, **kwargs: Any) -> str:
+        return f"{self._name} ok"
+
+
+def _registry() -> ToolRegistry:
+    registry = ToolRegistry()
+    for tool in (
+        NamedTool("read_file", "Read the contents of a file."),
+        NamedTool("exec", "Run a shell command."),
+        NamedTool("cron", "Schedule reminders and recurring tasks.", {"every_seconds": {"type": "integer"}}),
+        NamedTool("lsp_hover", "Show type information for a symbol in source code."),
+        NamedTool("spawn", "Spawn a subagent to handle a task in the background."),
+        NamedTool("mcp_gh_list_issues", "List issues in a GitHub repository.", {"repo": {"type": "string"}}),
+    ):
+        registry.register(tool)
+    return registry
+
+
+def _names(defs: list[dict[str, Any]]) -> list[str]:
+    return [d["function"]["name"] for d in defs]
+
+
+def test_selects_pinned_recent_and_relevant_tools() -> None:
+    registry = _registry()
+    selector = ToolSelector(registry, top_k=2, pinned=["read_file", "exec"])
+
+    selected = selector.select("Remind me every morning to water the plants", recent=["spawn"])
+    assert _names(selected) == ["read_file", "exec", "cron", "spawn"]
+    assert selector.omitted(selected) == ["lsp_hover", "mcp_gh_list_issues"]
+    assert selector.record(selected) > 0
+    assert selector.stats["sent_tokens"] < selector.stats["full_tokens"]
+
+    # Tools registered later (e.g. by an MCP server) are indexed too
+    registry.register(NamedTool("mcp_wx_forecast", "Weather forecast for a city."))
+    assert "mcp_wx_forecast" in _names(selector.select("weather forecast in Taipei"))
+
+
+def test_selection_disabled_or_not_dropping_anything_sends_everything() -> None:
+    registry = _registry()
+    assert len(ToolSelector(registry, top_k=0).select("anything")) == len(registry)
+    everything = ToolSelector(registry, pinned=registry.tool_names)
+    assert len(everything.select("anything")) == len(registry)
+
+
+def test_recent_tools_come_from_recent_assistant_turns() -> None:
+    selector = ToolSelector(ToolRegistry(), recent_turns=2)
+    messages = [
+        {"role": "assistant", "content": "", "tools_used": ["cron"]},
+        {"role": "user", "content": "hi"},
+        {"role": "assistant", "content": "", "tools_used": ["exec", "exec"]},
+        {"role": "assistant", "content": ""},
+    ]
+    assert selector.recent_tools(messages) == ["exec"]
+
+
+class ScriptedProvider(LLMProvider):
+    def __init__(self, responses: list[LLMResponse]):
+        super().__init__()
+        self.responses = responses
+        self.tool_names: list[list[str]] = []
+        self.system_prompts: list[str] = []
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+        self.tool_names.append(_names(tools or []))
+        self.system_prompts.append(messages[0]["content"])
+        return self.responses.pop(0)
+
+    def get_default_model(self) -> str:
+        return "test"
+
+
+async def test_unlisted_tool_call_attaches_every_tool(tmp_path: Path) -> None:
+    shutil.copy(WORKSPACE_TEMPLATE / "CONTEXT.md", tmp_path / "CONTEXT.md")
+    provider = ScriptedProvider([
+        LLMResponse(content=None, tool_calls=[ToolCallRequest(id="1", name="lsp_hover", arguments={})]),
+        LLMResponse(content="done"),
+    ])
+    loop = AgentLoop(MessageBus(), provider, tmp_path)
+    loop.tool_selector.pinned = ["read_file"]
+
+    content, used = await loop._run_agent_loop(
+        [{"role": "system", "content": "sys"}, {"role": "user", "content": "hello"}], query="hello"
+    )
+
+    assert content == "done" and used == ["lsp_hover"]
+    assert provider.tool_names[0] == ["read_file"]
+    assert "lsp_hover" in provider.system_prompts[0]  # Named in the Other Tools note
+    assert sorted(provider.tool_names[1]) == sorted(loop.tools.tool_names)
+    assert loop.tool_selector.stats["requests"] == 1
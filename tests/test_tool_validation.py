@@ -86,3 +86,136 @@ async def test_registry_returns_validation_error() -> None:
     reg.register(SampleTool())
     result = await reg.execute("sample", {"query": "hi"})
     assert "Invalid parameters" in result
+
+
+class StrictTool(SampleTool):
+    parameter_reads = 0
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        StrictTool.parameter_reads += 1
+        return {
+            "type": "object",
+            "properties": {
+                "id": {"type": "string", "pattern": "^[a-z]+-[0-9]+$"},
+                "tags": {"type": "array", "items": {"type": "string"}, "minItems": 1},
+                "limit": {"type": "integer", "default": 10},
+                "note": {"type": ["string", "null"], "maxLength": 3},
+                "target": {
+                    "oneOf": [
+                        {"type": "object", "properties": {"path": {"type": "string"}}, "required": ["path"]},
+                        {"type": "object", "properties": {"url": {"type": "string"}}, "required": ["url"]},
+                    ]
+                },
+                "tree": {"$ref": "#/$defs/node"},
+            },
+            "required": ["id"],
+            "additionalProperties": False,
+            "$defs": {
+                "node": {
+                    "type": "object",
+                    "properties": {
+                        "name": {"type": "string"},
+                        "children": {"type": "array", "items": {"$ref": "#/$defs/node"}},
+                    },
+                },
+            },
+        }
+
+
+def test_validate_params_pattern_min_items_and_additional_properties() -> None:
+    tool = StrictTool()
+    errors = tool.validate_params({"id": "ABC", "tags": [], "extra": 1})
+    assert errors == [
+        "id must match pattern ^[a-z]+-[0-9]+$",
+        "tags must have at least 1 items",
+        "unexpected parameter extra",
+    ]
+
+
+def test_validate_params_one_of_nullable_and_recursive_refs() -> None:
+    tool = StrictTool()
+    assert tool.validate_params({"id": "a-1", "note": None, "target": {"path": "x"}}) == []
+    errors = tool.validate_params({
+        "id": "a-1",
+        "note": "long",
+        "target": {"path": "x", "url": "y"},
+        "tree": {"children": [{"name": "a"}, {"children": [{"name": 1}]}]},
+    })
+    assert errors == [
+        "note must be at most 3 chars",
+        "target matches more than one of the allowed schemas",
+        "tree.children[1].children[0].name should be string",
+    ]
+    assert tool.validate_params({"id": "a-1", "target": {}}) == [
+        "target does not match any of the allowed schemas"
+    ]
+
+
+def test_validate_params_fills_defaults_and_compiles_once() -> None:
+    tool = StrictTool()
+    reads = StrictTool.parameter_reads
+    params = {"id": "a-1"}
+    assert tool.validate_params(params) == []
+    assert params == {"id": "a-1", "limit": 10}
+    tool.validate_params({"id": "b-2"})
+    assert StrictTool.parameter_reads == reads + 1
+
+
+class ChoiceTool(SampleTool):
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "target": {
+                    "oneOf": [
+                        {
+                            "type": "object",
+                            "properties": {
+                                "kind": {"const": "file"},
+                                "path": {"type": "string"},
+                                "encoding": {"type": "string", "default": "utf-8"},
+                            },
+                            "required": ["kind", "path"],
+                            "additionalProperties": False,
+                        },
+                        {
+                            "type": "object",
+                            "properties": {
+                                "kind": {"const": "url"},
+                                "url": {"type": "string"},
+                                "timeout": {"type": "integer", "default": 30},
+                            },
+                            "required": ["kind", "url"],
+                            "additionalProperties": False,
+                        },
+                    ]
+                },
+            },
+        }
+
+
+def test_validate_params_applies_defaults_of_the_matching_branch_only() -> None:
+    tool = ChoiceTool()
+    params = {"target": {"kind": "url", "url": "http://x"}}
+    assert tool.validate_params(params) == []
+    assert params == {"target": {"kind": "url", "url": "http://x", "timeout": 30}}
+
+    params = {"target": {"kind": "url"}}
+    assert tool.validate_params(params) == ["target does not match any of the allowed schemas"]
+    assert params == {"target": {"kind": "url"}}  # Invalid params are left untouched
+
+
+def test_mcp_tools_forward_params_without_defaults() -> None:
+    from types import SimpleNamespace
+
+    from nanobot.agent.tools.mcp import MCPToolWrapper
+
+    tool_def = SimpleNamespace(
+        name="fetch", description="", inputSchema=ChoiceTool().parameters, annotations=None
+    )
+    wrapper = MCPToolWrapper(None, "srv", tool_def)
+    params = {"target": {"kind": "url", "url": "http://x"}}
+    assert wrapper.validate_params(params) == []
+    assert params == {"target": {"kind": "url", "url": "http://x"}}
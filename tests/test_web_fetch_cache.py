@@ -0,0 +1,94 @@
+import json
+
+import httpx
+import pytest
+
+from nanobot.agent.tools import web
+from nanobot.agent.tools.web import WebFetchTool
+from nanobot.agent.tools.web_cache import WebCache, freshness_lifetime
+
+PAGE = "<html><head><title>Docs</title></head><body><article><p>Hello cache</p></article></body></html>"
+
+
+@pytest.fixture
+def server(monkeypatch):
+    state = {"requests": [], "headers": {}}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        state["requests"].append(request)
+        etag = state["headers"].get("etag")
+        if etag and request.headers.get("if-none-match") == etag:
+            return httpx.Response(304, headers=state["headers"])
+        return httpx.Response(200, headers={"content-type": "text/html", **state["headers"]}, text=PAGE)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(web, "get_http_client", lambda: client)
+    return state
+
+
+async def test_fresh_response_is_served_from_cache(tmp_path, server) -> None:
+    server["headers"] = {"cache-control": "max-age=300"}
+    tool = WebFetchTool(cache=WebCache(tmp_path))
+
+    first = json.loads(await tool.execute("https://docs.test/page"))
+    second = json.loads(await tool.execute("https://docs.test/page"))
+    # Another extract mode is produced from the stored body, still without a request
+    text = json.loads(await tool.execute("https://docs.test/page", extractMode="text"))
+
+    assert len(server["requests"]) == 1
+    assert first["cached"] is False and second["cached"] is True
+    assert second["text"] == first["text"] and "Hello cache" in text["text"]
+
+    await tool.execute("https://docs.test/page", bypass_cache=True)
+    assert len(server["requests"]) == 2
+
+
+async def test_stale_response_is_revalidated_with_etag(tmp_path, server) -> None:
+    server["headers"] = {"cache-control": "no-cache", "etag": '"v1"'}
+    tool = WebFetchTool(cache=WebCache(tmp_path))
+
+    await tool.execute("https://docs.test/page")
+    result = json.loads(await tool.execute("https://docs.test/page"))
+
+    assert server["requests"][1].headers["if-none-match"] == '"v1"'
+    assert result["cached"] is True and "Hello cache" in result["text"]
+    assert tool.cache.stats()["revalidated"] == 1
+
+
+async def test_no_store_is_not_cached(tmp_path, server) -> None:
+    server["headers"] = {"cache-control": "no-store", "etag": '"v1"'}
+    tool = WebFetchTool(cache=WebCache(tmp_path))
+
+    await tool.execute("https://docs.test/page")
+    await tool.execute("https://docs.test/page")
+
+    assert len(server["requests"]) == 2
+    assert tool.cache.stats()["entries"] == 0
+
+
+def test_cache_evicts_least_recently_used(tmp_path) -> None:
+    from nanobot.agent.tools.web_cache import CacheEntry
+
+    cache = WebCache(tmp_path, max_bytes=8000)
+    for name in ("a", "b", "c"):
+        entry = CacheEntry(f"https://x.test/{name}", f"https://x.test/{name}", 200, {}, 0.0, 0.0)
+        cache.put(entry, b"x" * 1500)
+        if name == "b":
+            cache.get("https://x.test/a")  # a becomes more recent than b
+    for name in ("d", "e"):
+        cache.put(CacheEntry(f"https://x.test/{name}", "", 200, {}, 0.0, 0.0), b"x" * 1500)
+
+    assert cache.get("https://x.test/b") is None
+    assert cache.get("https://x.test/a") is not None
+    assert cache.stats()["bytes"] <= 8000
+
+
+def test_freshness_lifetime() -> None:
+    assert freshness_lifetime({"cache-control": "max-age=60", "age": "10"}) == 50
+    assert freshness_lifetime({"cache-control": "private, no-store"}) is None
+    assert freshness_lifetime({"expires": "0"}) == 0
+    lifetime = freshness_lifetime({
+        "date": "Mon, 10 Mar 2025 00:00:00 GMT",
+        "last-modified": "Sat, 08 Mar 2025 00:00:00 GMT",
+    })
+    assert lifetime == pytest.approx(2 * 24 * 3600 * 0.1)
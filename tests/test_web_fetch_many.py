@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+import httpx
+
+from nanobot.agent.tools import web
+from nanobot.agent.tools.web import WebFetchManyTool, _share_budget
+
+
+def _serve(monkeypatch, handler) -> None:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(web, "get_http_client", lambda: client)
+
+
+async def test_fetches_concurrently_with_per_host_limit_and_shared_budget(monkeypatch) -> None:
+    active: dict[str, int] = {}
+    peak: dict[str, int] = {}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        active[host] = active.get(host, 0) + 1
+        peak[host] = max(peak.get(host, 0), active[host])
+        await asyncio.sleep(0.02)
+        active[host] -= 1
+        size = 100 if request.url.path == "/short" else 5000
+        return httpx.Response(200, headers={"content-type": "text/plain"}, text="x" * size)
+
+    _serve(monkeypatch, handler)
+    tool = WebFetchManyTool(max_per_host=2)
+    urls = ["https://a.test/short"] + [f"https://a.test/long{i}" for i in range(4)] + ["https://b.test/long"]
+
+    out = json.loads(await tool.execute(urls, maxChars=2100))
+
+    assert out["fetched"] == 6 and out["failed"] == 0
+    lengths = [r["length"] for r in out["results"]]
+    assert lengths == [100, 400, 400, 400, 400, 400]
+    assert all(r["truncated"] for r in out["results"][1:])
+    assert peak["a.test"] == 2
+
+
+async def test_reports_errors_and_timeouts_per_url(monkeypatch) -> None:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/slow":
+            await asyncio.sleep(5)
+        if request.url.path == "/missing":
+            return httpx.Response(404)
+        return httpx.Response(200, headers={"content-type": "text/plain"}, text="ok")
+
+    _serve(monkeypatch, handler)
+    out = json.loads(await WebFetchManyTool().execute(
+        ["https://a.test/ok", "https://a.test/missing", "https://a.test/slow", "ftp://a.test/x"], timeout=1,
+    ))
+
+    ok, missing, slow, bad = out["results"]
+    assert ok["text"] == "ok"
+    assert "404" in missing["error"]
+    assert slow["error"] == "timed out after 1s"
+    assert "validation failed" in bad["error"]
+
+
+def test_share_budget() -> None:
+    assert _share_budget([10, 1000, 1000], 1010) == [10, 500, 500]
+    assert _share_budget([10, 20], 1000) == [10, 20]
@@ -0,0 +1,61 @@
+import json
+
+import httpx
+
+from nanobot.agent.tools import web
+from nanobot.agent.tools.web import MIN_DOWNLOAD_BYTES, WebFetchTool
+
+
+class CountingStream(httpx.AsyncByteStream):
+    def __init__(self, chunk: bytes, count: int):
+        self.chunk, self.count, self.sent = chunk, count, 0
+
+    async def __aiter__(self):
+        for _ in range(self.count):
+            self.sent += 1
+            yield self.chunk
+
+
+def _serve(monkeypatch, headers: dict, stream: httpx.AsyncByteStream) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers=headers, stream=stream)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(web, "get_http_client", lambda: client)
+
+
+async def test_download_stops_at_byte_ceiling(monkeypatch) -> None:
+    stream = CountingStream(b"a" * 65536, 10_000)  # ~650 MB if read fully
+    _serve(monkeypatch, {"content-type": "text/plain"}, stream)
+
+    result = json.loads(await WebFetchTool().execute("https://files.test/huge.txt", maxChars=1000))
+
+    assert result["truncated"] is True and result["length"] == 1000
+    assert stream.sent * 65536 <= MIN_DOWNLOAD_BYTES + 65536
+
+
+async def test_binary_content_type_is_not_downloaded(monkeypatch) -> None:
+    stream = CountingStream(b"%PDF" * 1000, 100)
+    _serve(monkeypatch, {"content-type": "application/pdf"}, stream)
+
+    result = json.loads(await WebFetchTool().execute("https://files.test/doc.pdf"))
+
+    assert "Unsupported content type" in result["error"]
+    assert stream.sent == 0
+
+
+async def test_charset_is_decoded_incrementally(monkeypatch) -> None:
+    # Split a multi-byte character across chunks
+    body = "héllo wörld".encode("latin-1")
+    utf8 = "日本語テキスト".encode("utf-8")
+
+    _serve(monkeypatch, {"content-type": "text/plain; charset=iso-8859-1"}, CountingStream(body, 1))
+    assert json.loads(await WebFetchTool().execute("https://a.test/"))["text"] == "héllo wörld"
+
+    class Split(httpx.AsyncByteStream):
+        async def __aiter__(self):
+            yield utf8[:4]
+            yield utf8[4:]
+
+    _serve(monkeypatch, {"content-type": "text/plain"}, Split())
+    assert json.loads(await WebFetchTool().execute("https://a.test/"))["text"] == "日本語テキスト"
@@ -0,0 +1,70 @@
+import threading
+
+import httpx
+
+from nanobot.agent.tools import web
+from nanobot.agent.tools.web import WebSearchTool
+from nanobot.agent.tools.web_cache import SearchCache
+
+
+def _serve(monkeypatch, calls: list) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        n = int(request.url.params["count"])
+        items = [{"title": f"T{i}", "url": f"https://r.test/{i}", "description": "d"} for i in range(n)]
+        return httpx.Response(200, json={"web": {"results": items}})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(web, "get_http_client", lambda: client)
+
+
+async def test_normalized_queries_share_cached_results(monkeypatch) -> None:
+    calls: list = []
+    _serve(monkeypatch, calls)
+    cache = SearchCache(ttl=60)
+    main, sub = WebSearchTool(api_key="k", cache=cache), WebSearchTool(api_key="k", cache=cache)
+
+    first = await main.execute("Python  asyncio", count=5)
+    again = await sub.execute("python asyncio ", count=3)
+    more = await sub.execute("python asyncio", count=8)
+
+    assert len(calls) == 2  # Asking for more results than cached refetches
+    assert again.count("https://r.test/") == 3 and first.count("https://r.test/") == 5
+    assert more.count("https://r.test/") == 8
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+async def test_expired_entries_are_refetched_and_disk_cache_survives(monkeypatch, tmp_path) -> None:
+    calls: list = []
+    _serve(monkeypatch, calls)
+    path = tmp_path / "search.json"
+
+    await WebSearchTool(api_key="k", cache=SearchCache(ttl=60, path=path)).execute("nanobot")
+    await WebSearchTool(api_key="k", cache=SearchCache(ttl=60, path=path)).execute("NANOBOT")
+    assert len(calls) == 1
+
+    await WebSearchTool(api_key="k", cache=SearchCache(ttl=0, path=tmp_path / "other.json")).execute("x")
+    await WebSearchTool(api_key="k", cache=SearchCache(ttl=0, path=tmp_path / "other.json")).execute("x")
+    assert len(calls) == 3
+
+
+def test_lru_bound() -> None:
+    cache = SearchCache(max_entries=2)
+    for q in ("a", "b", "c"):
+        cache.put(q, 5, [])
+    assert cache.get("a", 5) is None and cache.get("c", 5) == []
+
+
+async def test_cache_file_is_read_off_the_event_loop(monkeypatch, tmp_path) -> None:
+    _serve(monkeypatch, [])
+    threads: list = []
+    load = SearchCache._load
+
+    def _load(self) -> None:
+        threads.append(threading.get_ident())
+        load(self)
+
+    monkeypatch.setattr(SearchCache, "_load", _load)
+    await WebSearchTool(api_key="k", cache=SearchCache(path=tmp_path / "s.json")).execute("q")
+
+    assert threads and threading.get_ident() not in threads